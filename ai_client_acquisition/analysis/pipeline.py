@@ -0,0 +1,68 @@
+import logging
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from ollama_client import OllamaClient
+from ai_client_acquisition.analysis.seo_analyzer import SEOAnalyzer
+from ai_client_acquisition.extraction.contact_extractor import ContactExtractor
+from ai_client_acquisition.discovery.google_places_client import GooglePlacesClient
+
+logger = logging.getLogger(__name__)
+
+
+class AnalysisPipeline:
+    """
+    SEO, contact and AI analysis of a site, and the Google Places lookups of
+    the business finder. Used by the dashboards and the background job runner.
+    Instances are not shared between threads.
+    """
+
+    def __init__(self, seo_analyzer: Optional[SEOAnalyzer] = None,
+                 contact_extractor: Optional[ContactExtractor] = None,
+                 ollama_client: Optional[OllamaClient] = None,
+                 google_places_client: Optional[GooglePlacesClient] = None):
+        self.seo_analyzer = seo_analyzer or SEOAnalyzer()
+        self.contact_extractor = contact_extractor or ContactExtractor()
+        self.ollama_client = ollama_client or OllamaClient()
+        self._google_places_client = google_places_client
+
+    @property
+    def google_places_client(self) -> GooglePlacesClient:
+        if self._google_places_client is None:
+            self._google_places_client = GooglePlacesClient()
+        return self._google_places_client
+
+    def analyze(self, url: str) -> Dict:
+        """
+        Run the full analysis of one URL and return the stored payload.
+        """
+        seo_result = self.seo_analyzer.analyze_url(url)
+        contact_result = self.contact_extractor.extract_from_url(url)
+        ai_result = self.ollama_client.generate_seo_analysis(url, seo_result)
+        return {
+            'url': url,
+            'seo_analysis': seo_result,
+            'contact_info': contact_result,
+            'ai_analysis': ai_result,
+            'timestamp': datetime.now().isoformat()
+        }
+
+    def find_businesses(self, city: str, industry: str, batch_size: Optional[int] = None,
+                        page: int = 1) -> List[Dict]:
+        """
+        Nearby Search results for an industry in a city (without details).
+        """
+        businesses = self.google_places_client.search_places(industry, city, page=page)
+        if batch_size is not None:
+            businesses = businesses[:batch_size]
+        return businesses
+
+    def business_details(self, place_id: str) -> Dict:
+        """
+        Website and address of a place; empty strings when unknown.
+        """
+        details = self.google_places_client.get_place_details(place_id) or {}
+        return {
+            'website': details.get('website', ''),
+            'address': details.get('formatted_address', ''),
+        }
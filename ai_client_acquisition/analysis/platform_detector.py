@@ -0,0 +1,138 @@
+import json
+import logging
+import os
+import re
+from collections import defaultdict
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+RULES_PATH = os.path.join(os.path.dirname(__file__), 'platform_rules.json')
+
+_HEAD_END = re.compile(r'</head\s*>', re.IGNORECASE)
+_SCRIPT_TAG = re.compile(r'<script\b[^>]*>', re.IGNORECASE)
+_GENERATOR_TAG = re.compile(r'<meta\b[^>]*\bname\s*=\s*["\']?generator\b[^>]*>', re.IGNORECASE)
+_CONTENT_ATTR = re.compile(r'\bcontent\s*=\s*["\']([^"\']*)', re.IGNORECASE)
+_COOKIE_NAME = re.compile(r'(?:^|,\s*)([^=;,\s]+)=')
+
+
+def _alternation(patterns: List[Tuple[str, str]]) -> Optional[re.Pattern]:
+    """
+    One case-insensitive regex matching any of the (group name, pattern)
+    pairs; the match's lastgroup names the pattern that matched.
+    """
+    if not patterns:
+        return None
+    return re.compile('|'.join(f'(?P<{name}>{pattern})' for name, pattern in patterns), re.IGNORECASE)
+
+
+class PlatformDetector:
+    """
+    Identify the CMS or site builder behind a page from the fingerprints in
+    platform_rules.json: response headers, cookie names, the generator meta
+    tag, and script/asset paths.
+
+    The path rules of every platform are compiled into one regex, run once
+    over the page's <head> and the <script> tags of its body (never the
+    whole text), so detection is cheap enough for every crawled page.
+    """
+
+    def __init__(self, rules_path: str = RULES_PATH):
+        with open(rules_path, 'r', encoding='utf-8') as f:
+            self.rules: Dict[str, Dict] = json.load(f)
+        # Group name -> (platform, evidence label)
+        self._groups: Dict[str, Tuple[str, str]] = {}
+        markup, generator, cookies = [], [], []
+        self._headers: Dict[str, List[Tuple[str, re.Pattern]]] = defaultdict(list)
+        for platform, rule in self.rules.items():
+            for kind in ('scripts', 'assets'):
+                markup.extend(self._group(platform, kind, pattern) for pattern in rule.get(kind, []))
+            generator.extend(self._group(platform, 'generator', pattern) for pattern in rule.get('generator', []))
+            cookies.extend(self._group(platform, 'cookie', pattern) for pattern in rule.get('cookies', []))
+            for header, pattern in rule.get('headers', {}).items():
+                self._headers[header.lower()].append((platform, re.compile(pattern, re.IGNORECASE)))
+        self._markup = _alternation(markup)
+        self._generator = _alternation(generator)
+        self._cookies = _alternation([(name, f'^(?:{pattern})') for name, pattern in cookies])
+
+    def _group(self, platform: str, kind: str, pattern: str) -> Tuple[str, str]:
+        name = f'g{len(self._groups)}'
+        self._groups[name] = (platform, f'{kind}:{pattern}')
+        return name, pattern
+
+    @staticmethod
+    def _header_items(headers: Optional[Mapping]) -> Iterable[Tuple[str, str]]:
+        """
+        (lowercase name, value) pairs from requests' or Scrapy's headers.
+        """
+        for name, values in (headers or {}).items():
+            if isinstance(name, bytes):
+                name = name.decode('latin-1')
+            if not isinstance(values, (list, tuple)):
+                values = [values]
+            for value in values:
+                yield name.lower(), value.decode('latin-1') if isinstance(value, bytes) else str(value)
+
+    def detect(self, html: str, headers: Optional[Mapping] = None) -> Dict[str, List[str]]:
+        """
+        Evidence found for each platform, strongest platform first.
+        """
+        evidence: Dict[str, List[str]] = defaultdict(list)
+
+        def record(regex: Optional[re.Pattern], text: str) -> None:
+            if regex is None or not text:
+                return
+            for match in regex.finditer(text):
+                platform, label = self._groups[match.lastgroup]
+                if label not in evidence[platform]:
+                    evidence[platform].append(label)
+
+        for name, value in self._header_items(headers):
+            if name == 'set-cookie':
+                for cookie in _COOKIE_NAME.findall(value):
+                    record(self._cookies, cookie)
+            for platform, pattern in self._headers.get(name, []):
+                if pattern.search(value) and f'header:{name}' not in evidence[platform]:
+                    evidence[platform].append(f'header:{name}')
+
+        html = html or ''
+        head_end = _HEAD_END.search(html)
+        head = html[:head_end.start()] if head_end else html[:100_000]
+        body_scripts = ' '.join(_SCRIPT_TAG.findall(html, head_end.end())) if head_end else ''
+        record(self._markup, head)
+        record(self._markup, body_scripts)
+        for tag in _GENERATOR_TAG.findall(head):
+            content = _CONTENT_ATTR.search(tag)
+            if content:
+                record(self._generator, content.group(1).strip())
+
+        # Rules-file order breaks ties
+        order = list(self.rules)
+        ranked = sorted(evidence, key=lambda platform: (-len(evidence[platform]), order.index(platform)))
+        return {platform: evidence[platform] for platform in ranked if evidence[platform]}
+
+    def detect_platform(self, html: str, headers: Optional[Mapping] = None) -> str:
+        """
+        The most likely platform, or 'custom' when no fingerprint matches.
+        """
+        return next(iter(self.detect(html, headers)), 'custom')
+
+    def platform_indicators(self, html: str, headers: Optional[Mapping] = None) -> Dict[str, bool]:
+        """
+        {platform: True} for each detected platform (strongest first), or
+        {'custom': True} when none is, as stored in `platform_indicators`.
+        """
+        return {platform: True for platform in self.detect(html, headers)} or {'custom': True}
+
+
+_detector = None
+
+
+def get_platform_detector() -> PlatformDetector:
+    """
+    Shared detector, so the rules are compiled once per process.
+    """
+    global _detector
+    if _detector is None:
+        _detector = PlatformDetector()
+    return _detector
@@ -8,6 +8,7 @@ import re
 from nltk.tokenize import word_tokenize
 from nltk.corpus import stopwords
 import nltk
+from .platform_detector import get_platform_detector
 from .seo_checks import (
     TitleTagChecker,
     MetaTagsChecker,
@@ -48,6 +49,7 @@ class SEOAnalyzer:
         self.redirect_checker = RedirectChecker()
         self.sitemap_checker = SitemapChecker()
         self.robots_checker = RobotsChecker()
+        self.platform_detector = get_platform_detector()
 
     def analyze_url(self, url: str) -> Dict:
         """
@@ -57,57 +59,50 @@ class SEOAnalyzer:
             headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.3'}
             response = requests.get(url, timeout=10, headers=headers)
             response.raise_for_status()
-            return self.analyze_html(response.text, url)
+            return self.analyze_html(response.text, url, headers=response.headers)
         except Exception as e:
             logger.error(f"Error analyzing URL {url}: {str(e)}")
             return {}
 
-    def analyze_html(self, html: str, base_url: str) -> Dict:
+    def analyze_html(self, html: str, base_url: str, network_checks: bool = True,
+                     headers: Optional[Dict] = None) -> Dict:
         """
-        Analyze SEO elements from HTML content.
+        Analyze SEO elements from HTML content. With network_checks=False only
+        the checks that work on the HTML itself run (no SSL handshake, link,
+        redirect, sitemap or robots requests), e.g. on pages already crawled.
+        The response headers, when given, help identify the platform.
         """
         try:
             # Run all SEO checks
-            title_analysis = self.title_checker.check(html)
-            meta_analysis = self.meta_checker.check(html)
-            h1_analysis = self.h1_checker.check(html)
-            word_count_analysis = self.word_count_checker.check(html)
-            ssl_analysis = self.ssl_checker.check(base_url)
-            logger.info(f"SSL Analysis Result: {ssl_analysis}")
-            broken_links_analysis = self.broken_links_checker.check(html, base_url)
-            image_alt_analysis = self.image_alt_checker.check(html)
-            redirect_analysis = self.redirect_checker.check(base_url)
-            sitemap_analysis = self.sitemap_checker.check(base_url)
-            robots_analysis = self.robots_checker.check(base_url)
+            checks = {
+                'title': self.title_checker.check(html),
+                'meta_tags': self.meta_checker.check(html),
+                'h1': self.h1_checker.check(html),
+                'word_count': self.word_count_checker.check(html),
+            }
+            if network_checks:
+                checks['ssl'] = self.ssl_checker.check(base_url)
+                logger.info(f"SSL Analysis Result: {checks['ssl']}")
+                checks['broken_links'] = self.broken_links_checker.check(html, base_url)
+            else:
+                checks['ssl'] = {'is_secure': urlparse(base_url).scheme == 'https'}
+            checks['images'] = self.image_alt_checker.check(html)
+            if network_checks:
+                checks['redirects'] = self.redirect_checker.check(base_url)
+                checks['sitemap'] = self.sitemap_checker.check(base_url)
+                checks['robots'] = self.robots_checker.check(base_url)
             
             # Combine all analyses
             result = {
-                'title': title_analysis,
-                'meta_tags': meta_analysis,
-                'h1': h1_analysis,
-                'word_count': word_count_analysis,
-                'ssl': ssl_analysis,
-                'broken_links': broken_links_analysis,
-                'images': image_alt_analysis,
-                'redirects': redirect_analysis,
-                'sitemap': sitemap_analysis,
-                'robots': robots_analysis,
+                **checks,
                 'keywords': self._extract_keywords(html),
                 'content_analysis': self._analyze_content(html),
-                'checks': {
-                    'title': title_analysis,
-                    'meta_tags': meta_analysis,
-                    'h1': h1_analysis,
-                    'word_count': word_count_analysis,
-                    'ssl': ssl_analysis,
-                    'broken_links': broken_links_analysis,
-                    'images': image_alt_analysis,
-                    'redirects': redirect_analysis,
-                    'sitemap': sitemap_analysis,
-                    'robots': robots_analysis,
-                }
+                'platform_indicators': self.platform_detector.platform_indicators(html, headers),
+                'checks': dict(checks)
             }
             
+            result['platform'] = next(iter(result['platform_indicators']))
+            
             # Add overall recommendations
             result['recommendations'] = self._get_overall_recommendations(result)
             
@@ -254,12 +249,12 @@ class SEOAnalyzer:
         if analysis.get('images', {}).get('all_have_alt', True) is False:
             recommendations.append('Ensure all images have descriptive alt text')
         
-        # Sitemap recommendations
-        if not analysis.get('sitemap', {}).get('exists', False):
+        # Sitemap recommendations (not checked on crawled pages)
+        if 'sitemap' in analysis and not analysis['sitemap'].get('exists', False):
             recommendations.append('Add a sitemap.xml file')
         
         # Robots.txt recommendations
-        if not analysis.get('robots', {}).get('exists', False):
+        if 'robots' in analysis and not analysis['robots'].get('exists', False):
             recommendations.append('Add a robots.txt file')
         
         return recommendations
@@ -0,0 +1,608 @@
+import json
+import logging
+import math
+import os
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from ..discovery.canonical import url_key
+from .models import PlatformType
+from .payload_codec import decode_payload, encode_payload
+
+logger = logging.getLogger(__name__)
+
+# Keep the full payload in analysis_results.analysis_data unless disabled
+# (JSON or compressed, see payload_codec). The normalized tables below are
+# always written and are enough to rebuild a payload for display when the raw
+# blob is not stored.
+STORE_RAW_ANALYSIS = os.getenv("STORE_RAW_ANALYSIS", "true").lower() in ("1", "true", "yes")
+
+NORMALIZED_SCHEMA = [
+    '''
+    CREATE TABLE IF NOT EXISTS analysis_pages (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        url TEXT NOT NULL UNIQUE,
+        domain TEXT
+    )
+    ''',
+    'CREATE INDEX IF NOT EXISTS ix_analysis_pages_domain ON analysis_pages(domain)',
+    '''
+    CREATE TABLE IF NOT EXISTS analysis_scores (
+        analysis_id INTEGER PRIMARY KEY REFERENCES analysis_results(id),
+        page_id INTEGER REFERENCES analysis_pages(id),
+        overall_score INTEGER,
+        word_count INTEGER,
+        images_without_alt INTEGER,
+        broken_links_count INTEGER,
+        is_secure BOOLEAN,
+        has_meta_description BOOLEAN,
+        has_h1 BOOLEAN,
+        has_email BOOLEAN,
+        has_error BOOLEAN
+    )
+    ''',
+    'CREATE INDEX IF NOT EXISTS ix_analysis_scores_score ON analysis_scores(overall_score)',
+    'CREATE INDEX IF NOT EXISTS ix_analysis_scores_page ON analysis_scores(page_id)',
+    '''
+    CREATE TABLE IF NOT EXISTS analysis_check_results (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        analysis_id INTEGER NOT NULL REFERENCES analysis_results(id),
+        check_name TEXT NOT NULL,
+        passed BOOLEAN,
+        error TEXT,
+        details TEXT
+    )
+    ''',
+    'CREATE INDEX IF NOT EXISTS ix_check_results_analysis ON analysis_check_results(analysis_id)',
+    'CREATE INDEX IF NOT EXISTS ix_check_results_check ON analysis_check_results(check_name, passed)',
+    '''
+    CREATE TABLE IF NOT EXISTS analysis_contacts (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        analysis_id INTEGER NOT NULL REFERENCES analysis_results(id),
+        kind TEXT NOT NULL,
+        label TEXT,
+        value TEXT NOT NULL
+    )
+    ''',
+    'CREATE INDEX IF NOT EXISTS ix_contacts_analysis ON analysis_contacts(analysis_id)',
+    'CREATE INDEX IF NOT EXISTS ix_contacts_kind_value ON analysis_contacts(kind, value)',
+    '''
+    CREATE TABLE IF NOT EXISTS analysis_recommendations (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        analysis_id INTEGER NOT NULL REFERENCES analysis_results(id),
+        source TEXT NOT NULL,
+        position INTEGER NOT NULL,
+        text TEXT NOT NULL
+    )
+    ''',
+    'CREATE INDEX IF NOT EXISTS ix_recommendations_analysis ON analysis_recommendations(analysis_id)',
+]
+
+NORMALIZED_TABLES = (
+    'analysis_scores',
+    'analysis_check_results',
+    'analysis_contacts',
+    'analysis_recommendations',
+)
+
+
+def normalize_analysis(payload: Dict) -> Dict:
+    """
+    Split an analysis payload into rows for the normalized tables.
+    """
+    seo = payload.get('seo_analysis') or {}
+    checks = seo.get('checks') or {}
+    contact_info = payload.get('contact_info') or {}
+
+    def check_value(name: str, key: str):
+        data = checks.get(name) or seo.get(name) or {}
+        return data.get(key) if isinstance(data, dict) else None
+
+    word_count = check_value('word_count', 'word_count')
+    if word_count is None:
+        word_count = (seo.get('content_analysis') or {}).get('word_count')
+
+    emails = contact_info.get('emails') or []
+    scores = {
+        'overall_score': seo.get('overall_score'),
+        'word_count': word_count,
+        'images_without_alt': check_value('images', 'images_without_alt'),
+        'broken_links_count': check_value('broken_links', 'broken_links_count'),
+        'is_secure': check_value('ssl', 'is_secure'),
+        'has_meta_description': check_value('meta_tags', 'has_meta_description'),
+        'has_h1': check_value('h1', 'has_h1'),
+        'has_email': bool(emails),
+        'has_error': any(isinstance(c, dict) and 'error' in c for c in checks.values()),
+    }
+
+    check_rows = []
+    for name, data in checks.items():
+        if not isinstance(data, dict):
+            data = {'value': data}
+        error = data.get('error')
+        passed = error is None and not data.get('recommendations')
+        check_rows.append((name, passed, error, json.dumps(data, ensure_ascii=False, default=str)))
+
+    contact_rows = [('email', None, email) for email in emails]
+    contact_rows += [('phone', None, phone) for phone in contact_info.get('phones') or []]
+    contact_rows += [
+        ('social', platform, link)
+        for platform, link in (contact_info.get('social_media') or {}).items() if link
+    ]
+    if contact_info.get('contact_page_url'):
+        contact_rows.append(('contact_page', None, contact_info['contact_page_url']))
+
+    recommendation_rows = [
+        ('seo', position, str(text))
+        for position, text in enumerate(seo.get('recommendations') or [])
+    ]
+    ai_text = _ai_text(payload.get('ai_analysis'))
+    if ai_text:
+        recommendation_rows.append(('ai', 0, ai_text))
+
+    return {
+        'scores': scores,
+        'checks': check_rows,
+        'contacts': contact_rows,
+        'recommendations': recommendation_rows,
+    }
+
+
+def _ai_text(ai_analysis) -> Optional[str]:
+    """
+    The Ollama client returns plain text, older rows store {'response': ...}.
+    """
+    if isinstance(ai_analysis, str):
+        return ai_analysis
+    if isinstance(ai_analysis, dict) and 'response' in ai_analysis:
+        return ai_analysis['response']
+    return None
+
+
+def _upsert_page(conn, url: str) -> int:
+    conn.execute(
+        'INSERT OR IGNORE INTO analysis_pages (url, domain) VALUES (?, ?)',
+        (url, urlparse(url).netloc.lower())
+    )
+    return conn.execute('SELECT id FROM analysis_pages WHERE url = ?', (url,)).fetchone()[0]
+
+
+def write_normalized(conn, analysis_id: int, url: str, payload: Dict) -> None:
+    """
+    (Re)write the normalized rows for one analysis.
+    """
+    rows = normalize_analysis(payload)
+    for table in NORMALIZED_TABLES:
+        conn.execute(f'DELETE FROM {table} WHERE analysis_id = ?', (analysis_id,))
+
+    page_id = _upsert_page(conn, url)
+    scores = rows['scores']
+    conn.execute(
+        f'''
+        INSERT INTO analysis_scores (analysis_id, page_id, {", ".join(scores)})
+        VALUES (?, ?, {", ".join("?" for _ in scores)})
+        ''',
+        (analysis_id, page_id, *scores.values())
+    )
+    conn.executemany(
+        'INSERT INTO analysis_check_results (analysis_id, check_name, passed, error, details) VALUES (?, ?, ?, ?, ?)',
+        [(analysis_id, *row) for row in rows['checks']]
+    )
+    conn.executemany(
+        'INSERT INTO analysis_contacts (analysis_id, kind, label, value) VALUES (?, ?, ?, ?)',
+        [(analysis_id, *row) for row in rows['contacts']]
+    )
+    conn.executemany(
+        'INSERT INTO analysis_recommendations (analysis_id, source, position, text) VALUES (?, ?, ?, ?)',
+        [(analysis_id, *row) for row in rows['recommendations']]
+    )
+
+
+def upsert_business(conn, place_id: str, search_query: str, name: str, address: str, website: str) -> int:
+    """
+    Insert or refresh a Google Places business and return its id.
+    """
+    return conn.execute(
+        '''
+        INSERT INTO businesses (search_query, place_id, name, address, website)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT(place_id) DO UPDATE SET
+          address = excluded.address,
+          website = excluded.website
+        RETURNING id
+        ''',
+        (search_query, place_id, name, address, website)
+    ).fetchone()[0]
+
+
+def save_analysis(conn, url: str, payload: Dict, business_id: Optional[int] = None,
+                  store_raw: Optional[bool] = None) -> int:
+    """
+    Store (or replace) the analysis for this url/business and its normalized
+    rows. Returns the analysis id. The caller owns the transaction.
+    """
+    if store_raw is None:
+        store_raw = STORE_RAW_ANALYSIS
+    analysis_data = encode_payload(conn, payload) if store_raw else None
+    # Conflict target matches ux_analysis_results_url_business (see migrations)
+    analysis_id = conn.execute(
+        '''
+        INSERT INTO analysis_results (business_id, url, url_key, analysis_data)
+        VALUES (?, ?, ?, ?)
+        ON CONFLICT(url, IFNULL(business_id, 0)) DO UPDATE SET
+            url_key = excluded.url_key,
+            analysis_data = excluded.analysis_data,
+            synced_to_hubspot = FALSE,
+            timestamp = CURRENT_TIMESTAMP
+        RETURNING id
+        ''',
+        (business_id, url, url_key(url), analysis_data)
+    ).fetchone()[0]
+    write_normalized(conn, analysis_id, url, payload)
+    sync_company(conn, analysis_id, url, payload, business_id)
+    return analysis_id
+
+
+def _platform_name(payload: Dict) -> str:
+    """
+    PlatformType member name (what SQLAlchemy stores) for a payload.
+    """
+    seo = payload.get('seo_analysis') or {}
+    platform = payload.get('platform_type') or seo.get('platform')
+    if not platform:
+        indicators = seo.get('platform_indicators') or {}
+        platform = next((name for name, found in indicators.items() if found), None)
+    try:
+        return PlatformType(str(platform).lower()).name
+    except ValueError:
+        return PlatformType.UNKNOWN.name
+
+
+def sync_company(conn, analysis_id: int, url: str, payload: Dict,
+                 business_id: Optional[int] = None) -> int:
+    """
+    Mirror an analysis into the companies/contact_info/seo_analysis tables used
+    by the discovery and outreach scripts. Returns the company id.
+    """
+    now = datetime.utcnow().isoformat(sep=' ')
+    company_name = None
+    if business_id is not None:
+        row = conn.execute('SELECT name FROM businesses WHERE id = ?', (business_id,)).fetchone()
+        company_name = row[0] if row else None
+
+    company_id = conn.execute(
+        '''
+        INSERT INTO companies (website_url, platform_type, company_name, discovery_date, last_updated, business_id)
+        VALUES (?, ?, ?, ?, ?, ?)
+        ON CONFLICT(website_url) DO UPDATE SET
+            platform_type = CASE WHEN excluded.platform_type = 'UNKNOWN'
+                                 THEN companies.platform_type ELSE excluded.platform_type END,
+            company_name = COALESCE(companies.company_name, excluded.company_name),
+            business_id = COALESCE(excluded.business_id, companies.business_id),
+            last_updated = excluded.last_updated
+        RETURNING id
+        ''',
+        (url, _platform_name(payload), company_name, now, now, business_id)
+    ).fetchone()[0]
+
+    contact_info = payload.get('contact_info') or {}
+    emails = contact_info.get('emails') or []
+    phones = contact_info.get('phones') or []
+    conn.execute('DELETE FROM contact_info WHERE company_id = ?', (company_id,))
+    conn.execute(
+        '''
+        INSERT INTO contact_info (company_id, email, phone, social_media, contact_page_url, last_verified)
+        VALUES (?, ?, ?, ?, ?, ?)
+        ''',
+        (
+            company_id,
+            emails[0] if emails else None,
+            phones[0] if phones else None,
+            json.dumps(contact_info.get('social_media') or {}),
+            contact_info.get('contact_page_url'),
+            now,
+        )
+    )
+
+    seo = payload.get('seo_analysis') or {}
+    checks = seo.get('checks') or {}
+    keywords = seo.get('keywords') or {}
+    # Counted by the crawler on the site's start page
+    link_counts = payload.get('link_counts') or {}
+    conn.execute('DELETE FROM seo_analysis WHERE company_id = ?', (company_id,))
+    conn.execute(
+        '''
+        INSERT INTO seo_analysis (company_id, title_tag, meta_description, header_structure, keywords,
+                                  images_without_alt, internal_links, external_links, analysis_date, analysis_id)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''',
+        (
+            company_id,
+            (checks.get('title') or {}).get('text') or None,
+            (checks.get('meta_tags') or {}).get('meta_description') or None,
+            json.dumps({'h1': (checks.get('h1') or {}).get('h1_texts') or []}) if checks.get('h1') else None,
+            json.dumps({
+                'primary': keywords.get('primary_keywords') or [],
+                'secondary': keywords.get('secondary_keywords') or [],
+            }),
+            (checks.get('images') or {}).get('images_without_alt'),
+            link_counts.get('internal_links'),
+            link_counts.get('external_links'),
+            now,
+            analysis_id,
+        )
+    )
+    return company_id
+
+
+def analysis_exists(conn, url: str, direct_only: bool = False) -> bool:
+    """
+    Whether the URL has been analyzed, optionally only as a direct (non-business) URL.
+    Any URL with the same canonical key (scheme, www., tracking parameters...) counts.
+    """
+    query = 'SELECT 1 FROM analysis_results WHERE url_key = ?'
+    if direct_only:
+        query += ' AND business_id IS NULL'
+    return conn.execute(query + ' LIMIT 1', (url_key(url),)).fetchone() is not None
+
+
+def load_latest_analysis(conn, url: str) -> Optional[Dict]:
+    """
+    Most recent stored analysis for a URL (direct or business-linked), if any,
+    matched by canonical key.
+    """
+    row = conn.execute(
+        'SELECT id, analysis_data FROM analysis_results WHERE url_key = ? ORDER BY timestamp DESC, id DESC LIMIT 1',
+        (url_key(url),)
+    ).fetchone()
+    return build_payload(conn, row[0], row[1]) if row else None
+
+
+def build_payload(conn, analysis_id: int, analysis_data) -> Dict:
+    """
+    Return the analysis payload, from the raw blob (JSON or compressed) when
+    present and rebuilt from the normalized tables otherwise.
+    """
+    if analysis_data:
+        return decode_payload(conn, analysis_data)
+
+    url_row = conn.execute('SELECT url FROM analysis_results WHERE id = ?', (analysis_id,)).fetchone()
+    score_row = conn.execute(
+        'SELECT overall_score FROM analysis_scores WHERE analysis_id = ?', (analysis_id,)
+    ).fetchone()
+
+    checks = {
+        name: json.loads(details)
+        for name, details in conn.execute(
+            'SELECT check_name, details FROM analysis_check_results WHERE analysis_id = ? ORDER BY id',
+            (analysis_id,)
+        )
+    }
+    seo = dict(checks)
+    seo['checks'] = checks
+    seo['overall_score'] = score_row[0] if score_row else 0
+
+    contact_info = {'emails': [], 'phones': [], 'social_media': {}, 'contact_page_url': None}
+    for kind, label, value in conn.execute(
+        'SELECT kind, label, value FROM analysis_contacts WHERE analysis_id = ? ORDER BY id', (analysis_id,)
+    ):
+        if kind == 'email':
+            contact_info['emails'].append(value)
+        elif kind == 'phone':
+            contact_info['phones'].append(value)
+        elif kind == 'social':
+            contact_info['social_media'][label] = value
+        elif kind == 'contact_page':
+            contact_info['contact_page_url'] = value
+
+    seo['recommendations'] = []
+    ai_analysis = None
+    for source, text in conn.execute(
+        'SELECT source, text FROM analysis_recommendations WHERE analysis_id = ? ORDER BY source, position',
+        (analysis_id,)
+    ):
+        if source == 'ai':
+            ai_analysis = text
+        else:
+            seo['recommendations'].append(text)
+
+    return {
+        'url': url_row[0] if url_row else None,
+        'seo_analysis': seo,
+        'contact_info': contact_info,
+        'ai_analysis': ai_analysis,
+    }
+
+
+def backfill_normalized(conn) -> int:
+    """
+    Populate the normalized tables for analyses stored before they existed.
+    """
+    rows = conn.execute(
+        '''
+        SELECT ar.id, ar.url, ar.analysis_data
+        FROM analysis_results ar
+        LEFT JOIN analysis_scores s ON s.analysis_id = ar.id
+        WHERE s.analysis_id IS NULL AND ar.analysis_data IS NOT NULL
+        '''
+    ).fetchall()
+    count = 0
+    for analysis_id, url, analysis_data in rows:
+        try:
+            write_normalized(conn, analysis_id, url, decode_payload(conn, analysis_data))
+            count += 1
+        except (ValueError, TypeError) as e:
+            logger.error(f"Skipping analysis {analysis_id} during backfill: {e}")
+    return count
+
+
+# Sort keys accepted by query_analyses(); ids break ties so pages are stable
+ANALYSIS_SORTS = {
+    'newest': 'ar.timestamp DESC, ar.id DESC',
+    'oldest': 'ar.timestamp ASC, ar.id ASC',
+    'score_desc': 'IFNULL(s.overall_score, 0) DESC, ar.id DESC',
+    'score_asc': 'IFNULL(s.overall_score, 0) ASC, ar.id ASC',
+    'url': 'ar.url ASC, ar.id ASC',
+}
+
+_ANALYSIS_SELECT = (
+    'SELECT ar.id, ar.url, ar.timestamp, ar.business_id, b.name, b.website, b.search_query, '
+    's.overall_score, s.has_email'
+)
+
+_ANALYSIS_FROM = '''
+    FROM analysis_results ar
+    LEFT JOIN businesses b ON b.id = ar.business_id
+    LEFT JOIN analysis_scores s ON s.analysis_id = ar.id
+'''
+
+
+def _analysis_record(conn, row, include_payload: bool) -> Dict:
+    record = {
+        'id': row[0],
+        'url': row[1],
+        'timestamp': row[2],
+        'business_id': row[3],
+        'business_name': row[4],
+        'website': row[5],
+        'search_query': row[6],
+        'overall_score': row[7] or 0,
+        'has_email': bool(row[8]),
+    }
+    if include_payload:
+        record['payload'] = build_payload(conn, row[0], row[9])
+    return record
+
+
+def _analysis_filters(search_query: Optional[str], direct: Optional[bool], min_score: Optional[int],
+                      max_score: Optional[int], since: Optional[date], until: Optional[date],
+                      has_email: Optional[bool]) -> Tuple[str, List]:
+    clauses, params = [], []
+    if direct is True:
+        clauses.append('ar.business_id IS NULL')
+    elif direct is False:
+        clauses.append('ar.business_id IS NOT NULL')
+    if search_query is not None:
+        clauses.append('b.search_query = ?')
+        params.append(search_query)
+    if min_score is not None:
+        clauses.append('IFNULL(s.overall_score, 0) >= ?')
+        params.append(min_score)
+    if max_score is not None:
+        clauses.append('IFNULL(s.overall_score, 0) <= ?')
+        params.append(max_score)
+    # Timestamps are stored as 'YYYY-MM-DD HH:MM:SS', so date strings compare correctly
+    if since is not None:
+        clauses.append('ar.timestamp >= ?')
+        params.append(since.isoformat())
+    if until is not None:
+        clauses.append('ar.timestamp < ?')
+        params.append((until + timedelta(days=1)).isoformat())
+    if has_email is not None:
+        clauses.append('IFNULL(s.has_email, 0) = ?')
+        params.append(int(has_email))
+    return (' WHERE ' + ' AND '.join(clauses)) if clauses else '', params
+
+
+def query_analyses(conn, search_query: Optional[str] = None, direct: Optional[bool] = None,
+                   min_score: Optional[int] = None, max_score: Optional[int] = None,
+                   since: Optional[date] = None, until: Optional[date] = None,
+                   has_email: Optional[bool] = None, sort: str = 'newest', page: int = 1,
+                   page_size: Optional[int] = 20, include_payload: bool = True) -> Dict:
+    """
+    One page of analyses matching the filters. Only the rows on the page are
+    read and decoded; page_size=None returns every match. direct=True keeps
+    direct-URL analyses only, direct=False business-linked ones only.
+    """
+    if sort not in ANALYSIS_SORTS:
+        raise ValueError(f"Unknown sort: {sort}")
+    where, params = _analysis_filters(search_query, direct, min_score, max_score, since, until, has_email)
+
+    total = conn.execute('SELECT COUNT(*)' + _ANALYSIS_FROM + where, params).fetchone()[0]
+    pages = max(1, math.ceil(total / page_size)) if page_size else 1
+    page = min(max(1, page), pages)
+
+    query = (
+        _ANALYSIS_SELECT + (', ar.analysis_data' if include_payload else '')
+        + _ANALYSIS_FROM + where + ' ORDER BY ' + ANALYSIS_SORTS[sort]
+    )
+    if page_size:
+        query += ' LIMIT ? OFFSET ?'
+        params = params + [page_size, (page - 1) * page_size]
+
+    rows = [_analysis_record(conn, row, include_payload) for row in conn.execute(query, params).fetchall()]
+    return {'rows': rows, 'total': total, 'page': page, 'pages': pages, 'page_size': page_size}
+
+
+def iter_analyses(conn, search_query: Optional[str] = None, direct: Optional[bool] = None,
+                  min_score: Optional[int] = None, max_score: Optional[int] = None,
+                  since: Optional[date] = None, until: Optional[date] = None,
+                  has_email: Optional[bool] = None, chunk_size: int = 500,
+                  include_payload: bool = True) -> Iterator[Dict]:
+    """
+    Every analysis matching the filters, in id order, read chunk_size rows at
+    a time (keyset pagination), so callers can stream any number of rows.
+    """
+    where, params = _analysis_filters(search_query, direct, min_score, max_score, since, until, has_email)
+    where = (where + ' AND' if where else ' WHERE') + ' ar.id > ?'
+    query = _ANALYSIS_SELECT + (', ar.analysis_data' if include_payload else '') + _ANALYSIS_FROM + where + ' ORDER BY ar.id LIMIT ?'
+
+    last_id = 0
+    while True:
+        chunk = conn.execute(query, params + [last_id, chunk_size]).fetchall()
+        for row in chunk:
+            yield _analysis_record(conn, row, include_payload)
+        if len(chunk) < chunk_size:
+            return
+        last_id = chunk[-1][0]
+
+
+def list_search_queries(conn) -> List[str]:
+    """
+    Business searches that have at least one stored analysis.
+    """
+    return [row[0] for row in conn.execute(
+        '''
+        SELECT DISTINCT b.search_query
+        FROM businesses b
+        JOIN analysis_results ar ON ar.business_id = b.id
+        WHERE b.search_query IS NOT NULL
+        ORDER BY b.search_query
+        '''
+    )]
+
+
+def get_change_counter(conn, name: str = 'analyses') -> int:
+    """
+    Bumped by triggers whenever the analysis tables change (see migrations);
+    use it as a cache key for anything derived from them.
+    """
+    row = conn.execute('SELECT version FROM change_counters WHERE name = ?', (name,)).fetchone()
+    return row[0] if row else 0
+
+
+def get_summary_stats(conn) -> Dict:
+    """
+    Dashboard header metrics, computed with aggregates over indexed columns.
+    The average covers non-zero overall scores only.
+    """
+    analyses, businesses, direct_urls, avg_score, scored, with_email = conn.execute(
+        '''
+        SELECT
+            (SELECT COUNT(*) FROM analysis_results),
+            (SELECT COUNT(DISTINCT business_id) FROM analysis_results),
+            (SELECT COUNT(DISTINCT url) FROM analysis_results WHERE business_id IS NULL),
+            (SELECT AVG(overall_score) FROM analysis_scores WHERE overall_score > 0),
+            (SELECT COUNT(*) FROM analysis_scores WHERE overall_score > 0),
+            (SELECT COUNT(*) FROM analysis_scores WHERE has_email)
+        '''
+    ).fetchone()
+    return {
+        'analyses': analyses,
+        'businesses': businesses,
+        'direct_urls': direct_urls,
+        'avg_score': round(avg_score, 1) if avg_score is not None else 0,
+        'scored': scored,
+        'with_email': with_email,
+    }
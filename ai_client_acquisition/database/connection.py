@@ -1,4 +1,5 @@
-from sqlalchemy import create_engine
+from contextlib import contextmanager
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.ext.declarative import declarative_base
 import os
@@ -9,9 +10,47 @@ load_dotenv()
 
 # Get database URL from environment variable
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./client_acquisition.db")
+IS_SQLITE = DATABASE_URL.startswith("sqlite")
 
-# Create engine
-engine = create_engine(DATABASE_URL)
+# SQLite tuning (seconds / KiB / bytes)
+SQLITE_BUSY_TIMEOUT = float(os.getenv("SQLITE_BUSY_TIMEOUT", "30"))
+SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", "65536"))
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+
+# Connection pool, shared by Streamlit reruns and worker threads of one process
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+
+def _engine_options() -> dict:
+    options = {'pool_pre_ping': True}
+    if IS_SQLITE:
+        # Pooled connections move between threads; SQLite waits on locks instead of failing
+        options['connect_args'] = {'timeout': SQLITE_BUSY_TIMEOUT, 'check_same_thread': False}
+        if ':memory:' in DATABASE_URL or DATABASE_URL.rstrip('/') == 'sqlite:':
+            return options
+    options['pool_size'] = DB_POOL_SIZE
+    options['max_overflow'] = DB_MAX_OVERFLOW
+    return options
+
+# Create engine (shared by the ORM scripts and the dashboards' raw SQL)
+engine = create_engine(DATABASE_URL, **_engine_options())
+
+@event.listens_for(engine, "connect")
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """
+    WAL lets dashboard readers run alongside analysis writers; NORMAL sync is
+    durable in WAL mode while skipping most fsyncs.
+    """
+    if not IS_SQLITE:
+        return
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA busy_timeout={int(SQLITE_BUSY_TIMEOUT * 1000)}")
+    cursor.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_SIZE_KB}")
+    cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.close()
 
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
@@ -27,9 +66,36 @@ def get_db() -> Session:
     finally:
         db.close()
 
+def get_raw_connection():
+    """
+    Get a DB-API connection from the engine's pool, for the raw SQL in
+    analysis_store. Closing it returns it to the pool.
+    """
+    return engine.raw_connection()
+
+@contextmanager
+def db_connection():
+    """
+    Pooled DB-API connection that commits on success, rolls back on error
+    and is always returned to the pool.
+    """
+    conn = get_raw_connection()
+    try:
+        yield conn
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
 def init_db():
     """
-    Initialize the database by creating all tables.
+    Initialize the database by applying all pending schema migrations.
     """
-    from .models import Base
-    Base.metadata.create_all(bind=engine) 
\ No newline at end of file
+    from .migrations import migrate
+    conn = get_raw_connection()
+    try:
+        return migrate(conn)
+    finally:
+        conn.close()
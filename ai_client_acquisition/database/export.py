@@ -0,0 +1,111 @@
+import csv
+import json
+import logging
+import os
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from .analysis_store import _ai_text, iter_analyses
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet export is optional
+    pa = None
+    pq = None
+
+logger = logging.getLogger(__name__)
+
+EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", "500"))
+
+EXPORT_COLUMNS = ["Group", "Business", "URL", "SEO Score", "Critical Issues", "Emails", "Phones", "AI Analysis"]
+EXPORT_FORMATS = ['csv', 'jsonl'] + (['parquet'] if pa is not None else [])
+EXPORT_MIME_TYPES = {
+    'csv': 'text/csv',
+    'jsonl': 'application/x-ndjson',
+    'parquet': 'application/vnd.apache.parquet',
+}
+
+
+def export_record(row: Dict) -> Dict:
+    """
+    Flatten one iter_analyses() row into the export columns.
+    """
+    payload = row['payload']
+    seo = payload.get('seo_analysis') or {}
+    contact_info = payload.get('contact_info') or {}
+    return {
+        "Group": f"Search: {row['search_query']}" if row['business_id'] else "Direct URLs",
+        "Business": f"Business: {row['business_name']} ({row['website']})" if row['business_id'] else "N/A",
+        "URL": row['url'],
+        "SEO Score": row['overall_score'],
+        "Critical Issues": ", ".join(seo.get("critical_issues", [])),
+        "Emails": ", ".join(contact_info.get('emails', [])),
+        "Phones": ", ".join(contact_info.get('phones', [])),
+        "AI Analysis": _ai_text(payload.get('ai_analysis')) or '',
+    }
+
+
+def iter_export_records(conn, filters: Optional[Dict] = None, chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[Dict]:
+    for row in iter_analyses(conn, chunk_size=chunk_size, **(filters or {})):
+        yield export_record(row)
+
+
+def write_csv(records: Iterable[Dict], stream) -> int:
+    writer = csv.DictWriter(stream, fieldnames=EXPORT_COLUMNS)
+    writer.writeheader()
+    count = 0
+    for record in records:
+        writer.writerow(record)
+        count += 1
+    return count
+
+
+def write_jsonl(records: Iterable[Dict], stream) -> int:
+    count = 0
+    for record in records:
+        stream.write(json.dumps(record, ensure_ascii=False) + '\n')
+        count += 1
+    return count
+
+
+def write_parquet(records: Iterable[Dict], stream, chunk_size: int = EXPORT_CHUNK_SIZE) -> int:
+    """
+    Write one row group per chunk so memory stays bounded.
+    """
+    if pa is None:
+        raise RuntimeError("Parquet export requires pyarrow (pip install pyarrow)")
+    schema = pa.schema([
+        (column, pa.int64() if column == "SEO Score" else pa.string()) for column in EXPORT_COLUMNS
+    ])
+    count = 0
+    with pq.ParquetWriter(stream, schema) as writer:
+        chunk: List[Dict] = []
+        for record in records:
+            chunk.append(record)
+            if len(chunk) >= chunk_size:
+                writer.write_table(pa.Table.from_pylist(chunk, schema=schema))
+                count += len(chunk)
+                chunk = []
+        if chunk or not count:
+            writer.write_table(pa.Table.from_pylist(chunk, schema=schema))
+            count += len(chunk)
+    return count
+
+
+def export_analyses(conn, fmt: str, path: str, filters: Optional[Dict] = None,
+                    chunk_size: int = EXPORT_CHUNK_SIZE) -> int:
+    """
+    Stream the analyses matching the filters to a file as csv, jsonl or
+    parquet. Returns the number of rows written.
+    """
+    if fmt not in ('csv', 'jsonl', 'parquet'):
+        raise ValueError(f"Unknown export format: {fmt}")
+    records = iter_export_records(conn, filters, chunk_size)
+    if fmt == 'parquet':
+        with open(path, 'wb') as f:
+            count = write_parquet(records, f, chunk_size)
+    else:
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            count = write_csv(records, f) if fmt == 'csv' else write_jsonl(records, f)
+    logger.info(f"Exported {count} analyses to {path} ({fmt})")
+    return count
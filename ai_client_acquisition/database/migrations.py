@@ -0,0 +1,291 @@
+import logging
+from datetime import datetime
+from typing import Callable, List, Tuple
+
+from .analysis_store import NORMALIZED_SCHEMA, NORMALIZED_TABLES, backfill_normalized, sync_company
+from .payload_codec import DICTIONARY_SCHEMA, decode_payload
+from ..discovery.canonical import url_key
+from ..discovery.crawl_state import CRAWL_STATE_SCHEMA
+from ..jobs.queue import TASKS_SCHEMA
+from ..jobs.store import JOBS_SCHEMA
+
+logger = logging.getLogger(__name__)
+
+
+def _create_base_tables(conn) -> None:
+    """
+    Tables historically created by the dashboards' init_db().
+    """
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS businesses (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            search_query TEXT,
+            place_id TEXT UNIQUE,
+            name TEXT,
+            address TEXT,
+            website TEXT
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS analysis_results (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            business_id INTEGER,
+            url TEXT,
+            analysis_data TEXT,
+            synced_to_hubspot BOOLEAN DEFAULT FALSE,
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (business_id) REFERENCES businesses(id)
+        )
+    ''')
+
+
+def _create_normalized_tables(conn) -> None:
+    for statement in NORMALIZED_SCHEMA:
+        conn.execute(statement)
+    backfilled = backfill_normalized(conn)
+    if backfilled:
+        logger.info(f"Backfilled normalized rows for {backfilled} analyses")
+
+
+def _deduplicate_analysis_results(conn) -> None:
+    """
+    Keep only the latest analysis per (url, business_id), then enforce it
+    with a unique index so inserts can be real upserts.
+    """
+    conn.execute('''
+        CREATE TEMP TABLE duplicate_analyses AS
+        SELECT id FROM analysis_results
+        WHERE id NOT IN (
+            SELECT MAX(id) FROM analysis_results
+            GROUP BY url, IFNULL(business_id, 0)
+        )
+    ''')
+    removed = conn.execute('SELECT COUNT(*) FROM duplicate_analyses').fetchone()[0]
+    for table in NORMALIZED_TABLES:
+        conn.execute(f'DELETE FROM {table} WHERE analysis_id IN (SELECT id FROM duplicate_analyses)')
+    conn.execute('DELETE FROM analysis_results WHERE id IN (SELECT id FROM duplicate_analyses)')
+    conn.execute('DROP TABLE duplicate_analyses')
+    if removed:
+        logger.info(f"Removed {removed} duplicate analysis rows")
+
+    # NULL business_ids would never conflict, so index the IFNULL() expression instead
+    conn.execute('''
+        CREATE UNIQUE INDEX IF NOT EXISTS ux_analysis_results_url_business
+        ON analysis_results(url, IFNULL(business_id, 0))
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS ix_analysis_results_business ON analysis_results(business_id)')
+    conn.execute('CREATE INDEX IF NOT EXISTS ix_businesses_search_query ON businesses(search_query)')
+
+
+def _columns(conn, table: str) -> List[str]:
+    return [row[1] for row in conn.execute(f'PRAGMA table_info({table})')]
+
+
+def _create_company_tables(conn) -> None:
+    """
+    Tables behind the SQLAlchemy models (previously only created by
+    scripts/init_db.py), linked to the dashboard's businesses/analyses.
+    Enum columns hold the enum member names, as SQLAlchemy writes them.
+    """
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS companies (
+            id INTEGER NOT NULL PRIMARY KEY,
+            website_url VARCHAR NOT NULL UNIQUE,
+            platform_type VARCHAR(11) NOT NULL,
+            company_name VARCHAR,
+            industry VARCHAR,
+            discovery_date DATETIME,
+            last_updated DATETIME,
+            business_id INTEGER REFERENCES businesses(id)
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS contact_info (
+            id INTEGER NOT NULL PRIMARY KEY,
+            company_id INTEGER NOT NULL REFERENCES companies(id),
+            email VARCHAR,
+            phone VARCHAR,
+            social_media JSON,
+            contact_page_url VARCHAR,
+            last_verified DATETIME
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS seo_analysis (
+            id INTEGER NOT NULL PRIMARY KEY,
+            company_id INTEGER NOT NULL REFERENCES companies(id),
+            title_tag VARCHAR,
+            meta_description VARCHAR,
+            header_structure JSON,
+            keywords JSON,
+            internal_links INTEGER,
+            external_links INTEGER,
+            images_without_alt INTEGER,
+            analysis_date DATETIME,
+            analysis_id INTEGER REFERENCES analysis_results(id)
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS outreach_history (
+            id INTEGER NOT NULL PRIMARY KEY,
+            company_id INTEGER NOT NULL REFERENCES companies(id),
+            status VARCHAR(13) NOT NULL,
+            email_content VARCHAR,
+            sent_date DATETIME,
+            reply_date DATETIME,
+            reply_content VARCHAR,
+            notes VARCHAR
+        )
+    ''')
+
+    # Databases created by scripts/init_db.py predate the link columns
+    if 'business_id' not in _columns(conn, 'companies'):
+        conn.execute('ALTER TABLE companies ADD COLUMN business_id INTEGER REFERENCES businesses(id)')
+    if 'analysis_id' not in _columns(conn, 'seo_analysis'):
+        conn.execute('ALTER TABLE seo_analysis ADD COLUMN analysis_id INTEGER REFERENCES analysis_results(id)')
+
+    conn.execute('CREATE INDEX IF NOT EXISTS ix_contact_info_company ON contact_info(company_id)')
+    conn.execute('CREATE INDEX IF NOT EXISTS ix_seo_analysis_company ON seo_analysis(company_id)')
+    conn.execute('CREATE INDEX IF NOT EXISTS ix_outreach_history_company ON outreach_history(company_id)')
+
+    # Make everything the dashboards analyzed so far visible to the scripts
+    rows = conn.execute(
+        'SELECT id, url, business_id, analysis_data FROM analysis_results WHERE analysis_data IS NOT NULL'
+    ).fetchall()
+    for analysis_id, url, business_id, analysis_data in rows:
+        try:
+            sync_company(conn, analysis_id, url, decode_payload(conn, analysis_data), business_id)
+        except (ValueError, TypeError) as e:
+            logger.error(f"Skipping analysis {analysis_id} during company sync: {e}")
+
+
+def _create_payload_dictionaries(conn) -> None:
+    """
+    Shared compression dictionaries for analysis_data (see payload_codec).
+    """
+    conn.execute(DICTIONARY_SCHEMA)
+
+
+def _create_listing_indexes(conn) -> None:
+    """
+    Indexes for the dashboard's filtered, paginated listing (query_analyses).
+    The score filter uses ix_analysis_scores_score from NORMALIZED_SCHEMA.
+    """
+    conn.execute('CREATE INDEX IF NOT EXISTS ix_analysis_results_timestamp ON analysis_results(timestamp)')
+
+
+def _create_change_counters(conn) -> None:
+    """
+    A counter bumped by triggers on every write to the analysis tables, so
+    cached summaries can tell when they are stale.
+    """
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS change_counters (
+            name TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+    conn.execute("INSERT OR IGNORE INTO change_counters (name, version) VALUES ('analyses', 0)")
+    for table in ('analysis_results', 'analysis_scores'):
+        for event in ('INSERT', 'UPDATE', 'DELETE'):
+            conn.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS trg_{table}_{event.lower()}_counter
+                AFTER {event} ON {table}
+                BEGIN
+                    UPDATE change_counters SET version = version + 1 WHERE name = 'analyses';
+                END
+            ''')
+
+
+def _create_job_tables(conn) -> None:
+    """
+    Background jobs queued by the dashboards (see jobs/store.py).
+    """
+    for statement in JOBS_SCHEMA:
+        conn.execute(statement)
+
+
+def _create_task_queue(conn) -> None:
+    """
+    Distributed task queue and its dead-letter table (see jobs/queue.py).
+    """
+    for statement in TASKS_SCHEMA:
+        conn.execute(statement)
+
+
+def _create_crawl_state(conn) -> None:
+    """
+    Per-page validators for incremental recrawls (see discovery/crawl_state.py).
+    """
+    for statement in CRAWL_STATE_SCHEMA:
+        conn.execute(statement)
+
+
+
+def _add_analysis_url_keys(conn) -> None:
+    """
+    Canonical URL key of each analysis (see discovery/canonical.py), so prior
+    analyses are found whatever form the URL comes in.
+    """
+    if 'url_key' not in _columns(conn, 'analysis_results'):
+        conn.execute('ALTER TABLE analysis_results ADD COLUMN url_key TEXT')
+    rows = conn.execute('SELECT id, url FROM analysis_results WHERE url IS NOT NULL').fetchall()
+    conn.executemany('UPDATE analysis_results SET url_key = ? WHERE id = ?',
+                     [(url_key(url), analysis_id) for analysis_id, url in rows])
+    conn.execute('CREATE INDEX IF NOT EXISTS ix_analysis_results_url_key ON analysis_results(url_key)')
+
+
+# (version, description, migration). Append only; never edit an applied migration.
+MIGRATIONS: List[Tuple[int, str, Callable]] = [
+    (1, 'businesses and analysis_results tables', _create_base_tables),
+    (2, 'normalized analysis tables', _create_normalized_tables),
+    (3, 'deduplicate analysis_results and add lookup indexes', _deduplicate_analysis_results),
+    (4, 'SQLAlchemy model tables linked to businesses and analyses', _create_company_tables),
+    (5, 'payload compression dictionaries', _create_payload_dictionaries),
+    (6, 'indexes for paginated analysis listing', _create_listing_indexes),
+    (7, 'change counter for cached summaries', _create_change_counters),
+    (8, 'background job tables', _create_job_tables),
+    (9, 'task queue and dead-letter tables', _create_task_queue),
+    (10, 'crawl state for incremental recrawls', _create_crawl_state),
+    (11, 'canonical URL keys for analyses', _add_analysis_url_keys),
+]
+
+
+def current_version(conn) -> int:
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INTEGER PRIMARY KEY,
+            description TEXT,
+            applied_at DATETIME
+        )
+    ''')
+    row = conn.execute('SELECT MAX(version) FROM schema_migrations').fetchone()
+    return row[0] or 0
+
+
+def migrate(conn) -> List[int]:
+    """
+    Apply pending migrations, each in its own transaction.
+    Returns the versions that were applied.
+    """
+    applied = []
+    version = current_version(conn)
+    conn.commit()
+    for target, description, migration in MIGRATIONS:
+        if target <= version:
+            continue
+        try:
+            conn.execute('BEGIN')
+            migration(conn)
+            conn.execute(
+                'INSERT INTO schema_migrations (version, description, applied_at) VALUES (?, ?, ?)',
+                (target, description, datetime.utcnow().isoformat())
+            )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            logger.error(f"Migration {target} ({description}) failed")
+            raise
+        logger.info(f"Applied migration {target}: {description}")
+        applied.append(target)
+    return applied
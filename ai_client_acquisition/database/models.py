@@ -1,6 +1,6 @@
 from datetime import datetime
 from typing import List, Optional
-from sqlalchemy import Column, Integer, String, DateTime, JSON, ForeignKey, Enum
+from sqlalchemy import Column, Integer, String, DateTime, JSON, ForeignKey, Enum, Boolean, Text
 from sqlalchemy.orm import relationship, declarative_base
 import enum
 
@@ -9,6 +9,17 @@ Base = declarative_base()
 class PlatformType(enum.Enum):
     WORDPRESS = "wordpress"
     SHOPIFY = "shopify"
+    # Further platforms identified by analysis/platform_detector.py
+    WIX = "wix"
+    SQUARESPACE = "squarespace"
+    WEBFLOW = "webflow"
+    DRUPAL = "drupal"
+    JOOMLA = "joomla"
+    MAGENTO = "magento"
+    BIGCOMMERCE = "bigcommerce"
+    PRESTASHOP = "prestashop"
+    WEEBLY = "weebly"
+    GHOST = "ghost"
     CUSTOM = "custom"
     UNKNOWN = "unknown"
 
@@ -19,6 +30,74 @@ class OutreachStatus(enum.Enum):
     LANDED = "landed"
     REJECTED = "rejected"
 
+# Tables are created and altered by migrations.py; the models map onto them.
+
+class Business(Base):
+    """Google Places result stored by the dashboard's business finder."""
+    __tablename__ = "businesses"
+
+    id = Column(Integer, primary_key=True)
+    search_query = Column(Text)
+    place_id = Column(Text, unique=True)
+    name = Column(Text)
+    address = Column(Text)
+    website = Column(Text)
+
+    # Relationships
+    analyses = relationship("AnalysisResult", back_populates="business")
+    company = relationship("Company", back_populates="business", uselist=False)
+
+class AnalysisResult(Base):
+    """
+    One analysis per (url, business); analysis_data holds the raw payload, as
+    JSON text or a compressed blob (read it with payload_codec.decode_payload).
+    """
+    __tablename__ = "analysis_results"
+
+    id = Column(Integer, primary_key=True)
+    business_id = Column(Integer, ForeignKey("businesses.id"))
+    url = Column(Text)
+    # Canonical key of url (discovery/canonical.py), used to find existing analyses
+    url_key = Column(Text, index=True)
+    analysis_data = Column(Text)
+    synced_to_hubspot = Column(Boolean, default=False)
+    timestamp = Column(DateTime)
+
+    # Relationships
+    business = relationship("Business", back_populates="analyses")
+    score = relationship("AnalysisScore", back_populates="analysis", uselist=False)
+    contacts = relationship("AnalysisContact", back_populates="analysis")
+
+class AnalysisScore(Base):
+    __tablename__ = "analysis_scores"
+
+    analysis_id = Column(Integer, ForeignKey("analysis_results.id"), primary_key=True)
+    page_id = Column(Integer)
+    overall_score = Column(Integer)
+    word_count = Column(Integer)
+    images_without_alt = Column(Integer)
+    broken_links_count = Column(Integer)
+    is_secure = Column(Boolean)
+    has_meta_description = Column(Boolean)
+    has_h1 = Column(Boolean)
+    has_email = Column(Boolean)
+    has_error = Column(Boolean)
+
+    # Relationships
+    analysis = relationship("AnalysisResult", back_populates="score")
+
+class AnalysisContact(Base):
+    __tablename__ = "analysis_contacts"
+
+    id = Column(Integer, primary_key=True)
+    analysis_id = Column(Integer, ForeignKey("analysis_results.id"), nullable=False)
+    kind = Column(Text, nullable=False)  # email, phone, social, contact_page
+    label = Column(Text)
+    value = Column(Text, nullable=False)
+
+    # Relationships
+    analysis = relationship("AnalysisResult", back_populates="contacts")
+
 class Company(Base):
     __tablename__ = "companies"
 
@@ -29,8 +108,10 @@ class Company(Base):
     industry = Column(String)
     discovery_date = Column(DateTime, default=datetime.utcnow)
     last_updated = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    business_id = Column(Integer, ForeignKey("businesses.id"))
 
     # Relationships
+    business = relationship("Business", back_populates="company")
     contact_info = relationship("ContactInfo", back_populates="company", uselist=False)
     seo_analysis = relationship("SEOAnalysis", back_populates="company", uselist=False)
     outreach_history = relationship("OutreachHistory", back_populates="company")
@@ -62,9 +143,11 @@ class SEOAnalysis(Base):
     external_links = Column(Integer)
     images_without_alt = Column(Integer)
     analysis_date = Column(DateTime, default=datetime.utcnow)
+    analysis_id = Column(Integer, ForeignKey("analysis_results.id"))
 
     # Relationships
     company = relationship("Company", back_populates="seo_analysis")
+    analysis = relationship("AnalysisResult")
 
 class OutreachHistory(Base):
     __tablename__ = "outreach_history"
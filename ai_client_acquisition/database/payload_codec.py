@@ -0,0 +1,202 @@
+import json
+import logging
+import os
+import re
+import struct
+import threading
+import zlib
+from collections import Counter
+from typing import Dict, Iterable, Optional, Tuple, Union
+
+try:
+    import zstandard
+except ImportError:  # optional; zlib is always available
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+# How new payloads are written to analysis_results.analysis_data:
+# "json" (plain text, the default), "zlib" or "zstd". Reads handle all three.
+ANALYSIS_PAYLOAD_CODEC = os.getenv("ANALYSIS_PAYLOAD_CODEC", "json").lower()
+PAYLOAD_ZLIB_LEVEL = int(os.getenv("PAYLOAD_ZLIB_LEVEL", "9"))
+PAYLOAD_ZSTD_LEVEL = int(os.getenv("PAYLOAD_ZSTD_LEVEL", "19"))
+
+# zlib can only look back 32 KiB, so a larger preset dictionary is wasted
+ZLIB_DICTIONARY_SIZE = 32 * 1024
+ZSTD_DICTIONARY_SIZE = 64 * 1024
+
+# Compressed payloads are BLOBs: magic, codec id, dictionary id (0 = none), data
+MAGIC = b'ACP1'
+HEADER = struct.Struct('>4sBI')
+CODEC_IDS = {'zlib': 1, 'zstd': 2}
+CODEC_NAMES = {value: name for name, value in CODEC_IDS.items()}
+
+DICTIONARY_SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS payload_dictionaries (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        codec TEXT NOT NULL,
+        data BLOB NOT NULL,
+        sample_count INTEGER,
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+    )
+'''
+
+# JSON strings (keys with their colon), e.g. '"overall_score": '
+_FRAGMENT_RE = re.compile(rb'"(?:[^"\\]|\\.){2,400}"\s*:?\s*')
+
+# Dictionaries never change once stored, so they are cached by id
+_dictionaries: Dict[int, bytes] = {}
+# Newest dictionary per codec, replaced by store_dictionary(); a dictionary
+# stored by another process is picked up on restart
+_active_dictionaries: Dict[str, Tuple[int, bytes]] = {}
+# Compressors primed with a dictionary, per thread (zstd compressors are not thread-safe)
+_compressors = threading.local()
+
+
+def resolve_codec(codec: Optional[str] = None) -> str:
+    codec = (codec or ANALYSIS_PAYLOAD_CODEC).lower()
+    if codec == 'zstd' and zstandard is None:
+        logger.warning("zstandard is not installed; compressing payloads with zlib")
+        return 'zlib'
+    if codec not in ('json', 'zlib', 'zstd'):
+        raise ValueError(f"Unknown payload codec: {codec}")
+    return codec
+
+
+def is_compressed(value) -> bool:
+    return isinstance(value, (bytes, memoryview)) and bytes(value[:len(MAGIC)]) == MAGIC
+
+
+def _zlib_dictionary(samples: Iterable[bytes], size: int) -> bytes:
+    """
+    zlib has no trainer: keep the JSON fragments that recur across payloads,
+    with the most valuable ones last (closest to the data, cheapest to reference).
+    """
+    counts = Counter()
+    for sample in samples:
+        counts.update(set(_FRAGMENT_RE.findall(sample)))
+
+    chosen, total = [], 0
+    for fragment, count in sorted(counts.items(), key=lambda item: item[1] * len(item[0]), reverse=True):
+        if count < 2:
+            continue
+        if total + len(fragment) > size:
+            continue
+        chosen.append(fragment)
+        total += len(fragment)
+    return b''.join(reversed(chosen))
+
+
+def train_dictionary(samples: Iterable[bytes], codec: str, size: Optional[int] = None) -> bytes:
+    """
+    Build a shared dictionary for the codec from sample JSON payloads.
+    """
+    samples = list(samples)
+    if codec == 'zstd':
+        return zstandard.train_dictionary(size or ZSTD_DICTIONARY_SIZE, samples).as_bytes()
+    return _zlib_dictionary(samples, min(size or ZLIB_DICTIONARY_SIZE, ZLIB_DICTIONARY_SIZE))
+
+
+def store_dictionary(conn, codec: str, data: bytes, sample_count: int) -> int:
+    """
+    Save a dictionary; the newest one per codec is used for new payloads.
+    """
+    dictionary_id = conn.execute(
+        'INSERT INTO payload_dictionaries (codec, data, sample_count) VALUES (?, ?, ?) RETURNING id',
+        (codec, data, sample_count)
+    ).fetchone()[0]
+    _dictionaries[dictionary_id] = data
+    _active_dictionaries[codec] = (dictionary_id, data)
+    return dictionary_id
+
+
+def _active_dictionary(conn, codec: str) -> Tuple[int, bytes]:
+    if codec not in _active_dictionaries:
+        row = conn.execute(
+            'SELECT id, data FROM payload_dictionaries WHERE codec = ? ORDER BY id DESC LIMIT 1', (codec,)
+        ).fetchone()
+        if row is None:
+            _active_dictionaries[codec] = (0, b'')
+        else:
+            _dictionaries[row[0]] = bytes(row[1])
+            _active_dictionaries[codec] = (row[0], _dictionaries[row[0]])
+    return _active_dictionaries[codec]
+
+
+def _compressor(codec: str, dictionary_id: int, zdict: bytes):
+    """
+    This thread's compressor for a dictionary: a zstd compressor, or a zlib
+    compressobj primed with the dictionary, to be copy()'d for each payload.
+    """
+    cache = getattr(_compressors, 'cache', None)
+    if cache is None:
+        cache = _compressors.cache = {}
+    key = (codec, dictionary_id)
+    if key not in cache:
+        if codec == 'zstd':
+            dict_data = zstandard.ZstdCompressionDict(zdict) if zdict else None
+            cache[key] = zstandard.ZstdCompressor(level=PAYLOAD_ZSTD_LEVEL, dict_data=dict_data)
+        elif zdict:
+            cache[key] = zlib.compressobj(PAYLOAD_ZLIB_LEVEL, zdict=zdict)
+        else:
+            cache[key] = zlib.compressobj(PAYLOAD_ZLIB_LEVEL)
+    return cache[key]
+
+
+def _dictionary(conn, dictionary_id: int) -> bytes:
+    if dictionary_id == 0:
+        return b''
+    if dictionary_id not in _dictionaries:
+        row = conn.execute('SELECT data FROM payload_dictionaries WHERE id = ?', (dictionary_id,)).fetchone()
+        if row is None:
+            raise ValueError(f"Payload dictionary {dictionary_id} is missing")
+        _dictionaries[dictionary_id] = bytes(row[0])
+    return _dictionaries[dictionary_id]
+
+
+def encode_payload(conn, payload: Dict, codec: Optional[str] = None) -> Union[str, bytes]:
+    """
+    Serialize a payload for analysis_data: JSON text, or a compressed BLOB
+    using the newest dictionary for the codec.
+    """
+    codec = resolve_codec(codec)
+    text = json.dumps(payload, ensure_ascii=False)
+    if codec == 'json':
+        return text
+
+    dictionary_id, zdict = _active_dictionary(conn, codec)
+    raw = text.encode('utf-8')
+    compressor = _compressor(codec, dictionary_id, zdict)
+    if codec == 'zstd':
+        data = compressor.compress(raw)
+    else:
+        compressor = compressor.copy()
+        data = compressor.compress(raw) + compressor.flush()
+    return HEADER.pack(MAGIC, CODEC_IDS[codec], dictionary_id) + data
+
+
+def decode_payload(conn, value) -> Optional[Dict]:
+    """
+    Inverse of encode_payload; plain JSON text is returned as parsed.
+    """
+    if value is None:
+        return None
+    if not is_compressed(value):
+        return json.loads(value)
+
+    value = bytes(value)
+    _, codec_id, dictionary_id = HEADER.unpack_from(value)
+    codec = CODEC_NAMES.get(codec_id)
+    zdict = _dictionary(conn, dictionary_id)
+    data = value[HEADER.size:]
+    if codec == 'zstd':
+        if zstandard is None:
+            raise ValueError("Payload is zstd-compressed but zstandard is not installed")
+        dict_data = zstandard.ZstdCompressionDict(zdict) if zdict else None
+        raw = zstandard.ZstdDecompressor(dict_data=dict_data).decompress(data)
+    elif codec == 'zlib':
+        decompressor = zlib.decompressobj(zdict=zdict) if zdict else zlib.decompressobj()
+        raw = decompressor.decompress(data) + decompressor.flush()
+    else:
+        raise ValueError(f"Unknown payload codec id: {codec_id}")
+    return json.loads(raw.decode('utf-8'))
@@ -0,0 +1,59 @@
+import logging
+import os
+import re
+from typing import Optional
+from urllib.parse import urlsplit
+
+logger = logging.getLogger(__name__)
+
+MAX_PAGES_PER_SITE = int(os.getenv("MAX_PAGES_PER_SITE", "100"))
+# Read the sitemaps (for their URLs and <priority>) before crawling a site
+CRAWL_SITEMAPS = os.getenv("CRAWL_SITEMAPS", "true").lower() in ("1", "true", "yes")
+
+# Above any page score: robots.txt and sitemaps first, then the seed pages
+SITEMAP_REQUEST_PRIORITY = 1000
+START_URL_PRIORITY = 500
+
+# Pages that tell us who the prospect is and how to reach them (English and French)
+PRIORITY_KEYWORDS = (
+    'contact', 'about', 'a-propos', 'apropos', 'qui-sommes-nous', 'services', 'service', 'products', 'produits',
+    'pricing', 'prix', 'tarifs', 'team', 'equipe', 'locations', 'nous-joindre', 'joindre', 'appointment',
+    'rendez-vous', 'booking', 'quote', 'soumission',
+)
+_KEYWORDS = re.compile('|'.join(re.escape(keyword) for keyword in PRIORITY_KEYWORDS), re.IGNORECASE)
+# Pages that repeat others: pagination, archives, listings, sorting and filters, accounts
+_LOW_VALUE = re.compile(
+    r'[?&](?:page|p|paged|sort|order|orderby|filter|replytocom|share)=|/page/\d+|/(?:19|20)\d\d/\d\d?/|'
+    r'/(?:tag|tags|category|categories|author|archive|archives|feed|search|login|cart|checkout|account)s?(?:/|$)',
+    re.IGNORECASE
+)
+
+
+def score_url(url: str, depth: int = 0, in_nav: bool = False, in_footer: bool = False,
+              link_text: Optional[str] = None, sitemap_priority: Optional[float] = None) -> int:
+    """
+    Crawl priority of a URL (higher is fetched first): shallow pages, pages
+    linked from the site's navigation, contact/services pages and pages the
+    sitemap ranks high come first; pagination, archives and listings last.
+    """
+    path = urlsplit(url).path
+    score = 100 - 10 * depth - 2 * path.strip('/').count('/')
+    if in_nav:
+        score += 30
+    elif in_footer:
+        score += 10
+    if _KEYWORDS.search(path) or (link_text and _KEYWORDS.search(link_text)):
+        score += 40
+    if sitemap_priority is not None:
+        # Sitemaps default to 0.5
+        score += int(round((sitemap_priority - 0.5) * 40))
+    if _LOW_VALUE.search(url):
+        score -= 60
+    return score
+
+
+def parse_sitemap_priority(value) -> Optional[float]:
+    try:
+        return min(1.0, max(0.0, float(value)))
+    except (TypeError, ValueError):
+        return None
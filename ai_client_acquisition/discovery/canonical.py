@@ -0,0 +1,78 @@
+import logging
+from functools import lru_cache
+from typing import Iterable, List
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+logger = logging.getLogger(__name__)
+
+# Query parameters that only track the visit, never change the page
+TRACKING_PARAMS = frozenset({
+    'fbclid', 'gclid', 'dclid', 'gbraid', 'wbraid', 'msclkid', 'yclid', 'twclid', 'igshid',
+    'mc_cid', 'mc_eid', '_ga', '_gl', '_hsenc', '_hsmi', 'mkt_tok', 'ref', 'ref_src', 'srsltid',
+})
+_DEFAULT_PORTS = {'http': '80', 'https': '443'}
+_INDEX_PAGES = ('index.html', 'index.htm', 'index.php', 'default.aspx')
+
+
+def _is_tracking(param: str) -> bool:
+    param = param.lower()
+    return param.startswith('utm_') or param in TRACKING_PARAMS
+
+
+def _split(url: str):
+    url = url.strip()
+    if '://' not in url:
+        # Bare domains from seed files and Places listings
+        url = f"http://{url.lstrip('/')}"
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or '').rstrip('.')
+    if parts.port and str(parts.port) != _DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    query = urlencode(sorted((key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+                             if not _is_tracking(key)))
+    return scheme, host, parts.path or '/', query
+
+
+@lru_cache(maxsize=65536)
+def canonical_url(url: str) -> str:
+    """
+    The URL to fetch and store: lowercase scheme and host, no default port,
+    fragment or tracking parameters, remaining parameters sorted.
+    """
+    scheme, host, path, query = _split(url)
+    return urlunsplit((scheme, host, path, query, ''))
+
+
+@lru_cache(maxsize=65536)
+def url_key(url: str) -> str:
+    """
+    Identity of the page behind a URL, for deduplication: the canonical URL
+    without scheme, `www.`, index page or trailing slash, so
+    `https://www.example.com/` and `http://example.com/index.html?utm_source=x`
+    share the key `example.com`.
+    """
+    _, host, path, query = _split(url)
+    host = host.removeprefix('www.')
+    for index_page in _INDEX_PAGES:
+        if path.lower().endswith('/' + index_page):
+            path = path[:-len(index_page)]
+            break
+    key = host + path.rstrip('/')
+    return f"{key}?{query}" if query else key
+
+
+def unique_urls(urls: Iterable[str]) -> List[str]:
+    """
+    Canonical URLs in input order, keeping the first URL of each key.
+    """
+    seen = set()
+    unique = []
+    for url in urls:
+        if not url or not url.strip():
+            continue
+        key = url_key(url)
+        if key not in seen:
+            seen.add(key)
+            unique.append(canonical_url(url))
+    return unique
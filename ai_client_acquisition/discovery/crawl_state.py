@@ -0,0 +1,101 @@
+import json
+import logging
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Iterable, List, Optional
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+# Per-page validators from the last crawl, for incremental recrawls: the
+# ETag/Last-Modified to send back as If-None-Match/If-Modified-Since, the
+# internal links to follow when the page comes back 304, and when it was
+# last fetched (compared with the sitemap <lastmod>).
+CRAWL_STATE_SCHEMA = [
+    '''
+    CREATE TABLE IF NOT EXISTS crawl_state (
+        url TEXT PRIMARY KEY,
+        domain TEXT NOT NULL,
+        etag TEXT,
+        last_modified TEXT,
+        links TEXT,
+        fetched_at DATETIME NOT NULL
+    )
+    ''',
+    'CREATE INDEX IF NOT EXISTS ix_crawl_state_domain ON crawl_state(domain)',
+]
+
+
+def load_crawl_state(conn, domains: Iterable[str]) -> Dict[str, Dict]:
+    """
+    Stored state of every page on the given hosts, keyed by URL.
+    """
+    domains = sorted(set(domains))
+    if not domains:
+        return {}
+    placeholders = ', '.join('?' * len(domains))
+    return {
+        url: {
+            'etag': etag,
+            'last_modified': last_modified,
+            'links': json.loads(links) if links else [],
+            'fetched_at': fetched_at,
+        }
+        for url, etag, last_modified, links, fetched_at in conn.execute(
+            f'SELECT url, etag, last_modified, links, fetched_at FROM crawl_state WHERE domain IN ({placeholders})',
+            domains
+        )
+    }
+
+
+def save_crawl_state(conn, rows: List[Dict]) -> None:
+    """
+    Upsert page states ({'url', 'etag', 'last_modified', 'links'}), fetched now.
+    """
+    conn.executemany(
+        '''
+        INSERT INTO crawl_state (url, domain, etag, last_modified, links, fetched_at)
+        VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+        ON CONFLICT(url) DO UPDATE SET
+            etag = excluded.etag,
+            last_modified = excluded.last_modified,
+            links = excluded.links,
+            fetched_at = excluded.fetched_at
+        ''',
+        [
+            (row['url'], urlparse(row['url']).netloc.lower(), row.get('etag'), row.get('last_modified'),
+             json.dumps(row.get('links') or []))
+            for row in rows
+        ]
+    )
+
+
+def parse_lastmod(value: Optional[str]) -> Optional[datetime]:
+    """
+    Sitemap <lastmod> (W3C datetime or date) or an HTTP date, as naive UTC.
+    """
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        try:
+            parsed = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def changed_since_fetch(lastmod: Optional[str], state: Optional[Dict]) -> bool:
+    """
+    Whether a sitemap entry needs fetching: new page, unknown lastmod, or
+    modified after our last fetch.
+    """
+    if not state:
+        return True
+    modified = parse_lastmod(lastmod)
+    fetched = parse_lastmod(state.get('fetched_at'))
+    return modified is None or fetched is None or modified > fetched
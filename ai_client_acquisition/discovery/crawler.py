@@ -1,13 +1,27 @@
 import scrapy
+from scrapy import signals
 from scrapy.crawler import CrawlerProcess
 from scrapy.spiders import CrawlSpider, Rule
 from scrapy.linkextractors import LinkExtractor
-from urllib.parse import urlparse
+from scrapy.utils.gz import gunzip
+from scrapy.utils.job import job_dir
+from scrapy.utils.sitemap import Sitemap, sitemap_urls_from_robots
+from urllib.parse import urljoin, urlparse
 import logging
-from typing import List, Set, Optional
+from typing import Dict, List, Optional, Tuple
 import os
 from dotenv import load_dotenv
 
+from ai_client_acquisition.analysis.platform_detector import get_platform_detector
+from ai_client_acquisition.database.connection import db_connection
+from ai_client_acquisition.discovery.budget import (
+    CRAWL_SITEMAPS, MAX_PAGES_PER_SITE, SITEMAP_REQUEST_PRIORITY, START_URL_PRIORITY, parse_sitemap_priority,
+    score_url
+)
+from ai_client_acquisition.discovery.canonical import canonical_url, url_key
+from ai_client_acquisition.discovery.crawl_state import changed_since_fetch, load_crawl_state
+from ai_client_acquisition.discovery.frontier import VisitedUrlStore
+
 # Load environment variables
 load_dotenv()
 
@@ -17,12 +31,24 @@ logger = logging.getLogger(__name__)
 
 class WebsiteCrawler(CrawlSpider):
     name = 'website_crawler'
+    # Answers to conditional requests in incremental crawls (see middlewares.py)
+    handle_httpstatus_list = [304]
     
     def __init__(self, start_urls: List[str], allowed_domains: Optional[List[str]] = None, *args, **kwargs):
         self.start_urls = start_urls
         self.allowed_domains = allowed_domains or [urlparse(url).netloc for url in start_urls]
-        self.visited_urls: Set[str] = set()
-        self.max_pages = int(os.getenv("MAX_PAGES_PER_SITE", "100"))
+        # Replaced by an on-disk store in from_crawler() when the crawl has a JOBDIR
+        self.visited_urls = VisitedUrlStore()
+        # Persisted in JOBDIR by Scrapy's SpiderState extension
+        self.state = {}
+        # Filled in from_crawler() for incremental crawls
+        self.incremental = False
+        self.crawl_state = {}
+        self.unchanged_urls = set()
+        # Spent by CrawlBudgetMiddleware, highest-priority requests first
+        self.max_pages = MAX_PAGES_PER_SITE
+        self.read_sitemaps = CRAWL_SITEMAPS
+        self._sitemap_entries = {}
         self.request_delay = int(os.getenv("REQUEST_DELAY", "2"))
         
         # Define rules for following links
@@ -46,24 +72,116 @@ class WebsiteCrawler(CrawlSpider):
                     )
                 ),
                 callback='parse_page',
-                follow=True
+                follow=True,
+                process_request='_prioritize'
             ),
         )
         
         super().__init__(*args, **kwargs)
 
+    @classmethod
+    def from_crawler(cls, crawler, *args, **kwargs):
+        spider = super().from_crawler(crawler, *args, **kwargs)
+        spider.visited_urls = VisitedUrlStore(job_dir(crawler.settings))
+        crawler.signals.connect(spider.visited_urls.close, signal=signals.spider_closed)
+        spider.max_pages = crawler.settings.getint('MAX_PAGES_PER_SITE', MAX_PAGES_PER_SITE)
+        spider.read_sitemaps = crawler.settings.getbool('CRAWL_SITEMAPS', CRAWL_SITEMAPS)
+        spider.incremental = crawler.settings.getbool('INCREMENTAL_CRAWL')
+        if spider.incremental:
+            hosts = [urlparse(url).netloc.lower() for url in spider.start_urls] + list(spider.allowed_domains)
+            with db_connection() as conn:
+                spider.crawl_state = load_crawl_state(conn, hosts)
+            logger.info(f"Incremental crawl: {len(spider.crawl_state)} pages crawled before")
+        return spider
+
+    async def start(self):
+        # Scrapy >= 2.13 only calls start(); start_requests() serves older versions
+        for request in self.start_requests():
+            yield request
+
+    def start_requests(self):
+        if self.read_sitemaps or self.incremental:
+            # Sitemaps first: they rank the site's pages, and in incremental
+            # crawls tell which are unchanged before they are reached
+            for url in self.start_urls:
+                yield scrapy.Request(urljoin(url, '/robots.txt'), callback=self._parse_robots_sitemaps,
+                                     errback=self._default_sitemap, priority=SITEMAP_REQUEST_PRIORITY,
+                                     dont_filter=True, meta={'crawl_budget': False})
+        for url in self.start_urls:
+            # No callback, so CrawlSpider parses it and follows its links. Filtered,
+            # so a resumed crawl does not fetch the seeds it already has
+            yield scrapy.Request(url, priority=START_URL_PRIORITY)
+
+    def _parse_robots_sitemaps(self, response):
+        sitemap_urls = list(sitemap_urls_from_robots(response.text, base_url=response.url))
+        if not sitemap_urls:
+            yield from self._default_sitemap(response)
+        for url in sitemap_urls:
+            yield scrapy.Request(url, callback=self._parse_sitemap, priority=SITEMAP_REQUEST_PRIORITY,
+                                 meta={'crawl_budget': False})
+
+    def _default_sitemap(self, response_or_failure):
+        url = getattr(response_or_failure, 'url', None) or response_or_failure.request.url
+        yield scrapy.Request(urljoin(url, '/sitemap.xml'), callback=self._parse_sitemap,
+                             priority=SITEMAP_REQUEST_PRIORITY, meta={'crawl_budget': False})
+
+    def _parse_sitemap(self, response):
+        """
+        Queue the sitemap entries (those modified since our last fetch, in
+        incremental crawls; remember the others so they are not downloaded
+        again), ranked with their <priority>. A few times the page budget is
+        queued per site at most.
+        """
+        body = gunzip(response.body) if response.url.endswith('.gz') else response.body
+        try:
+            sitemap = Sitemap(body)
+        except Exception as e:
+            logger.warning(f"Unreadable sitemap {response.url}: {e}")
+            return
+        for entry in sitemap:
+            url = entry.get('loc')
+            if not url:
+                continue
+            if sitemap.type == 'sitemapindex':
+                yield scrapy.Request(url, callback=self._parse_sitemap, priority=SITEMAP_REQUEST_PRIORITY,
+                                     meta={'crawl_budget': False})
+                continue
+            if not changed_since_fetch(entry.get('lastmod'), self.crawl_state.get(url)):
+                self.unchanged_urls.add(url)
+                continue
+            site = urlparse(url).netloc.lower()
+            self._sitemap_entries[site] = self._sitemap_entries.get(site, 0) + 1
+            if self._sitemap_entries[site] > 5 * self.max_pages:
+                continue
+            # No callback: crawled like a start URL, so its links are followed too
+            yield scrapy.Request(url, priority=score_url(
+                url, depth=1, sitemap_priority=parse_sitemap_priority(entry.get('priority'))))
+
+    def parse_start_url(self, response, **kwargs):
+        """
+        Seed pages are analyzed too, not only the pages linked from them.
+        """
+        return self.parse_page(response)
+
     def parse_page(self, response):
         """
         Parse each page and extract relevant information.
         """
-        if len(self.visited_urls) >= self.max_pages:
+        url = response.url
+        # Keyed canonically, so www./slash/tracking variants of a page are analyzed once
+        if url_key(url) in self.visited_urls:
             return
+        self.visited_urls.add(url_key(url))
         
-        url = response.url
-        if url in self.visited_urls:
+        if response.status == 304:
+            # Unchanged since the last crawl: keep its analysis, follow the links it had then
+            depth = response.meta.get('depth', 0) + 1
+            for link in self.crawl_state.get(url, {}).get('links', []):
+                yield scrapy.Request(link, priority=score_url(link, depth=depth))
             return
         
-        self.visited_urls.add(url)
+        internal_links, external_links = self._classify_links(response)
+        link_extractor = self.rules[0].link_extractor
         
         # Extract page information
         yield {
@@ -72,78 +190,106 @@ class WebsiteCrawler(CrawlSpider):
             'meta_description': response.css('meta[name="description"]::attr(content)').get(),
             'h1_tags': response.css('h1::text').getall(),
             'h2_tags': response.css('h2::text').getall(),
-            'internal_links': self._get_internal_links(response),
-            'external_links': self._get_external_links(response),
+            # Only the counts are persisted
+            'internal_links': len(internal_links),
+            'external_links': len(external_links),
             'images_without_alt': len(response.css('img:not([alt])').getall()),
             'platform_indicators': self._detect_platform(response),
+            'depth': response.meta.get('depth', 0),
+            # Stored for the next incremental crawl (see crawl_state.py)
+            'etag': response.headers.get('ETag', b'').decode('latin-1') or None,
+            'last_modified': response.headers.get('Last-Modified', b'').decode('latin-1') or None,
+            'links': [link for link in internal_links if link_extractor.matches(link)],
+            # Analyzed by SiteAnalysisPipeline, which drops it from the item
+            'html': response.text,
         }
 
-    def _get_internal_links(self, response) -> List[str]:
+    def _prioritize(self, request, response):
         """
-        Extract internal links from the page.
+        Rank a followed link for the crawl budget (see budget.py). The page's
+        navigation and footer links are collected once per page.
         """
-        domain = urlparse(response.url).netloc
-        return [
-            link for link in response.css('a::attr(href)').getall()
-            if domain in link or link.startswith('/')
-        ]
+        regions = response.meta.get('link_regions')
+        if regions is None:
+            regions = response.meta['link_regions'] = tuple(
+                {canonical_url(response.urljoin(href)) for href in response.css(selector).getall()}
+                for selector in ('nav a::attr(href), header a::attr(href)', 'footer a::attr(href)')
+            )
+        url = canonical_url(request.url)
+        return request.replace(priority=score_url(
+            request.url,
+            depth=response.meta.get('depth', 0) + 1,
+            in_nav=url in regions[0],
+            in_footer=url in regions[1],
+            link_text=request.meta.get('link_text'),
+        ))
 
-    def _get_external_links(self, response) -> List[str]:
+    def _classify_links(self, response) -> Tuple[List[str], List[str]]:
         """
-        Extract external links from the page.
+        Extract the page's links in one pass: absolute, canonicalized and
+        without fragments, deduplicated, and split into internal (same host,
+        with or without www.) and external. Non-HTTP links are dropped.
         """
-        domain = urlparse(response.url).netloc
-        return [
-            link for link in response.css('a::attr(href)').getall()
-            if not (domain in link or link.startswith('/'))
-        ]
+        host = urlparse(response.url).netloc.lower().removeprefix('www.')
+        internal, external = {}, {}
+        for href in response.css('a::attr(href)').getall():
+            url = response.urljoin(href.strip())
+            parsed = urlparse(url)
+            if parsed.scheme not in ('http', 'https'):
+                continue
+            # Dicts keep the page order
+            links = internal if parsed.netloc.lower().removeprefix('www.') == host else external
+            links[canonical_url(url)] = None
+        return list(internal), list(external)
 
     def _detect_platform(self, response) -> dict:
         """
-        Detect the website platform based on various indicators.
+        Detect the website platform from its headers, cookies and markup
+        fingerprints (see analysis/platform_detector.py).
         """
-        indicators = {
-            'wordpress': False,
-            'shopify': False,
-            'custom': False
-        }
-        
-        # Check for WordPress indicators
-        if any([
-            '/wp-content/' in response.text,
-            '/wp-includes/' in response.text,
-            'wp-' in response.text,
-            response.css('meta[name="generator"]::attr(content)').get() and 'WordPress' in response.css('meta[name="generator"]::attr(content)').get()
-        ]):
-            indicators['wordpress'] = True
-        
-        # Check for Shopify indicators
-        if any([
-            'myshopify.com' in response.text,
-            'shopify.com' in response.text,
-            response.css('script[src*="shopify"]').get(),
-            response.css('link[href*="shopify"]').get()
-        ]):
-            indicators['shopify'] = True
-        
-        # If no specific platform is detected, mark as custom
-        if not any(indicators.values()):
-            indicators['custom'] = True
-        
-        return indicators
+        return get_platform_detector().platform_indicators(response.text, response.headers)
 
-def run_crawler(start_urls: List[str], allowed_domains: Optional[List[str]] = None) -> None:
+def run_crawler(start_urls: List[str], allowed_domains: Optional[List[str]] = None,
+                output: Optional[str] = None, resume: bool = False, jobdir: Optional[str] = None,
+                incremental: bool = False, settings: Optional[Dict] = None) -> Dict:
     """
-    Run the crawler with the given start URLs and allowed domains.
+    Run the crawler with the given start URLs and allowed domains. Crawled
+    pages are analyzed and saved as they arrive (see pipelines.py); with
+    `output`, each page is also appended to that JSONL file. With `jobdir`,
+    the pending requests, seen requests and visited pages are kept on disk:
+    stop the crawl with one Ctrl+C and run it again with the same jobdir to
+    resume. With `incremental`, only pages changed since the last crawl
+    (by sitemap <lastmod>, ETag or Last-Modified) are downloaded and analyzed.
+    `settings` override the Scrapy settings below. Returns the crawl stats.
     """
     process = CrawlerProcess({
         'USER_AGENT': 'Mozilla/5.0 (compatible; ClientAcquisitionBot/1.0; +http://yourdomain.com)',
         'ROBOTSTXT_OBEY': True,
         'DOWNLOAD_DELAY': int(os.getenv("REQUEST_DELAY", "2")),
         'CONCURRENT_REQUESTS': int(os.getenv("MAX_CONCURRENT_REQUESTS", "5")),
+        # Same per-site politeness as discovery/scheduler.py
+        'CONCURRENT_REQUESTS_PER_DOMAIN': int(os.getenv("HOST_CONCURRENCY", "1")),
         'COOKIES_ENABLED': False,
-        'LOG_LEVEL': 'INFO'
+        'LOG_LEVEL': 'INFO',
+        'ITEM_PIPELINES': {'ai_client_acquisition.discovery.pipelines.SiteAnalysisPipeline': 300},
+        'DISCOVERY_OUTPUT': output,
+        'DISCOVERY_RESUME': resume,
+        'JOBDIR': jobdir,
+        # Constant-memory request dedup, persisted in JOBDIR (see frontier.py)
+        'DUPEFILTER_CLASS': 'ai_client_acquisition.discovery.frontier.BloomDupeFilter',
+        'INCREMENTAL_CRAWL': incremental,
+        # Delay and per-domain concurrency above are starting points, adapted per site (see throttle.py)
+        'ADAPTIVE_THROTTLE': os.getenv("ADAPTIVE_THROTTLE", "true").lower() in ("1", "true", "yes"),
+        'DOWNLOADER_MIDDLEWARES': {
+            'ai_client_acquisition.discovery.middlewares.ConditionalRequestMiddleware': 50,
+            # After the local 304s, which cost no budget
+            'ai_client_acquisition.discovery.middlewares.CrawlBudgetMiddleware': 60,
+            'ai_client_acquisition.discovery.middlewares.AdaptiveThrottleMiddleware': 800,
+        },
+        **(settings or {}),
     })
     
-    process.crawl(WebsiteCrawler, start_urls=start_urls, allowed_domains=allowed_domains)
-    process.start() 
\ No newline at end of file
+    crawler = process.create_crawler(WebsiteCrawler)
+    process.crawl(crawler, start_urls=start_urls, allowed_domains=allowed_domains)
+    process.start()
+    return crawler.stats.get_stats() 
\ No newline at end of file
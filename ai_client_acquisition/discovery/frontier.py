@@ -0,0 +1,125 @@
+import hashlib
+import json
+import logging
+import math
+import mmap
+import os
+from typing import Optional
+
+from scrapy.dupefilters import BaseDupeFilter
+from scrapy.utils.job import job_dir
+
+logger = logging.getLogger(__name__)
+
+# Sized for multi-day crawls: 10M URLs at a 1-in-a-million false positive
+# rate take about 36 MB, on disk (memory-mapped) when the crawl has a JOBDIR.
+CRAWL_BLOOM_CAPACITY = int(os.getenv("CRAWL_BLOOM_CAPACITY", "10000000"))
+CRAWL_BLOOM_ERROR_RATE = float(os.getenv("CRAWL_BLOOM_ERROR_RATE", "0.000001"))
+
+
+class BloomFilter:
+    """
+    Fixed-size set of strings with no false negatives and a bounded false
+    positive rate. With a path, the bits live in a memory-mapped file and the
+    sizing and count in `<path>.json`, so the filter survives restarts.
+    """
+
+    def __init__(self, capacity: int = CRAWL_BLOOM_CAPACITY, error_rate: float = CRAWL_BLOOM_ERROR_RATE,
+                 path: Optional[str] = None):
+        self.path = path
+        self.count = 0
+        if path and os.path.exists(f"{path}.json"):
+            # An existing filter keeps the sizing it was created with
+            with open(f"{path}.json", 'r') as f:
+                meta = json.load(f)
+            capacity, error_rate, self.count = meta['capacity'], meta['error_rate'], meta['count']
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.num_bits = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        size = (self.num_bits + 7) // 8
+
+        self._file = None
+        if path:
+            mode = 'r+b' if os.path.exists(path) else 'w+b'
+            self._file = open(path, mode)
+            if os.path.getsize(path) < size:
+                self._file.truncate(size)
+            self._bits = mmap.mmap(self._file.fileno(), size)
+        else:
+            self._bits = bytearray(size)
+
+    def __len__(self) -> int:
+        return self.count
+
+    def _positions(self, key: str):
+        # Double hashing: k positions from one 128-bit digest
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        return [(first + i * second) % self.num_bits for i in range(self.num_hashes)]
+
+    def __contains__(self, key: str) -> bool:
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+    def add(self, key: str) -> bool:
+        """
+        Add a key; False if it was (probably) already there.
+        """
+        added = False
+        for position in self._positions(key):
+            byte, mask = position >> 3, 1 << (position & 7)
+            if not self._bits[byte] & mask:
+                self._bits[byte] |= mask
+                added = True
+        if added:
+            self.count += 1
+        return added
+
+    def flush(self) -> None:
+        if not self.path:
+            return
+        self._bits.flush()
+        with open(f"{self.path}.json", 'w') as f:
+            json.dump({'capacity': self.capacity, 'error_rate': self.error_rate, 'count': self.count}, f)
+
+    def close(self) -> None:
+        if self._file is None or self._file.closed:
+            return
+        self.flush()
+        self._bits.close()
+        self._file.close()
+
+
+class VisitedUrlStore(BloomFilter):
+    """
+    Pages the crawler has parsed, kept in JOBDIR so a resumed crawl does not
+    analyze them again. In memory when the crawl has no JOBDIR.
+    """
+
+    def __init__(self, jobdir: Optional[str] = None):
+        super().__init__(path=os.path.join(jobdir, 'visited.bloom') if jobdir else None)
+
+
+class BloomDupeFilter(BaseDupeFilter):
+    """
+    Scrapy dupefilter on a Bloom filter of request fingerprints. Scrapy's
+    default keeps every fingerprint in a Python set (and a text file under
+    JOBDIR); this one has constant memory and persists in the JOBDIR.
+    """
+
+    def __init__(self, path: Optional[str] = None, fingerprinter=None):
+        self.fingerprinter = fingerprinter
+        self.seen = BloomFilter(path=os.path.join(path, 'requests.bloom') if path else None)
+        if len(self.seen):
+            logger.info(f"Resuming with {len(self.seen)} requests already seen")
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls(job_dir(crawler.settings), fingerprinter=crawler.request_fingerprinter)
+
+    def request_seen(self, request) -> bool:
+        return not self.seen.add(self.fingerprinter.fingerprint(request).hex())
+
+    def close(self, reason) -> None:
+        self.seen.close()
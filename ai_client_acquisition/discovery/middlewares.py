@@ -0,0 +1,138 @@
+import logging
+
+from scrapy.exceptions import IgnoreRequest, NotConfigured
+from scrapy.http import Response
+
+from ai_client_acquisition.discovery.budget import MAX_PAGES_PER_SITE
+from ai_client_acquisition.discovery.scheduler import registered_domain
+from ai_client_acquisition.discovery.throttle import (
+    THROTTLE_MAX_CONCURRENCY, THROTTLE_TARGET_LATENCY, AIMDThrottle, is_backoff_error, parse_retry_after
+)
+
+logger = logging.getLogger(__name__)
+
+
+class ConditionalRequestMiddleware:
+    """
+    Downloader middleware for incremental crawls (INCREMENTAL_CRAWL).
+
+    Pages the sitemap reports unchanged since our last fetch are answered
+    with a local 304, without a request. Other pages crawled before are
+    requested with If-None-Match/If-Modified-Since from the stored
+    validators, so an unchanged page costs a bodyless 304. The spider
+    follows the stored links of 304 pages instead of re-analyzing them.
+    """
+
+    def __init__(self, stats):
+        self.stats = stats
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        if not crawler.settings.getbool('INCREMENTAL_CRAWL'):
+            raise NotConfigured
+        return cls(crawler.stats)
+
+    def process_request(self, request, spider):
+        state = spider.crawl_state.get(request.url)
+        if not state:
+            return None
+        if request.url in spider.unchanged_urls:
+            self.stats.inc_value('incremental/unchanged_in_sitemap', spider=spider)
+            return Response(request.url, status=304, request=request, flags=['sitemap'])
+        if state['etag']:
+            request.headers.setdefault('If-None-Match', state['etag'])
+        if state['last_modified']:
+            request.headers.setdefault('If-Modified-Since', state['last_modified'])
+        return None
+
+    def process_response(self, request, response, spider):
+        if response.status == 304 and 'sitemap' not in response.flags:
+            self.stats.inc_value('incremental/not_modified', spider=spider)
+        return response
+
+
+class CrawlBudgetMiddleware:
+    """
+    Downloader middleware spending each site's page budget
+    (MAX_PAGES_PER_SITE) on the first requests the scheduler hands out,
+    which, ranked by budget.score_url(), are the most valuable ones.
+    Requests over budget are dropped before they are downloaded; pages
+    answered locally (unchanged in the sitemap), robots/sitemap requests
+    and redirect hops or retries of a counted page are free. Counts live in
+    spider.state, so a resumed crawl keeps them.
+    """
+
+    def __init__(self, max_pages: int, stats):
+        self.max_pages = max_pages
+        self.stats = stats
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls(crawler.settings.getint('MAX_PAGES_PER_SITE', MAX_PAGES_PER_SITE), crawler.stats)
+
+    def process_request(self, request, spider):
+        meta = request.meta
+        # Scrapy's own robots.txt request, and pages already counted on their first pass
+        if (not meta.get('crawl_budget', True) or meta.get('dont_obey_robotstxt')
+                or meta.get('redirect_times') or meta.get('retry_times')):
+            return None
+        pages_per_site = spider.state.setdefault('pages_per_site', {})
+        site = registered_domain(request.url)
+        if pages_per_site.get(site, 0) >= self.max_pages:
+            self.stats.inc_value('crawl_budget/dropped', spider=spider)
+            raise IgnoreRequest(f"Page budget of {site} spent")
+        pages_per_site[site] = pages_per_site.get(site, 0) + 1
+        return None
+
+
+class AdaptiveThrottleMiddleware:
+    """
+    Downloader middleware (ADAPTIVE_THROTTLE) that replaces the fixed
+    DOWNLOAD_DELAY and per-domain concurrency with an AIMDThrottle per
+    registered domain, fed with each download's latency, status and
+    failures, and applied to the host's download slot.
+
+    It sits above RetryMiddleware so 429/503 responses and timeouts are seen
+    before they are retried.
+    """
+
+    def __init__(self, crawler, throttle: AIMDThrottle):
+        self.crawler = crawler
+        self.throttle = throttle
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        if not settings.getbool('ADAPTIVE_THROTTLE'):
+            raise NotConfigured
+        throttle = AIMDThrottle(
+            start_concurrency=settings.getint('CONCURRENT_REQUESTS_PER_DOMAIN'),
+            max_concurrency=settings.getint('THROTTLE_MAX_CONCURRENCY', THROTTLE_MAX_CONCURRENCY),
+            start_delay=settings.getfloat('DOWNLOAD_DELAY'),
+            target_latency=settings.getfloat('THROTTLE_TARGET_LATENCY', THROTTLE_TARGET_LATENCY),
+        )
+        return cls(crawler, throttle)
+
+    def _apply(self, request) -> None:
+        slot = self.crawler.engine.downloader.slots.get(request.meta.get('download_slot'))
+        if slot is None:
+            return
+        host = registered_domain(request.url)
+        slot.concurrency = self.throttle.concurrency(host)
+        slot.delay = self.throttle.delay(host)
+
+    def process_response(self, request, response, spider):
+        latency = request.meta.get('download_latency')
+        if latency is None:
+            # Answered without a download (e.g. a local 304)
+            return response
+        self.throttle.record_response(registered_domain(request.url), latency, response.status,
+                                      parse_retry_after(response.headers.get('Retry-After')))
+        self._apply(request)
+        return response
+
+    def process_exception(self, request, exception, spider):
+        if is_backoff_error(exception):
+            self.throttle.record_failure(registered_domain(request.url))
+            self._apply(request)
+        return None
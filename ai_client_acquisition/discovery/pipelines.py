@@ -0,0 +1,266 @@
+import copy
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+from twisted.internet.defer import Deferred, DeferredList, succeed
+from twisted.internet.threads import deferToThreadPool
+from twisted.python.threadpool import ThreadPool
+
+from ai_client_acquisition.analysis.seo_analyzer import SEOAnalyzer
+from ai_client_acquisition.database.analysis_store import load_latest_analysis, save_analysis
+from ai_client_acquisition.database.connection import db_connection
+from ai_client_acquisition.discovery.crawl_state import save_crawl_state
+from ai_client_acquisition.discovery.scheduler import registered_domain
+from ai_client_acquisition.extraction.contact_extractor import ContactExtractor
+from ai_client_acquisition.jobs.checkpoint import ResumableOutput
+
+logger = logging.getLogger(__name__)
+
+# Processes parsing crawled pages, so the Twisted reactor is never blocked by BeautifulSoup
+CRAWL_ANALYSIS_PROCESSES = int(os.getenv("CRAWL_ANALYSIS_PROCESSES", str(os.cpu_count() or 1)))
+# Pages analyzed between database writes; sites changed in between are saved in one transaction
+DB_WRITE_BATCH_SIZE = int(os.getenv("DB_WRITE_BATCH_SIZE", "25"))
+
+# Built once per worker process
+_analyzers = None
+
+
+def analyze_page(url: str, html: str) -> Dict:
+    """
+    CPU-only analysis of a crawled page (title, meta, H1, word count, image
+    alt, keywords, contacts), without any request. Runs in a worker process.
+    """
+    global _analyzers
+    if _analyzers is None:
+        # The contact page is crawled like any other page, so it is not fetched here
+        _analyzers = (SEOAnalyzer(), ContactExtractor(follow_contact_page=False))
+    seo_analyzer, contact_extractor = _analyzers
+    return {
+        'seo_analysis': seo_analyzer.analyze_html(html, url, network_checks=False),
+        'contact_info': contact_extractor.extract_from_html(html, url),
+    }
+
+
+class SiteAnalysisPipeline:
+    """
+    Scrapy item pipeline that analyzes each crawled page from the body the
+    crawler already downloaded, while the crawl goes on.
+
+    Parsing runs in a process pool (see analyze_page), whose results fire
+    the item's Deferred on the reactor thread. Pages are rolled up per site
+    (keyed by the seed URL of their registered domain): the start page's SEO
+    analysis plus the contacts found on every page. Changed sites are
+    upserted in one transaction every `batch_size` pages, on a database
+    thread of their own, and each page is appended to the JSONL output as
+    it is analyzed, and its validators and links are stored for the next
+    incremental crawl. In an incremental or resumed crawl only changed or
+    unfinished pages arrive here, so each site starts from its stored
+    analysis.
+    """
+
+    def __init__(self, output_path: Optional[str] = None, resume: bool = False,
+                 batch_size: int = DB_WRITE_BATCH_SIZE, processes: int = CRAWL_ANALYSIS_PROCESSES,
+                 incremental: bool = False):
+        self.output_path = output_path
+        self.resume = resume
+        self.incremental = incremental
+        self.batch_size = max(1, batch_size)
+        self.processes = max(1, processes)
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        return cls(
+            output_path=settings.get('DISCOVERY_OUTPUT'),
+            resume=settings.getbool('DISCOVERY_RESUME'),
+            batch_size=settings.getint('DB_WRITE_BATCH_SIZE', DB_WRITE_BATCH_SIZE),
+            processes=settings.getint('CRAWL_ANALYSIS_PROCESSES', CRAWL_ANALYSIS_PROCESSES),
+            incremental=settings.getbool('INCREMENTAL_CRAWL'),
+        )
+
+    def open_spider(self, spider):
+        # Installed by Scrapy before the pipeline runs
+        from twisted.internet import reactor
+
+        self.reactor = reactor
+        # Spawned, not forked: the reactor already runs threads
+        self.executor = ProcessPoolExecutor(max_workers=self.processes,
+                                            mp_context=multiprocessing.get_context('spawn'))
+        # One thread for the database: writes keep their order and a locked DB never blocks downloads
+        self.db_pool = ThreadPool(minthreads=1, maxthreads=1, name='site-analysis-db')
+        self.db_pool.start()
+        self.output = ResumableOutput(self.output_path, key_field='url', resume=self.resume) if self.output_path else None
+        # The first seed of each registered domain names the site
+        self.roots = {}
+        for url in spider.start_urls:
+            self.roots.setdefault(registered_domain(url), url)
+        self.sites: Dict[str, Dict] = {}
+        # Sites whose stored analysis is not merged yet; they are not saved until it is
+        self.loading: Dict[str, Deferred] = {}
+        self.start_pages = set()
+        self.dirty = set()
+        self.page_states = []
+        self.unflushed = 0
+
+    def close_spider(self, spider):
+        self.executor.shutdown()
+        deferred = DeferredList(list(self.loading.values()))
+        deferred.addCallback(lambda _: self._flush())
+        deferred.addBoth(self._closed)
+        return deferred
+
+    def _closed(self, _) -> None:
+        self.db_pool.stop()
+        if self.output:
+            self.output.close()
+        logger.info(f"Analyzed {sum(site['pages_crawled'] for site in self.sites.values())} pages "
+                    f"on {len(self.sites)} sites")
+
+    def process_item(self, item, spider):
+        future = self.executor.submit(analyze_page, item['url'], item.pop('html', '') or '')
+        deferred = Deferred()
+        # Fired on the reactor thread when the result arrives; no thread waits for it
+        future.add_done_callback(lambda done: self.reactor.callFromThread(self._resolve, done, deferred))
+        deferred.addCallback(self._collect, item)
+        deferred.addErrback(self._failed, item)
+        return deferred
+
+    @staticmethod
+    def _resolve(future, deferred: Deferred) -> None:
+        error = future.exception()
+        if error is None:
+            deferred.callback(future.result())
+        else:
+            deferred.errback(error)
+
+    def _in_db_thread(self, function, *args) -> Deferred:
+        return deferToThreadPool(self.reactor, self.db_pool, function, *args)
+
+    def _site(self, url: str) -> Dict:
+        domain = registered_domain(url)
+        if domain not in self.sites:
+            self.sites[domain] = {
+                'url': self.roots.get(domain, url),
+                'platform_type': 'unknown',
+                'seo_analysis': None,
+                'contact_info': {'emails': [], 'phones': [], 'social_media': {}, 'contact_page_url': None},
+                'pages_crawled': 0,
+            }
+            if self.incremental or self.resume:
+                loading = self.loading[domain] = self._in_db_thread(self._load_stored, self.sites[domain]['url'])
+                loading.addCallbacks(self._merge_stored, self._load_failed,
+                                     callbackArgs=(domain,), errbackArgs=(domain,))
+        return self.sites[domain]
+
+    @staticmethod
+    def _load_stored(url: str) -> Optional[Dict]:
+        with db_connection() as conn:
+            return load_latest_analysis(conn, url)
+
+    def _merge_stored(self, stored: Optional[Dict], domain: str) -> None:
+        """
+        Fold a site's stored analysis into its roll-up. Pages may have
+        arrived while it loaded: a start page crawled now wins over the
+        stored one, and stored contacts come first.
+        """
+        del self.loading[domain]
+        if not stored:
+            return
+        site = self.sites[domain]
+        if domain not in self.start_pages:
+            site['platform_type'] = stored.get('platform_type') or site['platform_type']
+            if stored.get('seo_analysis'):
+                site['seo_analysis'] = stored['seo_analysis']
+                site['link_counts'] = stored.get('link_counts')
+        contacts = stored.get('contact_info') or {}
+        merged = site['contact_info']
+        for key in ('emails', 'phones'):
+            values = list(contacts.get(key) or [])
+            merged[key] = values + [value for value in merged[key] if value not in values]
+        merged['social_media'] = {**merged['social_media'], **(contacts.get('social_media') or {})}
+        merged['contact_page_url'] = contacts.get('contact_page_url') or merged['contact_page_url']
+
+    def _load_failed(self, failure, domain: str) -> None:
+        # Left in self.loading, so the partial roll-up never replaces the stored analysis
+        logger.error(f"Error loading the stored analysis of {self.sites[domain]['url']}: "
+                     f"{failure.getErrorMessage()}; the site is not saved in this crawl")
+
+    def _collect(self, analysis: Dict, item):
+        url = item['url']
+        site = self._site(url)
+        site['pages_crawled'] += 1
+        # The start page stands for the site; until it arrives, the first page does
+        if item.get('depth', 0) == 0:
+            self.start_pages.add(registered_domain(url))
+        if item.get('depth', 0) == 0 or site['seo_analysis'] is None:
+            site['seo_analysis'] = analysis['seo_analysis']
+            site['link_counts'] = {'internal_links': item.get('internal_links'),
+                                   'external_links': item.get('external_links')}
+            platform = next((name for name, found in (item.get('platform_indicators') or {}).items() if found), None)
+            if platform:
+                site['platform_type'] = platform
+
+        contacts = analysis['contact_info'] or {}
+        merged = site['contact_info']
+        for key in ('emails', 'phones'):
+            merged[key].extend(value for value in contacts.get(key) or [] if value not in merged[key])
+        for platform, link in (contacts.get('social_media') or {}).items():
+            merged['social_media'].setdefault(platform, link)
+        merged['contact_page_url'] = merged['contact_page_url'] or contacts.get('contact_page_url')
+
+        if self.output:
+            self.output.write({
+                'url': url,
+                'site': site['url'],
+                'title': item.get('title'),
+                'platform_indicators': item.get('platform_indicators'),
+                'internal_links': item.get('internal_links'),
+                'external_links': item.get('external_links'),
+                **analysis,
+            })
+        self.page_states.append({
+            'url': url,
+            'etag': item.get('etag'),
+            'last_modified': item.get('last_modified'),
+            'links': item.get('links'),
+        })
+        self.dirty.add(registered_domain(url))
+        self.unflushed += 1
+        if self.unflushed >= self.batch_size:
+            self._flush()
+        return item
+
+    def _failed(self, failure, item):
+        logger.error(f"Error analyzing crawled page {item.get('url')}: {failure.getErrorMessage()}")
+        if self.output:
+            self.output.write({'url': item.get('url'), 'error': failure.getErrorMessage()}, done=False)
+        return item
+
+    def _flush(self) -> Deferred:
+        """
+        Upsert every site that changed since the last flush, in one
+        transaction on the database thread. Sites still loading their
+        stored analysis wait for a later flush.
+        """
+        ready = self.dirty - set(self.loading)
+        if not ready:
+            return succeed(None)
+        # Copied, so the pages arriving meanwhile do not change what is written
+        sites = [copy.deepcopy(self.sites[domain]) for domain in ready]
+        page_states, self.page_states = self.page_states, []
+        self.dirty -= ready
+        self.unflushed = 0
+        deferred = self._in_db_thread(self._write, sites, page_states)
+        deferred.addErrback(lambda failure: logger.error(f"Error saving site analyses: {failure.getErrorMessage()}"))
+        return deferred
+
+    @staticmethod
+    def _write(sites: List[Dict], page_states: List[Dict]) -> None:
+        with db_connection() as conn:
+            for site in sites:
+                save_analysis(conn, site['url'], site)
+            save_crawl_state(conn, page_states)
+        logger.info(f"Saved {len(sites)} site analyses")
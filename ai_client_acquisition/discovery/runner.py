@@ -0,0 +1,122 @@
+import logging
+import multiprocessing
+import os
+import queue
+import zlib
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+from ai_client_acquisition.discovery.pipelines import CRAWL_ANALYSIS_PROCESSES
+from ai_client_acquisition.discovery.scheduler import registered_domain
+from ai_client_acquisition.jobs.checkpoint import ResumableOutput
+
+logger = logging.getLogger(__name__)
+
+# Crawler processes, each with its own reactor; a crashed one is restarted this many times
+CRAWL_WORKERS = int(os.getenv("CRAWL_WORKERS", "1"))
+CRAWL_WORKER_RESTARTS = int(os.getenv("CRAWL_WORKER_RESTARTS", "2"))
+
+
+def partition_seeds(start_urls: List[str], workers: int) -> List[List[str]]:
+    """
+    Split the seeds into `workers` groups of whole sites. A site always lands
+    in the same group (by a hash of its registered domain), so a resumed run
+    hands it to the worker holding its crawl state.
+    """
+    partitions: List[List[str]] = [[] for _ in range(workers)]
+    for url in start_urls:
+        partitions[zlib.crc32(registered_domain(url).encode('utf-8')) % workers].append(url)
+    return partitions
+
+
+def _crawl_partition(index: int, start_urls: List[str], allowed_domains: Optional[List[str]], output: Optional[str],
+                     resume: bool, jobdir: Optional[str], incremental: bool, settings: Dict, results) -> None:
+    # Imported in the worker, which installs its own reactor
+    from ai_client_acquisition.discovery.crawler import run_crawler
+
+    stats = run_crawler(start_urls, allowed_domains, output=output, resume=resume, jobdir=jobdir,
+                        incremental=incremental, settings=settings)
+    results.put((index, {key: value for key, value in stats.items() if isinstance(value, (int, float))}))
+
+
+def run_crawlers(start_urls: List[str], allowed_domains: Optional[List[str]] = None, output: Optional[str] = None,
+                 resume: bool = False, jobdir: Optional[str] = None, incremental: bool = False,
+                 workers: int = CRAWL_WORKERS, max_restarts: int = CRAWL_WORKER_RESTARTS) -> Dict:
+    """
+    Crawl the seeds with `workers` crawler processes, each running
+    run_crawler() on its share of the sites, so page parsing uses several
+    cores. Workers save to the shared database as usual; each writes its own
+    `<output>.worker<N>` (and crawl state in `<jobdir>/worker<N>`), merged
+    into `output` when it finishes. A worker that crashes is restarted,
+    resuming from its crawl state, up to `max_restarts` times; if it still
+    fails, its files are kept for `--resume`. Returns the workers' summed
+    numeric stats.
+    """
+    partitions = {index: urls for index, urls in enumerate(partition_seeds(start_urls, max(1, workers))) if urls}
+    context = multiprocessing.get_context('spawn')
+    results = context.Queue()
+    # The analysis processes are shared out too, so the workers do not oversubscribe the CPUs
+    settings = {'CRAWL_ANALYSIS_PROCESSES': max(1, CRAWL_ANALYSIS_PROCESSES // max(1, len(partitions)))}
+
+    def part_output(index: int) -> Optional[str]:
+        return f"{output}.worker{index}" if output else None
+
+    def start(index: int, resume_part: bool):
+        process = context.Process(
+            target=_crawl_partition, name=f"crawler-{index}",
+            args=(index, partitions[index], allowed_domains, part_output(index), resume_part,
+                  os.path.join(jobdir, f"worker{index}") if jobdir else None, incremental, settings, results)
+        )
+        process.start()
+        logger.info(f"Crawler {index} (pid {process.pid}) started on {len(partitions[index])} seeds")
+        return process
+
+    running = {index: start(index, resume) for index in partitions}
+    restarts = defaultdict(int)
+    finished, failed = [], []
+    totals: Dict[str, float] = {}
+    stopping = False
+
+    def collect(timeout: float) -> bool:
+        # Drained while waiting: a worker cannot exit with unread data in the queue
+        try:
+            index, stats = results.get(timeout=timeout)
+        except queue.Empty:
+            return False
+        for key, value in stats.items():
+            totals[key] = totals.get(key, 0) + value
+        return True
+
+    while running:
+        try:
+            collect(timeout=1)
+            for index, process in list(running.items()):
+                if process.exitcode is None:
+                    continue
+                del running[index]
+                if process.exitcode == 0:
+                    finished.append(index)
+                elif not stopping and restarts[index] < max_restarts:
+                    restarts[index] += 1
+                    logger.warning(f"Crawler {index} exited with code {process.exitcode}; "
+                                   f"restarting it (attempt {restarts[index]} of {max_restarts})")
+                    running[index] = start(index, True)
+                else:
+                    logger.error(f"Crawler {index} failed with code {process.exitcode}; "
+                                 f"its sites can be finished with --resume")
+                    failed.append(index)
+        except KeyboardInterrupt:
+            # The workers got the Ctrl+C too and are closing their crawls
+            stopping = True
+            logger.info("Waiting for the crawlers to stop...")
+    while collect(timeout=0.1):
+        pass
+
+    if output:
+        with ResumableOutput(output, key_field='url', resume=resume) as merged:
+            for index in sorted(finished):
+                merged.absorb(part_output(index))
+    logger.info(f"{len(finished)} of {len(partitions)} crawlers finished; "
+                f"{int(totals.get('item_scraped_count', 0))} pages, "
+                f"{int(totals.get('downloader/request_count', 0))} requests")
+    return totals
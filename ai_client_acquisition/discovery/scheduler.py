@@ -0,0 +1,210 @@
+import logging
+import os
+import threading
+import time
+import urllib.request
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Deque, Dict, Iterator, Optional, Tuple
+from urllib.parse import urlparse
+from urllib.robotparser import RobotFileParser
+
+from ai_client_acquisition.discovery.throttle import AIMDThrottle, is_backoff_error
+
+logger = logging.getLogger(__name__)
+
+USER_AGENT = 'Mozilla/5.0 (compatible; ClientAcquisitionBot/1.0; +http://yourdomain.com)'
+
+# Requests in flight per registered domain, and seconds between their starts
+HOST_CONCURRENCY = int(os.getenv("HOST_CONCURRENCY", "1"))
+REQUEST_DELAY = float(os.getenv("REQUEST_DELAY", "2"))
+# A robots.txt Crawl-delay above this is capped rather than stalling the batch
+MAX_CRAWL_DELAY = float(os.getenv("MAX_CRAWL_DELAY", "30"))
+ROBOTS_TIMEOUT = float(os.getenv("ROBOTS_TIMEOUT", "5"))
+
+# Public suffixes with two labels that are common among our prospects; the
+# full Public Suffix List is not worth a dependency for grouping hosts.
+_TWO_LABEL_SUFFIXES = {
+    'co.uk', 'org.uk', 'ac.uk', 'gov.uk', 'com.au', 'net.au', 'org.au', 'co.nz', 'co.za', 'com.br',
+    'com.mx', 'co.jp', 'co.in', 'com.cn', 'com.tr', 'qc.ca', 'on.ca', 'bc.ca', 'ab.ca', 'gouv.qc.ca',
+}
+
+
+def registered_domain(url: str) -> str:
+    """
+    Registrable domain of a URL (www.shop.example.co.uk -> example.co.uk),
+    so subdomains of one site share a politeness budget.
+    """
+    host = (urlparse(url).hostname or '').rstrip('.').lower()
+    labels = host.split('.')
+    if len(labels) <= 2 or host.replace('.', '').isdigit():
+        return host
+    for size in (3, 2):
+        if '.'.join(labels[-size:]) in _TWO_LABEL_SUFFIXES and len(labels) > size:
+            return '.'.join(labels[-size - 1:])
+    return '.'.join(labels[-2:])
+
+
+def robots_crawl_delay(url: str, user_agent: str = USER_AGENT, timeout: float = ROBOTS_TIMEOUT) -> Optional[float]:
+    """
+    Crawl-delay (or Request-rate) from the site's robots.txt, if it sets one.
+    """
+    parsed = urlparse(url)
+    robots_url = f"{parsed.scheme or 'http'}://{parsed.netloc}/robots.txt"
+    try:
+        request = urllib.request.Request(robots_url, headers={'User-Agent': user_agent})
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            lines = response.read(512 * 1024).decode('utf-8', errors='replace').splitlines()
+    except Exception as e:
+        logger.debug(f"No robots.txt for {parsed.netloc}: {e}")
+        return None
+    parser = RobotFileParser()
+    parser.parse(lines)
+    delay = parser.crawl_delay(user_agent)
+    if delay is not None:
+        return float(delay)
+    rate = parser.request_rate(user_agent)
+    if rate and rate.requests:
+        return rate.seconds / rate.requests
+    return None
+
+
+class DomainScheduler:
+    """
+    Runs per-URL work on a thread pool while keeping each registered domain
+    polite: at most `per_host_concurrency` requests in flight, starts spaced
+    by at least `min_delay` (or the robots.txt Crawl-delay), and hosts taken
+    round-robin so a site with many pages does not hold up the others.
+
+    With a `throttle`, each domain's concurrency and delay start there and
+    adapt to how long its calls take and whether they time out or are told
+    to slow down (429/503); a robots.txt Crawl-delay stays the floor.
+    """
+
+    def __init__(self, per_host_concurrency: int = HOST_CONCURRENCY, min_delay: float = REQUEST_DELAY,
+                 respect_robots: bool = True, user_agent: str = USER_AGENT,
+                 throttle: Optional[AIMDThrottle] = None):
+        self.per_host_concurrency = max(1, per_host_concurrency)
+        self.min_delay = min_delay
+        self.respect_robots = respect_robots
+        self.user_agent = user_agent
+        self.throttle = throttle
+        self._queues: Dict[str, Deque[Tuple[str, Any]]] = {}
+        self._order: Deque[str] = deque()
+        self._active: Dict[str, int] = {}
+        self._next_start: Dict[str, float] = {}
+        self._delays: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return sum(len(queue) for queue in self._queues.values())
+
+    def add(self, url: str, item: Any = None) -> None:
+        domain = registered_domain(url)
+        if domain not in self._queues:
+            self._queues[domain] = deque()
+            self._order.append(domain)
+            self._active[domain] = 0
+            # Kept across runs, so a second pass over a site stays spaced out
+            self._next_start.setdefault(domain, 0.0)
+            if not self.respect_robots:
+                self._delays[domain] = self.min_delay
+        self._queues[domain].append((url, item))
+
+    def _limit(self, domain: str) -> int:
+        # One request at a time until robots.txt has been read
+        if domain not in self._delays:
+            return 1
+        return self.throttle.concurrency(domain) if self.throttle else self.per_host_concurrency
+
+    def _delay(self, domain: str) -> float:
+        if self.throttle and domain in self._delays:
+            return self.throttle.delay(domain)
+        return self._delays.get(domain, self.min_delay)
+
+    def _take(self, now: float) -> Tuple[Optional[Tuple[str, str, Any]], Optional[float]]:
+        """
+        Next (domain, url, item) allowed to start, else how long until one
+        may (None if every host with work is at its concurrency limit).
+        """
+        with self._lock:
+            wait_for = None
+            for _ in range(len(self._order)):
+                domain = self._order[0]
+                self._order.rotate(-1)
+                if not self._queues[domain] or self._active[domain] >= self._limit(domain):
+                    continue
+                if self._next_start[domain] > now:
+                    remaining = self._next_start[domain] - now
+                    wait_for = remaining if wait_for is None else min(wait_for, remaining)
+                    continue
+                url, item = self._queues[domain].popleft()
+                self._active[domain] += 1
+                self._next_start[domain] = now + self._delay(domain)
+                return (domain, url, item), None
+            return None, wait_for
+
+    def _finish(self, domain: str) -> None:
+        with self._lock:
+            self._active[domain] -= 1
+            if not self._queues[domain] and not self._active[domain]:
+                self._order.remove(domain)
+                del self._queues[domain]
+
+    def _resolve_delay(self, domain: str, url: str) -> None:
+        crawl_delay = robots_crawl_delay(url, self.user_agent)
+        delay = self.min_delay if crawl_delay is None else max(self.min_delay, min(crawl_delay, MAX_CRAWL_DELAY))
+        if self.throttle and crawl_delay is not None:
+            self.throttle.set_min_delay(domain, delay)
+        with self._lock:
+            if domain not in self._delays:
+                self._delays[domain] = delay
+                self._next_start[domain] = max(self._next_start[domain], time.monotonic() + delay - self.min_delay)
+        if crawl_delay is not None:
+            logger.info(f"Using a {delay:g}s delay for {domain} (robots.txt Crawl-delay {crawl_delay:g})")
+
+    def _run(self, func: Callable[[str, Any], Any], domain: str, url: str, item: Any) -> Any:
+        if domain not in self._delays:
+            self._resolve_delay(domain, url)
+        if self.throttle is None:
+            return func(url, item)
+        started = time.monotonic()
+        try:
+            result = func(url, item)
+        except Exception as e:
+            if is_backoff_error(e):
+                self.throttle.record_failure(domain)
+            raise
+        self.throttle.record_response(domain, time.monotonic() - started)
+        return result
+
+    def run(self, func: Callable[[str, Any], Any], workers: int = 4) -> Iterator[Tuple[str, Any, Any, Optional[Exception]]]:
+        """
+        Call func(url, item) for every queued URL on `workers` threads.
+        Yields (url, item, result, error) in completion order.
+        """
+        workers = max(1, workers)
+        in_flight = {}
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='host') as executor:
+            while len(self) or in_flight:
+                wait_for = None
+                while len(in_flight) < workers:
+                    task, wait_for = self._take(time.monotonic())
+                    if task is None:
+                        break
+                    domain, url, item = task
+                    in_flight[executor.submit(self._run, func, domain, url, item)] = task
+
+                if not in_flight:
+                    # Every host with work is cooling down
+                    time.sleep(wait_for or 0.05)
+                    continue
+
+                done, _ = wait(in_flight, timeout=wait_for, return_when=FIRST_COMPLETED)
+                for future in done:
+                    domain, url, item = in_flight.pop(future)
+                    self._finish(domain)
+                    try:
+                        yield url, item, future.result(), None
+                    except Exception as e:
+                        yield url, item, None, e
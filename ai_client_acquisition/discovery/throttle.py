@@ -0,0 +1,113 @@
+import logging
+import os
+import threading
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Ceiling for the requests in flight per host, floor for the delay between them
+THROTTLE_MAX_CONCURRENCY = int(os.getenv("THROTTLE_MAX_CONCURRENCY", "8"))
+THROTTLE_MIN_DELAY = float(os.getenv("THROTTLE_MIN_DELAY", "0.25"))
+THROTTLE_MAX_DELAY = float(os.getenv("THROTTLE_MAX_DELAY", "60"))
+# Responses faster than this let a host take more load; much slower ones shed it
+THROTTLE_TARGET_LATENCY = float(os.getenv("THROTTLE_TARGET_LATENCY", "1.0"))
+
+# "Slow down" answers
+BACKOFF_STATUSES = frozenset({429, 503})
+
+
+def is_backoff_error(error: Exception) -> bool:
+    """
+    Whether a failed request means the host is overloaded: a timeout, or an
+    HTTP error carrying a 429/503 response (requests' HTTPError).
+    """
+    if isinstance(error, TimeoutError) or 'Timeout' in type(error).__name__:
+        return True
+    response = getattr(error, 'response', None)
+    return getattr(response, 'status_code', getattr(response, 'status', None)) in BACKOFF_STATUSES
+
+
+def parse_retry_after(value) -> Optional[float]:
+    """
+    Seconds from a Retry-After header given in seconds (HTTP dates are ignored).
+    """
+    if isinstance(value, bytes):
+        value = value.decode('latin-1')
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+class AIMDThrottle:
+    """
+    Per-host politeness that adapts to how the host copes, in the manner of
+    TCP congestion control: each response under `target_latency` adds
+    1/concurrency to the host's concurrency (about one more request in
+    flight per round) and shortens its delay by 10%; a response over twice
+    the target halves concurrency; a 429/503 or a timeout halves concurrency
+    and doubles the delay (or waits Retry-After).
+
+    Thread-safe and independent of the fetch layer: the Scrapy middleware
+    (AdaptiveThrottleMiddleware) and DomainScheduler both drive it.
+    """
+
+    def __init__(self, start_concurrency: int = 1, max_concurrency: int = THROTTLE_MAX_CONCURRENCY,
+                 start_delay: float = 0.0, min_delay: float = THROTTLE_MIN_DELAY,
+                 max_delay: float = THROTTLE_MAX_DELAY, target_latency: float = THROTTLE_TARGET_LATENCY):
+        self.start_concurrency = max(1, start_concurrency)
+        self.max_concurrency = max(self.start_concurrency, max_concurrency)
+        self.min_delay = min_delay
+        self.start_delay = max(min_delay, start_delay)
+        self.max_delay = max(self.start_delay, max_delay)
+        self.target_latency = target_latency
+        self._hosts: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+
+    def _host(self, host: str) -> Dict:
+        if host not in self._hosts:
+            self._hosts[host] = {
+                'concurrency': float(self.start_concurrency),
+                'delay': self.start_delay,
+                # A robots.txt Crawl-delay is never undercut
+                'min_delay': self.min_delay,
+                'latency': None,
+            }
+        return self._hosts[host]
+
+    def concurrency(self, host: str) -> int:
+        with self._lock:
+            return int(self._host(host)['concurrency'])
+
+    def delay(self, host: str) -> float:
+        with self._lock:
+            return self._host(host)['delay']
+
+    def set_min_delay(self, host: str, delay: float) -> None:
+        with self._lock:
+            state = self._host(host)
+            state['min_delay'] = delay
+            state['delay'] = max(state['delay'], delay)
+
+    def record_response(self, host: str, latency: float, status: Optional[int] = None,
+                        retry_after: Optional[float] = None) -> None:
+        if status in BACKOFF_STATUSES:
+            self.record_failure(host, retry_after)
+            return
+        with self._lock:
+            state = self._host(host)
+            # Smoothed, so one slow page does not undo a run of fast ones
+            state['latency'] = latency if state['latency'] is None else 0.7 * state['latency'] + 0.3 * latency
+            if state['latency'] <= self.target_latency:
+                state['concurrency'] = min(self.max_concurrency, state['concurrency'] + 1 / state['concurrency'])
+                state['delay'] = max(state['min_delay'], state['delay'] * 0.9)
+            elif state['latency'] > 2 * self.target_latency:
+                state['concurrency'] = max(1.0, state['concurrency'] / 2)
+
+    def record_failure(self, host: str, retry_after: Optional[float] = None) -> None:
+        with self._lock:
+            state = self._host(host)
+            state['concurrency'] = max(1.0, state['concurrency'] / 2)
+            delay = max(state['delay'] * 2, self.target_latency, retry_after or 0.0)
+            state['delay'] = min(self.max_delay, delay)
+        logger.info(f"Backing off {host}: {int(state['concurrency'])} in flight, {state['delay']:.2f}s apart")
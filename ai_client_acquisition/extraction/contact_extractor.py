@@ -11,7 +11,9 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class ContactExtractor:
-    def __init__(self):
+    def __init__(self, follow_contact_page: bool = True):
+        # Off when the caller crawls the contact page itself (no extra request)
+        self.follow_contact_page = follow_contact_page
         self.email_pattern = re.compile(r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}')
         self.phone_pattern = re.compile(r'(?:\+\d{1,3}[-.\s]?)?\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4}')
         self.social_patterns = {
@@ -51,6 +53,7 @@ class ContactExtractor:
         contact_page = self._find_contact_page(soup, base_url)
         if contact_page:
             result['contact_page_url'] = contact_page
+        if contact_page and self.follow_contact_page:
             # Extract from contact page if found
             try:
                 contact_response = requests.get(contact_page, timeout=10)
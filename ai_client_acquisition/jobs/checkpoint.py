@@ -0,0 +1,162 @@
+import json
+import logging
+import os
+import time
+from typing import Any, Dict, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+# Records written between fsyncs; a crash loses at most this much work
+OUTPUT_FSYNC_EVERY = int(os.getenv("OUTPUT_FSYNC_EVERY", "50"))
+OUTPUT_FSYNC_INTERVAL = float(os.getenv("OUTPUT_FSYNC_INTERVAL", "5"))
+
+
+def _sync(handle) -> None:
+    handle.flush()
+    os.fsync(handle.fileno())
+
+
+def _read_checkpoint(path: str) -> Set[Any]:
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                done.add(json.loads(line))
+            except ValueError:
+                # A torn line from a crash; the keys after it still count
+                continue
+    return done
+
+
+class ResumableOutput:
+    """
+    Append-only JSONL output for the batch scripts, with a checkpoint of the
+    finished keys (URLs, company ids) in `<output>.checkpoint`.
+
+    Records are appended as they complete and fsynced in batches; the
+    checkpoint is always synced after the output, so it never lists a key
+    whose record could be lost. With resume=True the finished keys are
+    loaded, and records that were not checkpointed (written after the last
+    sync, or failed) are dropped so their keys can be redone.
+    """
+
+    def __init__(self, path: str, key_field: str, resume: bool = False,
+                 fsync_every: int = OUTPUT_FSYNC_EVERY, fsync_interval: float = OUTPUT_FSYNC_INTERVAL):
+        self.path = path
+        self.checkpoint_path = f"{path}.checkpoint"
+        self.key_field = key_field
+        self.fsync_every = max(1, fsync_every)
+        self.fsync_interval = fsync_interval
+        self.done: Set[Any] = set()
+        if resume:
+            self.done = _read_checkpoint(self.checkpoint_path)
+            self._compact()
+            self._rewrite_checkpoint()
+            logger.info(f"Resuming: {len(self.done)} finished entries in {self.checkpoint_path}")
+        self._output = open(path, 'a' if resume else 'w', encoding='utf-8')
+        self._checkpoint = open(self.checkpoint_path, 'a' if resume else 'w', encoding='utf-8')
+        self._pending_keys = []
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def _compact(self) -> None:
+        """
+        Keep only the last record of each checkpointed key. Runs once per
+        resume; a torn trailing line is dropped with the rest.
+        """
+        if not os.path.exists(self.path):
+            return
+        records: Dict[Any, str] = {}
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    key = json.loads(line).get(self.key_field)
+                except (ValueError, AttributeError):
+                    continue
+                if key in self.done:
+                    records[key] = line if line.endswith('\n') else line + '\n'
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            f.writelines(records.values())
+            _sync(f)
+        os.replace(temp_path, self.path)
+
+    def _rewrite_checkpoint(self) -> None:
+        """
+        Rewrite the checkpoint from the loaded keys, so keys appended on
+        resume are not glued onto a torn line.
+        """
+        temp_path = f"{self.checkpoint_path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            f.writelines(json.dumps(key, ensure_ascii=False) + '\n' for key in self.done)
+            _sync(f)
+        os.replace(temp_path, self.checkpoint_path)
+
+    def absorb(self, path: str) -> int:
+        """
+        Append the records of another output (e.g. a crawl worker's), keeping
+        its checkpointed keys checkpointed, then delete it and its checkpoint.
+        Returns the number of records moved.
+        """
+        done = _read_checkpoint(f"{path}.checkpoint")
+        moved = 0
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue
+                    self.write(record, done=record.get(self.key_field) in done)
+                    moved += 1
+            os.remove(path)
+        if os.path.exists(f"{path}.checkpoint"):
+            os.remove(f"{path}.checkpoint")
+        return moved
+
+    def is_done(self, key: Any) -> bool:
+        return key in self.done
+
+    def write(self, record: Dict, done: bool = True, key: Optional[Any] = None) -> None:
+        """
+        Append a record. Only records with done=True are checkpointed;
+        failures are kept in the output but redone on resume.
+        """
+        self._output.write(json.dumps(record, ensure_ascii=False, default=str) + '\n')
+        if done:
+            self.mark(record.get(self.key_field) if key is None else key)
+        self._unsynced += 1
+        if self._unsynced >= self.fsync_every or time.monotonic() - self._last_sync >= self.fsync_interval:
+            self.sync()
+
+    def mark(self, key: Any) -> None:
+        """
+        Checkpoint a key without an output record (e.g. a finished seed).
+        """
+        self.done.add(key)
+        self._pending_keys.append(key)
+
+    def sync(self) -> None:
+        _sync(self._output)
+        if self._pending_keys:
+            self._checkpoint.writelines(json.dumps(key, ensure_ascii=False) + '\n' for key in self._pending_keys)
+            _sync(self._checkpoint)
+            self._pending_keys = []
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def close(self) -> None:
+        if self._output.closed:
+            return
+        self.sync()
+        self._output.close()
+        self._checkpoint.close()
@@ -0,0 +1,253 @@
+import json
+import logging
+import os
+import random
+from typing import Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Task lifecycle: a task is ready once available_at has passed and nobody
+# holds its lease. claim_tasks() leases it to a worker (counting an attempt),
+# which extends the lease while it works. Completed tasks are deleted; failed
+# ones come back after an exponential backoff, and after max_attempts they
+# move to dead_tasks. A worker that dies simply lets its leases expire.
+ANALYZE_URL = 'analyze_url'
+
+TASK_LEASE_SECONDS = int(os.getenv("TASK_LEASE_SECONDS", "300"))
+TASK_MAX_ATTEMPTS = int(os.getenv("TASK_MAX_ATTEMPTS", "5"))
+TASK_RETRY_BASE = float(os.getenv("TASK_RETRY_BASE", "30"))
+TASK_RETRY_MAX = float(os.getenv("TASK_RETRY_MAX", "3600"))
+TASK_WORKER_CONCURRENCY = int(os.getenv("TASK_WORKER_CONCURRENCY", "4"))
+TASK_POLL_INTERVAL = float(os.getenv("TASK_POLL_INTERVAL", "5"))
+
+TASKS_SCHEMA = [
+    '''
+    CREATE TABLE IF NOT EXISTS tasks (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        kind TEXT NOT NULL,
+        payload TEXT,
+        dedupe_key TEXT UNIQUE,
+        priority INTEGER NOT NULL DEFAULT 0,
+        attempts INTEGER NOT NULL DEFAULT 0,
+        max_attempts INTEGER NOT NULL,
+        available_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        lease_owner TEXT,
+        lease_expires_at DATETIME,
+        last_error TEXT,
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+    )
+    ''',
+    'CREATE INDEX IF NOT EXISTS ix_tasks_ready ON tasks(available_at, priority)',
+    'CREATE INDEX IF NOT EXISTS ix_tasks_lease ON tasks(lease_owner, lease_expires_at)',
+    '''
+    CREATE TABLE IF NOT EXISTS dead_tasks (
+        id INTEGER PRIMARY KEY,
+        kind TEXT NOT NULL,
+        payload TEXT,
+        dedupe_key TEXT,
+        attempts INTEGER NOT NULL,
+        last_error TEXT,
+        created_at DATETIME,
+        died_at DATETIME DEFAULT CURRENT_TIMESTAMP
+    )
+    ''',
+]
+
+_TASK_COLUMNS = 'id, kind, payload, attempts, max_attempts'
+
+# Leased tasks whose lease has not run out belong to their worker
+_CLAIMABLE = '''
+    available_at <= CURRENT_TIMESTAMP
+    AND (lease_expires_at IS NULL OR lease_expires_at < CURRENT_TIMESTAMP)
+    AND attempts < max_attempts
+'''
+
+
+def _seconds(seconds: float) -> str:
+    return f'+{int(seconds)} seconds'
+
+
+def _task(row) -> Dict:
+    return {
+        'id': row[0],
+        'kind': row[1],
+        'payload': json.loads(row[2]) if row[2] else {},
+        'attempts': row[3],
+        'max_attempts': row[4],
+    }
+
+
+def enqueue_tasks(conn, kind: str, payloads: Iterable[Dict], dedupe_keys: Optional[Iterable[str]] = None,
+                  priority: int = 0, max_attempts: int = TASK_MAX_ATTEMPTS) -> int:
+    """
+    Queue tasks and return how many were added. A task whose dedupe key is
+    already queued (and not finished) is not added again.
+    """
+    payloads = list(payloads)
+    keys = list(dedupe_keys) if dedupe_keys is not None else [None] * len(payloads)
+    if not payloads:
+        return 0
+    return conn.executemany(
+        '''
+        INSERT INTO tasks (kind, payload, dedupe_key, priority, max_attempts) VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT(dedupe_key) DO NOTHING
+        ''',
+        [
+            (kind, json.dumps(payload, ensure_ascii=False), key, priority, max_attempts)
+            for payload, key in zip(payloads, keys)
+        ]
+    ).rowcount
+
+
+def dead_letter_expired(conn) -> int:
+    """
+    Move tasks that used up their attempts without finishing (their worker
+    died or lost its lease every time) to dead_tasks.
+    """
+    return _bury(conn, '''
+        attempts >= max_attempts
+        AND (lease_expires_at IS NULL OR lease_expires_at < CURRENT_TIMESTAMP)
+    ''', ())
+
+
+def _bury(conn, where: str, params) -> int:
+    conn.execute(
+        f'''
+        INSERT OR REPLACE INTO dead_tasks (id, kind, payload, dedupe_key, attempts, last_error, created_at)
+        SELECT id, kind, payload, dedupe_key, attempts, COALESCE(last_error, 'lease expired'), created_at
+        FROM tasks WHERE {where}
+        ''',
+        params
+    )
+    buried = conn.execute(f'DELETE FROM tasks WHERE {where}', params).rowcount
+    if buried:
+        logger.warning(f"Moved {buried} tasks to the dead-letter table")
+    return buried
+
+
+def claim_tasks(conn, worker_id: str, limit: int, lease_seconds: float = TASK_LEASE_SECONDS) -> List[Dict]:
+    """
+    Lease up to `limit` ready tasks, highest priority first. The select and
+    update are one statement, so two workers never get the same task.
+    """
+    if limit <= 0:
+        return []
+    rows = conn.execute(
+        f'''
+        UPDATE tasks SET
+            lease_owner = ?,
+            lease_expires_at = datetime('now', ?),
+            attempts = attempts + 1
+        WHERE id IN (
+            SELECT id FROM tasks WHERE {_CLAIMABLE}
+            ORDER BY priority DESC, id LIMIT ?
+        )
+        RETURNING {_TASK_COLUMNS}
+        ''',
+        (worker_id, _seconds(lease_seconds), limit)
+    ).fetchall()
+    return [_task(row) for row in rows]
+
+
+def extend_leases(conn, worker_id: str, task_ids: List[int], lease_seconds: float = TASK_LEASE_SECONDS) -> List[int]:
+    """
+    Heartbeat: push back the lease of tasks still being worked on. Returns
+    the ids the worker still owns (a lease that ran out may have been
+    claimed by another worker).
+    """
+    if not task_ids:
+        return []
+    placeholders = ', '.join('?' * len(task_ids))
+    rows = conn.execute(
+        f'''
+        UPDATE tasks SET lease_expires_at = datetime('now', ?)
+        WHERE lease_owner = ? AND id IN ({placeholders})
+        RETURNING id
+        ''',
+        (_seconds(lease_seconds), worker_id, *task_ids)
+    ).fetchall()
+    return [row[0] for row in rows]
+
+
+def complete_task(conn, task_id: int, worker_id: str) -> bool:
+    """
+    Remove a finished task. False if the worker no longer owns it, in which
+    case the caller should discard its result.
+    """
+    return conn.execute(
+        'DELETE FROM tasks WHERE id = ? AND lease_owner = ?', (task_id, worker_id)
+    ).rowcount > 0
+
+
+def retry_delay(attempts: int, base: float = TASK_RETRY_BASE, maximum: float = TASK_RETRY_MAX) -> float:
+    """
+    Exponential backoff with jitter, so failing sites are not retried by
+    every worker at the same moment.
+    """
+    delay = min(maximum, base * 2 ** max(0, attempts - 1))
+    return delay * random.uniform(0.8, 1.2)
+
+
+def fail_task(conn, task_id: int, worker_id: str, error: str) -> Optional[str]:
+    """
+    Record a failed attempt. Returns 'retry' or 'dead', or None if the
+    worker no longer owns the task.
+    """
+    row = conn.execute(
+        'SELECT attempts, max_attempts FROM tasks WHERE id = ? AND lease_owner = ?', (task_id, worker_id)
+    ).fetchone()
+    if row is None:
+        return None
+    attempts, max_attempts = row
+    conn.execute('UPDATE tasks SET last_error = ? WHERE id = ?', (error, task_id))
+    if attempts >= max_attempts:
+        _bury(conn, 'id = ?', (task_id,))
+        return 'dead'
+    conn.execute(
+        '''
+        UPDATE tasks SET
+            lease_owner = NULL,
+            lease_expires_at = NULL,
+            available_at = datetime('now', ?)
+        WHERE id = ?
+        ''',
+        (_seconds(retry_delay(attempts)), task_id)
+    )
+    return 'retry'
+
+
+def requeue_dead_tasks(conn, task_ids: Optional[List[int]] = None) -> int:
+    """
+    Put dead tasks (all of them, or the given ids) back in the queue with
+    fresh attempts.
+    """
+    where, params = '1 = 1', ()
+    if task_ids:
+        where = f"id IN ({', '.join('?' * len(task_ids))})"
+        params = tuple(task_ids)
+    conn.execute(
+        f'''
+        INSERT INTO tasks (kind, payload, dedupe_key, max_attempts, last_error, created_at)
+        SELECT kind, payload, dedupe_key, ?, last_error, created_at FROM dead_tasks WHERE {where}
+        ON CONFLICT(dedupe_key) DO NOTHING
+        ''',
+        (TASK_MAX_ATTEMPTS, *params)
+    )
+    return conn.execute(f'DELETE FROM dead_tasks WHERE {where}', params).rowcount
+
+
+def queue_stats(conn) -> Dict[str, int]:
+    """
+    Task counts: ready, leased (in progress), delayed (waiting for a retry) and dead.
+    """
+    row = conn.execute(
+        f'''
+        SELECT
+            SUM(CASE WHEN {_CLAIMABLE} THEN 1 ELSE 0 END),
+            SUM(CASE WHEN lease_expires_at >= CURRENT_TIMESTAMP THEN 1 ELSE 0 END),
+            SUM(CASE WHEN available_at > CURRENT_TIMESTAMP THEN 1 ELSE 0 END)
+        FROM tasks
+        '''
+    ).fetchone()
+    dead = conn.execute('SELECT COUNT(*) FROM dead_tasks').fetchone()[0]
+    return {'ready': row[0] or 0, 'leased': row[1] or 0, 'delayed': row[2] or 0, 'dead': dead}
@@ -0,0 +1,192 @@
+import logging
+import os
+import socket
+import threading
+import uuid
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Dict
+
+from ai_client_acquisition.analysis.pipeline import AnalysisPipeline
+from ai_client_acquisition.database.analysis_store import analysis_exists, save_analysis, upsert_business
+from ai_client_acquisition.database.connection import db_connection
+from ai_client_acquisition.jobs.store import (
+    ANALYZE_URLS, BUSINESS_SEARCH, add_job_items, claim_job, finish_item, finish_job, job_heartbeat, mark_items,
+    pending_items, release_job, remove_runner, requeue_stale_jobs, runner_heartbeat
+)
+
+logger = logging.getLogger(__name__)
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "2"))
+# A running job without a heartbeat for this long is assumed orphaned
+JOB_STALE_AFTER = float(os.getenv("JOB_STALE_AFTER", "120"))
+
+
+class JobRunner:
+    """
+    Runs queued jobs outside Streamlit: one job at a time, its items on a
+    pool of worker threads. Results are saved from the runner thread, each
+    together with its item status, so a resumed job never redoes finished
+    work or loses an analysis.
+    """
+
+    def __init__(self, workers: int = JOB_WORKERS, poll_interval: float = JOB_POLL_INTERVAL,
+                 stale_after: float = JOB_STALE_AFTER,
+                 pipeline_factory: Callable[[], AnalysisPipeline] = AnalysisPipeline):
+        self.workers = max(1, workers)
+        self.poll_interval = poll_interval
+        self.stale_after = stale_after
+        self.pipeline_factory = pipeline_factory
+        self.hostname = socket.gethostname()
+        self.runner_id = f"{self.hostname}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._local = threading.local()
+        self._stopping = threading.Event()
+
+    def stop(self) -> None:
+        self._stopping.set()
+
+    def _pipeline(self) -> AnalysisPipeline:
+        # Analyzers keep HTTP sessions and state, so each worker thread gets its own
+        if not hasattr(self._local, 'pipeline'):
+            self._local.pipeline = self.pipeline_factory()
+        return self._local.pipeline
+
+    def _heartbeat(self) -> None:
+        with db_connection() as conn:
+            runner_heartbeat(conn, self.runner_id, self.hostname, os.getpid(), self.workers)
+
+    def run(self, once: bool = False) -> None:
+        """
+        Process jobs until stopped; with once=True, until the queue is empty.
+        """
+        logger.info(f"Job runner {self.runner_id} started with {self.workers} workers")
+        try:
+            while not self._stopping.is_set():
+                self._heartbeat()
+                with db_connection() as conn:
+                    requeue_stale_jobs(conn, self.stale_after)
+                    job = claim_job(conn, self.runner_id)
+                if job is None:
+                    if once:
+                        break
+                    self._stopping.wait(self.poll_interval)
+                    continue
+                self.run_job(job)
+        finally:
+            with db_connection() as conn:
+                remove_runner(conn, self.runner_id)
+            logger.info(f"Job runner {self.runner_id} stopped")
+
+    def run_job(self, job: Dict) -> str:
+        logger.info(f"Running job {job['id']} ({job['kind']})")
+        try:
+            if job['kind'] == BUSINESS_SEARCH and job['total_items'] == 0:
+                self._expand_business_search(job)
+            status = self._process_items(job)
+            error = None
+        except Exception as e:
+            logger.exception(f"Job {job['id']} failed")
+            status, error = 'failed', str(e)
+        with db_connection() as conn:
+            if status == 'interrupted':
+                # Shutting down: hand the job back for the next runner
+                release_job(conn, job['id'])
+            else:
+                finish_job(conn, job['id'], status, error)
+        logger.info(f"Job {job['id']} {status}")
+        return status
+
+    def _expand_business_search(self, job: Dict) -> None:
+        """
+        The Places search runs in the job, so the dashboard returns at once.
+        """
+        params = job['params']
+        businesses = self._pipeline().find_businesses(
+            params['city'], params['industry'], params.get('batch_size'), params.get('page', 1)
+        )
+        with db_connection() as conn:
+            add_job_items(conn, job['id'], [
+                (biz['place_id'], {'name': biz.get('name', 'N/A')}) for biz in businesses if biz.get('place_id')
+            ])
+
+    def _process_items(self, job: Dict) -> str:
+        """
+        Keep up to `workers` items in flight, checking for cancellation on
+        every heartbeat. Returns completed, cancelled or interrupted.
+        """
+        in_flight = {}
+        queue = []
+        outcome = None
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix=f"job{job['id']}") as executor:
+            while True:
+                starting = []
+                with db_connection() as conn:
+                    if job_heartbeat(conn, job['id']) == 'cancelling':
+                        outcome = 'cancelled'
+                    elif self._stopping.is_set():
+                        outcome = 'interrupted'
+                    else:
+                        if not queue:
+                            queue = pending_items(conn, job['id'], self.workers * 4)
+                        starting, queue = queue[:self.workers - len(in_flight)], queue[self.workers - len(in_flight):]
+                        mark_items(conn, [item['id'] for item in starting], 'running')
+
+                for item in starting:
+                    in_flight[executor.submit(self._run_item, job, item)] = item
+                if outcome:
+                    # Let the items in flight finish and keep their results
+                    for future in list(in_flight):
+                        self._record(job, in_flight.pop(future), future)
+                    return outcome
+                if not in_flight:
+                    return 'completed'
+
+                done, _ = wait(in_flight, timeout=self.poll_interval, return_when=FIRST_COMPLETED)
+                for future in done:
+                    self._record(job, in_flight.pop(future), future)
+
+    def _run_item(self, job: Dict, item: Dict) -> Dict:
+        """
+        Network-bound part of an item, on a worker thread. Returns what to save.
+        """
+        params = job['params']
+        result = {'business': None, 'url': None, 'payload': None}
+        if job['kind'] == BUSINESS_SEARCH:
+            details = self._pipeline().business_details(item['target'])
+            search_query = f"{params['city']} {params['industry']}"
+            result['business'] = (item['target'], search_query, item['data'].get('name', 'N/A'),
+                                  details['address'], details['website'])
+            url = details['website']
+            direct_only = False
+        elif job['kind'] == ANALYZE_URLS:
+            url = item['target']
+            direct_only = True
+        else:
+            raise ValueError(f"Unknown job kind: {job['kind']}")
+
+        if not url:
+            return result
+        if not params.get('force_reanalysis'):
+            with db_connection() as conn:
+                if analysis_exists(conn, url, direct_only=direct_only):
+                    return result
+        result['url'] = url
+        result['payload'] = self._pipeline().analyze(url)
+        return result
+
+    def _record(self, job: Dict, item: Dict, future) -> None:
+        try:
+            result = future.result()
+        except Exception as e:
+            logger.error(f"Job {job['id']} item {item['target']} failed: {e}")
+            with db_connection() as conn:
+                finish_item(conn, item['id'], 'failed', error=str(e))
+            return
+
+        with db_connection() as conn:
+            business_id = upsert_business(conn, *result['business']) if result['business'] else None
+            if result['payload'] is None:
+                finish_item(conn, item['id'], 'skipped')
+                return
+            analysis_id = save_analysis(conn, result['url'], result['payload'], business_id=business_id)
+            finish_item(conn, item['id'], 'done', analysis_id=analysis_id)
@@ -0,0 +1,285 @@
+import json
+import logging
+from typing import Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Job lifecycle: queued -> running -> completed | failed | cancelled.
+# cancel_job() moves a running job to "cancelling"; the runner finishes the
+# items in flight and marks it cancelled. resume_job() queues it again.
+# Job kinds handled by jobs/runner.py
+ANALYZE_URLS = 'analyze_urls'
+BUSINESS_SEARCH = 'business_search'
+
+ACTIVE_JOB_STATUSES = ('queued', 'running', 'cancelling')
+RESUMABLE_JOB_STATUSES = ('cancelled', 'failed')
+
+JOBS_SCHEMA = [
+    '''
+    CREATE TABLE IF NOT EXISTS jobs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        kind TEXT NOT NULL,
+        params TEXT,
+        status TEXT NOT NULL DEFAULT 'queued',
+        total_items INTEGER NOT NULL DEFAULT 0,
+        error TEXT,
+        runner_id TEXT,
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+        started_at DATETIME,
+        finished_at DATETIME,
+        heartbeat_at DATETIME
+    )
+    ''',
+    'CREATE INDEX IF NOT EXISTS ix_jobs_status ON jobs(status, id)',
+    '''
+    CREATE TABLE IF NOT EXISTS job_items (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        job_id INTEGER NOT NULL REFERENCES jobs(id),
+        position INTEGER NOT NULL,
+        target TEXT NOT NULL,
+        data TEXT,
+        status TEXT NOT NULL DEFAULT 'pending',
+        error TEXT,
+        analysis_id INTEGER REFERENCES analysis_results(id),
+        updated_at DATETIME
+    )
+    ''',
+    'CREATE INDEX IF NOT EXISTS ix_job_items_job_status ON job_items(job_id, status, position)',
+    '''
+    CREATE TABLE IF NOT EXISTS job_runners (
+        id TEXT PRIMARY KEY,
+        hostname TEXT,
+        pid INTEGER,
+        workers INTEGER,
+        started_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+        heartbeat_at DATETIME DEFAULT CURRENT_TIMESTAMP
+    )
+    ''',
+]
+
+_JOB_COLUMNS = 'id, kind, params, status, total_items, error, created_at, started_at, finished_at'
+
+
+def _job(row) -> Dict:
+    return {
+        'id': row[0],
+        'kind': row[1],
+        'params': json.loads(row[2]) if row[2] else {},
+        'status': row[3],
+        'total_items': row[4],
+        'error': row[5],
+        'created_at': row[6],
+        'started_at': row[7],
+        'finished_at': row[8],
+    }
+
+
+def enqueue_job(conn, kind: str, params: Dict, items: Iterable[Tuple[str, Optional[Dict]]] = ()) -> int:
+    """
+    Queue a job with its (target, data) items and return its id. Jobs whose
+    items are only known once they run (business searches) start empty.
+    """
+    job_id = conn.execute(
+        'INSERT INTO jobs (kind, params) VALUES (?, ?) RETURNING id',
+        (kind, json.dumps(params, ensure_ascii=False))
+    ).fetchone()[0]
+    add_job_items(conn, job_id, items)
+    return job_id
+
+
+def add_job_items(conn, job_id: int, items: Iterable[Tuple[str, Optional[Dict]]]) -> int:
+    start = conn.execute('SELECT COUNT(*) FROM job_items WHERE job_id = ?', (job_id,)).fetchone()[0]
+    rows = [
+        (job_id, start + offset, target, json.dumps(data, ensure_ascii=False) if data is not None else None)
+        for offset, (target, data) in enumerate(items)
+    ]
+    conn.executemany('INSERT INTO job_items (job_id, position, target, data) VALUES (?, ?, ?, ?)', rows)
+    conn.execute('UPDATE jobs SET total_items = total_items + ? WHERE id = ?', (len(rows), job_id))
+    return len(rows)
+
+
+def _item_counts(conn, job_ids: List[int]) -> Dict[int, Dict[str, int]]:
+    if not job_ids:
+        return {}
+    counts = {job_id: {} for job_id in job_ids}
+    placeholders = ', '.join('?' * len(job_ids))
+    for job_id, status, count in conn.execute(
+        f'SELECT job_id, status, COUNT(*) FROM job_items WHERE job_id IN ({placeholders}) GROUP BY job_id, status',
+        job_ids
+    ):
+        counts[job_id][status] = count
+    return counts
+
+
+def list_jobs(conn, limit: int = 10) -> List[Dict]:
+    """
+    Most recent jobs with per-status item counts, for progress display.
+    """
+    jobs = [_job(row) for row in conn.execute(f'SELECT {_JOB_COLUMNS} FROM jobs ORDER BY id DESC LIMIT ?', (limit,))]
+    counts = _item_counts(conn, [job['id'] for job in jobs])
+    for job in jobs:
+        job['items'] = counts[job['id']]
+        job['processed'] = sum(count for status, count in job['items'].items() if status not in ('pending', 'running'))
+    return jobs
+
+
+def get_job(conn, job_id: int) -> Optional[Dict]:
+    row = conn.execute(f'SELECT {_JOB_COLUMNS} FROM jobs WHERE id = ?', (job_id,)).fetchone()
+    return _job(row) if row else None
+
+
+def cancel_job(conn, job_id: int) -> bool:
+    """
+    Cancel a queued job at once, or ask the runner to stop a running one.
+    """
+    return conn.execute(
+        '''
+        UPDATE jobs SET
+            status = CASE status WHEN 'queued' THEN 'cancelled' ELSE 'cancelling' END,
+            finished_at = CASE status WHEN 'queued' THEN CURRENT_TIMESTAMP ELSE finished_at END
+        WHERE id = ? AND status IN ('queued', 'running')
+        ''',
+        (job_id,)
+    ).rowcount > 0
+
+
+def resume_job(conn, job_id: int) -> bool:
+    """
+    Queue a cancelled or failed job again; finished items are kept and
+    failed ones are retried.
+    """
+    placeholders = ', '.join('?' * len(RESUMABLE_JOB_STATUSES))
+    resumed = conn.execute(
+        f'''
+        UPDATE jobs SET status = 'queued', error = NULL, finished_at = NULL
+        WHERE id = ? AND status IN ({placeholders})
+        ''',
+        (job_id, *RESUMABLE_JOB_STATUSES)
+    ).rowcount > 0
+    if resumed:
+        conn.execute(
+            "UPDATE job_items SET status = 'pending', error = NULL WHERE job_id = ? AND status IN ('running', 'failed')",
+            (job_id,)
+        )
+    return resumed
+
+
+def claim_job(conn, runner_id: str) -> Optional[Dict]:
+    """
+    Take the oldest queued job. Items left running by an interrupted run go
+    back to pending.
+    """
+    row = conn.execute(
+        f'''
+        UPDATE jobs SET
+            status = 'running',
+            runner_id = ?,
+            started_at = COALESCE(started_at, CURRENT_TIMESTAMP),
+            heartbeat_at = CURRENT_TIMESTAMP
+        WHERE id = (SELECT id FROM jobs WHERE status = 'queued' ORDER BY id LIMIT 1)
+          AND status = 'queued'
+        RETURNING {_JOB_COLUMNS}
+        ''',
+        (runner_id,)
+    ).fetchone()
+    if row is None:
+        return None
+    conn.execute("UPDATE job_items SET status = 'pending' WHERE job_id = ? AND status = 'running'", (row[0],))
+    return _job(row)
+
+
+def release_job(conn, job_id: int) -> None:
+    """
+    Put a job back in the queue (its runner is shutting down).
+    """
+    conn.execute(
+        "UPDATE jobs SET status = 'queued', runner_id = NULL WHERE id = ? AND status = 'running'", (job_id,)
+    )
+    conn.execute("UPDATE job_items SET status = 'pending' WHERE job_id = ? AND status = 'running'", (job_id,))
+
+
+def requeue_stale_jobs(conn, stale_after: float) -> int:
+    """
+    Re-queue running jobs whose runner stopped sending heartbeats (crash,
+    kill), and settle cancellations nobody is left to finish.
+    """
+    cutoff = f'-{int(stale_after)} seconds'
+    conn.execute(
+        '''
+        UPDATE jobs SET status = 'cancelled', finished_at = CURRENT_TIMESTAMP
+        WHERE status = 'cancelling' AND heartbeat_at < datetime('now', ?)
+        ''',
+        (cutoff,)
+    )
+    requeued = conn.execute(
+        "UPDATE jobs SET status = 'queued' WHERE status = 'running' AND heartbeat_at < datetime('now', ?)",
+        (cutoff,)
+    ).rowcount
+    if requeued:
+        logger.warning(f"Re-queued {requeued} jobs from stopped runners")
+    return requeued
+
+
+def job_heartbeat(conn, job_id: int) -> Optional[str]:
+    """
+    Record that the job is alive and return its status (to notice cancels).
+    """
+    row = conn.execute(
+        'UPDATE jobs SET heartbeat_at = CURRENT_TIMESTAMP WHERE id = ? RETURNING status', (job_id,)
+    ).fetchone()
+    return row[0] if row else None
+
+
+def pending_items(conn, job_id: int, limit: int) -> List[Dict]:
+    return [
+        {'id': item_id, 'target': target, 'data': json.loads(data) if data else {}}
+        for item_id, target, data in conn.execute(
+            "SELECT id, target, data FROM job_items WHERE job_id = ? AND status = 'pending' ORDER BY position LIMIT ?",
+            (job_id, limit)
+        )
+    ]
+
+
+def mark_items(conn, item_ids: List[int], status: str) -> None:
+    conn.executemany(
+        'UPDATE job_items SET status = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?',
+        [(status, item_id) for item_id in item_ids]
+    )
+
+
+def finish_item(conn, item_id: int, status: str, error: Optional[str] = None,
+                analysis_id: Optional[int] = None) -> None:
+    conn.execute(
+        'UPDATE job_items SET status = ?, error = ?, analysis_id = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?',
+        (status, error, analysis_id, item_id)
+    )
+
+
+def finish_job(conn, job_id: int, status: str, error: Optional[str] = None) -> None:
+    conn.execute(
+        'UPDATE jobs SET status = ?, error = ?, finished_at = CURRENT_TIMESTAMP WHERE id = ?',
+        (status, error, job_id)
+    )
+
+
+def runner_heartbeat(conn, runner_id: str, hostname: str, pid: int, workers: int) -> None:
+    conn.execute(
+        '''
+        INSERT INTO job_runners (id, hostname, pid, workers) VALUES (?, ?, ?, ?)
+        ON CONFLICT(id) DO UPDATE SET heartbeat_at = CURRENT_TIMESTAMP
+        ''',
+        (runner_id, hostname, pid, workers)
+    )
+
+
+def remove_runner(conn, runner_id: str) -> None:
+    conn.execute('DELETE FROM job_runners WHERE id = ?', (runner_id,))
+
+
+def active_runners(conn, within: float = 60) -> int:
+    """
+    Runners that sent a heartbeat in the last `within` seconds.
+    """
+    return conn.execute(
+        "SELECT COUNT(*) FROM job_runners WHERE heartbeat_at >= datetime('now', ?)", (f'-{int(within)} seconds',)
+    ).fetchone()[0]
@@ -0,0 +1,156 @@
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Dict, Optional
+
+from ai_client_acquisition.analysis.pipeline import AnalysisPipeline
+from ai_client_acquisition.database.analysis_store import analysis_exists, save_analysis
+from ai_client_acquisition.database.connection import db_connection
+from ai_client_acquisition.jobs.queue import (
+    ANALYZE_URL, TASK_LEASE_SECONDS, TASK_POLL_INTERVAL, TASK_WORKER_CONCURRENCY, claim_tasks, complete_task,
+    dead_letter_expired, extend_leases, fail_task
+)
+
+logger = logging.getLogger(__name__)
+
+
+class TaskWorker:
+    """
+    Pulls tasks from the shared queue (jobs/queue.py) and runs them on a
+    pool of threads. Any number of workers, on any number of machines, can
+    share one database: tasks are leased, leases are extended while a task
+    runs, and a result is only saved if the worker still owns its task.
+    """
+
+    def __init__(self, concurrency: int = TASK_WORKER_CONCURRENCY, lease_seconds: float = TASK_LEASE_SECONDS,
+                 poll_interval: float = TASK_POLL_INTERVAL, worker_id: Optional[str] = None,
+                 pipeline_factory: Callable[[], AnalysisPipeline] = AnalysisPipeline):
+        self.concurrency = max(1, concurrency)
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.pipeline_factory = pipeline_factory
+        self.handlers: Dict[str, Callable[[Dict], Optional[Dict]]] = {ANALYZE_URL: self._analyze_url}
+        self.completed = 0
+        self.failed = 0
+        self._local = threading.local()
+        self._stopping = threading.Event()
+
+    def stop(self) -> None:
+        self._stopping.set()
+
+    def _pipeline(self) -> AnalysisPipeline:
+        # Analyzers keep HTTP sessions and state, so each thread gets its own
+        if not hasattr(self._local, 'pipeline'):
+            self._local.pipeline = self.pipeline_factory()
+        return self._local.pipeline
+
+    def run(self, once: bool = False) -> None:
+        """
+        Work until stopped; with once=True, until no task is ready. Tasks in
+        flight are finished before returning.
+        """
+        logger.info(f"Worker {self.worker_id} started with {self.concurrency} threads")
+        in_flight = {}
+        # Renew well before the lease runs out
+        renew_every = self.lease_seconds / 3
+        last_renewal = time.monotonic()
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='task') as executor:
+            while True:
+                if not self._stopping.is_set() and len(in_flight) < self.concurrency:
+                    try:
+                        with db_connection() as conn:
+                            dead_letter_expired(conn)
+                            tasks = claim_tasks(conn, self.worker_id, self.concurrency - len(in_flight),
+                                                self.lease_seconds)
+                    except Exception as e:
+                        # e.g. "database is locked" under many workers; tried again next round
+                        logger.error(f"Error claiming tasks: {e}")
+                        tasks = None
+                    for task in tasks or []:
+                        in_flight[executor.submit(self._execute, task)] = task
+                    if tasks == [] and not in_flight and once:
+                        break
+
+                if not in_flight:
+                    if self._stopping.is_set():
+                        break
+                    self._stopping.wait(self.poll_interval)
+                    continue
+
+                done, _ = wait(in_flight, timeout=min(self.poll_interval, renew_every), return_when=FIRST_COMPLETED)
+                for future in done:
+                    self._settle(in_flight.pop(future), future)
+
+                if in_flight and time.monotonic() - last_renewal >= renew_every:
+                    try:
+                        self._renew(in_flight.values())
+                        last_renewal = time.monotonic()
+                    except Exception as e:
+                        logger.error(f"Error renewing task leases: {e}")
+        logger.info(f"Worker {self.worker_id} stopped: {self.completed} completed, {self.failed} failed")
+
+    def _renew(self, tasks) -> None:
+        task_ids = [task['id'] for task in tasks]
+        with db_connection() as conn:
+            owned = set(extend_leases(conn, self.worker_id, task_ids, self.lease_seconds))
+        for task_id in set(task_ids) - owned:
+            logger.warning(f"Lost the lease on task {task_id}; its result will be discarded")
+
+    def _execute(self, task: Dict) -> Optional[Dict]:
+        handler = self.handlers.get(task['kind'])
+        if handler is None:
+            raise ValueError(f"Unknown task kind: {task['kind']}")
+        return handler(task['payload'])
+
+    def _analyze_url(self, payload: Dict) -> Optional[Dict]:
+        url = payload['url']
+        if not payload.get('force'):
+            with db_connection() as conn:
+                if analysis_exists(conn, url):
+                    return None
+        return self._pipeline().analyze(url)
+
+    def _settle(self, task: Dict, future) -> None:
+        """
+        Save the result and remove the task in one transaction, or record the
+        failure for a retry. Database errors are logged, never raised, so the
+        worker keeps serving its other tasks.
+        """
+        try:
+            result = future.result()
+        except Exception as e:
+            logger.error(f"Task {task['id']} ({task['kind']}) failed on attempt {task['attempts']}: {e}")
+            self._fail(task, str(e))
+            return
+
+        try:
+            with db_connection() as conn:
+                if not complete_task(conn, task['id'], self.worker_id):
+                    logger.warning(f"Task {task['id']} was taken over by another worker; result discarded")
+                    return
+                if result is not None and task['kind'] == ANALYZE_URL:
+                    save_analysis(conn, task['payload']['url'], result,
+                                  business_id=task['payload'].get('business_id'))
+        except Exception as e:
+            # Rolled back, so the task is still ours to retry
+            logger.error(f"Error saving the result of task {task['id']}: {e}")
+            self._fail(task, f"Saving the result failed: {e}")
+            return
+        self.completed += 1
+
+    def _fail(self, task: Dict, error: str) -> None:
+        try:
+            with db_connection() as conn:
+                outcome = fail_task(conn, task['id'], self.worker_id, error)
+        except Exception as e:
+            logger.error(f"Error recording the failure of task {task['id']}: {e}; "
+                         f"it is retried when its lease expires")
+            outcome = None
+        if outcome == 'dead':
+            logger.warning(f"Task {task['id']} moved to the dead-letter table")
+        self.failed += 1
@@ -1,21 +1,25 @@
 import streamlit as st
 import json
-import pandas as pd
-from collections import defaultdict, Counter
+from collections import Counter
 from urllib.parse import urlparse, urljoin
 import numpy as np
-import sqlite3
 import requests # Added requests for direct scraping
 from bs4 import BeautifulSoup # Added BeautifulSoup for parsing HTML
-from ollama_client import OllamaClient
 from hubspot_client import HubSpotClient
 import time
-from ai_client_acquisition.analysis.seo_analyzer import SEOAnalyzer # Import your modules
-from ai_client_acquisition.extraction.contact_extractor import ContactExtractor
-from ai_client_acquisition.discovery.google_places_client import GooglePlacesClient # Import Google Places Client
+from ai_client_acquisition.database.analysis_store import (
+    ANALYSIS_SORTS, get_change_counter, get_summary_stats, list_search_queries, query_analyses
+)
+from ai_client_acquisition.database.connection import db_connection, init_db as migrate_db
+from ai_client_acquisition.jobs.store import (
+    ACTIVE_JOB_STATUSES, ANALYZE_URLS, BUSINESS_SEARCH, RESUMABLE_JOB_STATUSES,
+    active_runners, cancel_job, enqueue_job, list_jobs, resume_job
+)
+from ai_client_acquisition.database.export import EXPORT_FORMATS, EXPORT_MIME_TYPES, export_analyses
 from typing import List, Dict, Optional # Import necessary types
-from datetime import datetime # Import datetime
 import logging # Import logging
+import os
+import tempfile
 
 # from ai_client_acquisition.discovery.crawler import WebsiteCrawler, run_crawler # Keep imports commented for now, as full crawler integration is complex in Streamlit
 
@@ -297,34 +301,8 @@ def init_db():
     This version includes tables for business search results.
     """
     try:
-        conn = sqlite3.connect('client_acquisition.db')
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS businesses (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                search_query TEXT,
-                place_id TEXT UNIQUE,
-                name TEXT,
-                address TEXT,
-                website TEXT
-            )
-        ''')
-        
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS analysis_results (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                business_id INTEGER,
-                url TEXT,
-                analysis_data TEXT,
-                synced_to_hubspot BOOLEAN DEFAULT FALSE,
-                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (business_id) REFERENCES businesses(id)
-            )
-        ''')
-        
-        conn.commit()
-        conn.close()
+        # Creates businesses/analysis_results and applies later schema changes
+        migrate_db()
     except Exception as e:
         st.error(f"Erreur lors de l'initialisation de la base de données : {e}")
 
@@ -346,11 +324,7 @@ st.markdown(
     unsafe_allow_html=True
 )
 
-# Initialize clients and analyzers
-ollama_client = OllamaClient()
-seo_analyzer = SEOAnalyzer()
-contact_extractor = ContactExtractor()
-google_places_client = GooglePlacesClient()
+# Initialize clients (analysis runs in the job runner, see scripts/job_runner.py)
 
 try:
     hubspot_client = HubSpotClient()
@@ -374,162 +348,24 @@ def get_seo_grade(score):
 
 def run_analysis_pipeline(urls: List[str], force_reanalysis: bool):
     """
-    Runs the full analysis pipeline for a list of URLs and stores results.
+    Queues an analysis job for the URLs; the job runner process does the work.
     This is for direct URL input.
     """
+    urls = [url.strip() for url in urls if url.strip()]
     if not urls:
         st.warning("No valid URLs provided for analysis.")
         return
-        
-    # Create progress bar
-    progress_bar = st.progress(0)
-    status_text = st.empty()
-    
-    try:
-        conn = sqlite3.connect('client_acquisition.db')
-        cursor = conn.cursor()
-        
-        total_urls = len(urls)
-        analyzed_count = 0
-        
-        for i, url in enumerate(urls):
-            url = url.strip()
-            if not url:
-                continue
-                
-            # Check if URL already exists and force_reanalysis is False
-            if not force_reanalysis:
-                cursor.execute('SELECT id FROM analysis_results WHERE url = ? AND business_id IS NULL', (url,))
-                if cursor.fetchone():
-                    analyzed_count += 1
-                    progress_bar.progress(analyzed_count / total_urls)
-                    status_text.text(f"⏭️ Skipping {url} (already analyzed)")
-                    continue
-            
-            status_text.text(f"🔍 Analyzing {url}...")
-            
-            try:
-                # Run SEO analysis
-                seo_result = seo_analyzer.analyze_url(url)
-                
-                # Extract contact information
-                contact_result = contact_extractor.extract_contact_info(url)
-                
-                # Run AI analysis
-                ai_result = ollama_client.analyze_website(url, seo_result, contact_result)
-                
-                # Combine results
-                analysis_result = {
-                    'url': url,
-                    'seo_analysis': seo_result,
-                    'contact_info': contact_result,
-                    'ai_analysis': ai_result,
-                    'timestamp': datetime.now().isoformat()
-                }
-                
-                # Store in database
-                cursor.execute('''
-                    INSERT OR REPLACE INTO analysis_results (url, analysis_data, business_id)
-                    VALUES (?, ?, NULL)
-                ''', (url, json.dumps(analysis_result)))
-                
-                analyzed_count += 1
-                progress_bar.progress(analyzed_count / total_urls)
-                status_text.text(f"✅ Completed analysis for {url}")
-                
-            except Exception as e:
-                st.error(f"Error analyzing {url}: {str(e)}")
-                analyzed_count += 1
-                progress_bar.progress(analyzed_count / total_urls)
-                continue
-        
-        conn.commit()
-        conn.close()
-        
-        progress_bar.empty()
-        status_text.empty()
-        st.success(f"🎉 Analysis complete! Successfully analyzed {analyzed_count} URLs.")
-        
-    except Exception as e:
-        st.error(f"Error during analysis pipeline: {str(e)}")
-        conn.close()
+    with db_connection() as conn:
+        job_id = enqueue_job(conn, ANALYZE_URLS, {'force_reanalysis': force_reanalysis}, [(url, None) for url in urls])
+    st.success(f"📥 Queued job #{job_id} for {len(urls)} URLs.")
 
 def run_business_search_analysis(city: str, industry: str, batch_size: int = 5):
     """
-    Runs business search and analysis pipeline.
+    Queues a business search job; the search and analyses run in the job runner.
     """
-    try:
-        # Search for businesses
-        businesses = google_places_client.search_businesses(city, industry, batch_size)
-        
-        if not businesses:
-            st.warning("No businesses found for the given criteria.")
-            return
-        
-        # Create progress bar for business analysis
-        business_analysis_progress = st.progress(0)
-        business_status_text = st.empty()
-        
-        conn = sqlite3.connect('client_acquisition.db')
-        cursor = conn.cursor()
-        
-        total_businesses = len(businesses)
-        analyzed_businesses = 0
-        
-        for i, business in enumerate(businesses):
-            business_status_text.text(f"🔍 Analyzing business: {business['name']}")
-            
-            # Store business in database
-            cursor.execute('''
-                INSERT OR IGNORE INTO businesses (search_query, place_id, name, address, website)
-                VALUES (?, ?, ?, ?, ?)
-            ''', (f"{city} {industry}", business['place_id'], business['name'], 
-                  business.get('address', ''), business.get('website', '')))
-            
-            business_id = cursor.lastrowid
-            
-            # If business has a website, analyze it
-            if business.get('website'):
-                try:
-                    # Run SEO analysis
-                    seo_result = seo_analyzer.analyze_url(business['website'])
-                    
-                    # Extract contact information
-                    contact_result = contact_extractor.extract_contact_info(business['website'])
-                    
-                    # Run AI analysis
-                    ai_result = ollama_client.analyze_website(business['website'], seo_result, contact_result)
-                    
-                    # Combine results
-                    analysis_result = {
-                        'url': business['website'],
-                        'seo_analysis': seo_result,
-                        'contact_info': contact_result,
-                        'ai_analysis': ai_result,
-                        'timestamp': datetime.now().isoformat()
-                    }
-                    
-                    # Store analysis result
-                    cursor.execute('''
-                        INSERT OR REPLACE INTO analysis_results (business_id, url, analysis_data)
-                        VALUES (?, ?, ?)
-                    ''', (business_id, business['website'], json.dumps(analysis_result)))
-                    
-                except Exception as e:
-                    st.error(f"Error analyzing {business['website']}: {str(e)}")
-            
-            analyzed_businesses += 1
-            business_analysis_progress.progress(analyzed_businesses / total_businesses)
-        
-        conn.commit()
-        conn.close()
-        
-        business_analysis_progress.empty()
-        business_status_text.empty()
-        st.success(f"🎉 Business search and analysis complete for {len(businesses)} businesses!")
-        
-    except Exception as e:
-        st.error(f"Error during business search analysis: {str(e)}")
+    with db_connection() as conn:
+        job_id = enqueue_job(conn, BUSINESS_SEARCH, {'city': city, 'industry': industry, 'batch_size': batch_size})
+    st.success(f"📥 Queued business search job #{job_id}.")
 
 def _display_analysis_result(analysis_result: Dict, hubspot_available: bool):
     """
@@ -665,75 +501,132 @@ with col2:
         else:
             st.error("Please enter at least one URL to analyze.")
 
+# Background jobs
+JOB_STATUS_ICONS = {
+    'queued': '⏳', 'running': '🔄', 'cancelling': '⏹️', 'cancelled': '⏹️', 'completed': '✅', 'failed': '❌'
+}
+
+def render_jobs():
+    """
+    Progress of recent background jobs, with cancel and resume.
+    """
+    with db_connection() as conn:
+        jobs = list_jobs(conn, limit=5)
+        runners = active_runners(conn)
+    if not jobs:
+        return
+
+    st.markdown('<h3>🗂️ Background Jobs</h3>', unsafe_allow_html=True)
+    if not runners and any(job['status'] in ACTIVE_JOB_STATUSES for job in jobs):
+        st.warning("No job runner is active. Start one with: python scripts/job_runner.py")
+    if st.button("🔄 Refresh", key="refresh_jobs"):
+        st.rerun()
+
+    for job in jobs:
+        if job['kind'] == BUSINESS_SEARCH:
+            label = f"Business search: {job['params'].get('industry', '')} in {job['params'].get('city', '')}"
+        else:
+            label = f"Analyze {job['total_items']} URLs"
+        col1, col2 = st.columns([5, 1])
+        with col1:
+            st.markdown(f"{JOB_STATUS_ICONS.get(job['status'], '')} **#{job['id']}** {label} ({job['status']})")
+            st.progress(job['processed'] / job['total_items'] if job['total_items'] else 0.0)
+            if job['error']:
+                st.error(job['error'])
+        with col2:
+            if job['status'] in ('queued', 'running'):
+                if st.button("Cancel", key=f"cancel_job_{job['id']}"):
+                    with db_connection() as conn:
+                        cancel_job(conn, job['id'])
+                    st.rerun()
+            elif job['status'] in RESUMABLE_JOB_STATUSES:
+                if st.button("Resume", key=f"resume_job_{job['id']}"):
+                    with db_connection() as conn:
+                        resume_job(conn, job['id'])
+                    st.rerun()
+
+# Poll the job tables without rerunning the whole page (Streamlit >= 1.37)
+if hasattr(st, "fragment"):
+    render_jobs = st.fragment(run_every=3)(render_jobs)
+render_jobs()
+
 # Load and display results
-def load_data():
+RESULTS_PAGE_SIZES = [10, 20, 50, 100]
+SORT_LABELS = {
+    'newest': 'Newest first',
+    'oldest': 'Oldest first',
+    'score_desc': 'Highest score',
+    'score_asc': 'Lowest score',
+    'url': 'URL (A-Z)',
+}
+
+def load_data(filters: Dict, page: int, page_size: int) -> Dict:
     """
-    Loads all analysis results, organized by business or direct URL.
+    Loads one page of analysis results matching the filters.
     """
     try:
-        conn = sqlite3.connect('client_acquisition.db')
-        cursor = conn.cursor()
-        
-        # Fetch businesses and their linked analysis results
-        cursor.execute('''
-            SELECT b.name, b.website, b.search_query, ar.url, ar.analysis_data
-            FROM businesses b
-            JOIN analysis_results ar ON b.id = ar.business_id
-            ORDER BY b.search_query, b.name, ar.url
-        ''')
-        business_results = cursor.fetchall()
-        
-        # Fetch analysis results from direct URL input (where business_id is NULL)
-        cursor.execute('''
-            SELECT id, url, analysis_data, timestamp
-            FROM analysis_results ar
-            WHERE ar.business_id IS NULL
-            ORDER BY ar.url, ar.timestamp DESC
-        ''')
-        direct_url_results = cursor.fetchall()
-        
-        conn.close()
-        
-        # Organize results for display
-        organized_results = defaultdict(lambda: defaultdict(list))
-        
-        # Add business search results
-        for name, website, search_query, url, analysis_data_json in business_results:
-            organized_results[f"Search: {search_query}"][f"Business: {name} ({website})"][url].append(json.loads(analysis_data_json))
-            
-        # Add direct URL results
-        for analysis_id, url, analysis_data_json, timestamp in direct_url_results:
-             analysis_dict = json.loads(analysis_data_json)
-             analysis_dict['id'] = analysis_id
-             analysis_dict['timestamp'] = timestamp
-             organized_results["Direct URLs"][url].append(analysis_dict)
-        
-        return organized_results
-        
+        with db_connection() as conn:
+            return query_analyses(conn, page=page, page_size=page_size, **filters)
     except Exception as e:
         st.error(f"Erreur lors du chargement des données : {e}")
-        return {}
+        return {'rows': [], 'total': 0, 'page': 1, 'pages': 1, 'page_size': page_size}
+
+def _result_filters(group: str, score_range, date_range, email_only: bool, sort: str) -> Dict:
+    """
+    Maps the filter widgets onto query_analyses() arguments.
+    """
+    filters = {'sort': sort, 'has_email': True if email_only else None}
+    if group == "Direct URLs":
+        filters['direct'] = True
+    elif group != "All":
+        filters['search_query'] = group
+    if tuple(score_range) != (0, 100):
+        filters['min_score'], filters['max_score'] = score_range
+    if date_range:
+        filters['since'] = date_range[0]
+        filters['until'] = date_range[-1]
+    return filters
+
+def prepare_export(fmt: str, filters: Dict) -> Dict:
+    """
+    Streams the filtered analyses to a temporary file for download.
+    """
+    previous = st.session_state.get('export_file')
+    if previous and os.path.exists(previous['path']):
+        os.remove(previous['path'])
+    fd, path = tempfile.mkstemp(prefix="analysis_results_", suffix=f".{fmt}")
+    os.close(fd)
+    export_filters = {key: value for key, value in filters.items() if key != 'sort'}
+    with db_connection() as conn:
+        count = export_analyses(conn, fmt, path, export_filters)
+    return {'path': path, 'format': fmt, 'count': count}
 
 # Display Results Section
 st.markdown('<h3>📊 Analysis Results</h3>', unsafe_allow_html=True)
 
-organized_data = load_data()
+@st.cache_data(show_spinner=False)
+def load_summary_stats(change_counter: int) -> Dict:
+    """
+    Header metrics; cached until the analysis tables change.
+    """
+    with db_connection() as conn:
+        return get_summary_stats(conn)
 
-if organized_data:
-    # Summary Statistics
-    total_analyzed_urls = 0
-    for group_name, businesses_or_urls_dict in organized_data.items():
-        if group_name == "Direct URLs":
-            for analysis_list_for_url in businesses_or_urls_dict.values():
-                total_analyzed_urls += len(analysis_list_for_url)
-        else:
-            for business_pages_dict in businesses_or_urls_dict.values():
-                for analysis_list_for_page in business_pages_dict.values():
-                    total_analyzed_urls += len(analysis_list_for_page)
+@st.cache_data(show_spinner=False)
+def load_search_groups(change_counter: int) -> List[str]:
+    """
+    Search groups for the filter; cached like the summary.
+    """
+    with db_connection() as conn:
+        return list_search_queries(conn)
 
-    total_businesses = sum(len(businesses) for key, businesses in organized_data.items() if key.startswith("Search:"))
-    total_direct_urls = len(organized_data.get("Direct URLs", {}))
-    
+# One indexed lookup per rerun; the aggregates only run again after a write
+with db_connection() as conn:
+    change_counter = get_change_counter(conn)
+summary = load_summary_stats(change_counter)
+search_groups = load_search_groups(change_counter)
+
+if summary['analyses']:
     # Display metrics in cards
     col1, col2, col3, col4 = st.columns(4)
     
@@ -742,7 +635,7 @@ if organized_data:
             f"""
             <div class="metric-card">
                 <div style="text-align: center;">
-                    <div style="font-size: 2rem; font-weight: 700; color: #667eea;">{total_analyzed_urls}</div>
+                    <div style="font-size: 2rem; font-weight: 700; color: #667eea;">{summary['analyses']}</div>
                     <div style="color: #64748b; font-size: 0.875rem;">Total URLs Analyzed</div>
                 </div>
             </div>
@@ -755,7 +648,7 @@ if organized_data:
             f"""
             <div class="metric-card">
                 <div style="text-align: center;">
-                    <div style="font-size: 2rem; font-weight: 700; color: #10b981;">{total_businesses}</div>
+                    <div style="font-size: 2rem; font-weight: 700; color: #10b981;">{summary['businesses']}</div>
                     <div style="color: #64748b; font-size: 0.875rem;">Businesses Found</div>
                 </div>
             </div>
@@ -768,7 +661,7 @@ if organized_data:
             f"""
             <div class="metric-card">
                 <div style="text-align: center;">
-                    <div style="font-size: 2rem; font-weight: 700; color: #f59e0b;">{total_direct_urls}</div>
+                    <div style="font-size: 2rem; font-weight: 700; color: #f59e0b;">{summary['direct_urls']}</div>
                     <div style="color: #64748b; font-size: 0.875rem;">Direct URLs</div>
                 </div>
             </div>
@@ -777,28 +670,7 @@ if organized_data:
         )
     
     with col4:
-        # Calculate average score
-        total_score = 0
-        score_count = 0
-        for group_name, businesses_or_urls in organized_data.items():
-            for business_or_url, pages in businesses_or_urls.items():
-                if group_name.startswith("Search:"):
-                    for page_url, analyses in pages.items():
-                        for analysis_result in analyses:
-                            seo = analysis_result.get('seo_analysis', {})
-                            score = seo.get('overall_score', 0)
-                            if score > 0:
-                                total_score += score
-                                score_count += 1
-                else:
-                    for analysis_result in pages:
-                        seo = analysis_result.get('seo_analysis', {})
-                        score = seo.get('overall_score', 0)
-                        if score > 0:
-                            total_score += score
-                            score_count += 1
-        
-        avg_score = round(total_score / score_count, 1) if score_count > 0 else 0
+        avg_score = summary['avg_score']
         grade, _ = get_seo_grade(avg_score)
         
         st.markdown(
@@ -813,74 +685,70 @@ if organized_data:
             unsafe_allow_html=True
         )
 
-    # Detailed Results
-    for group_name, businesses_or_urls in organized_data.items():
-        st.markdown(f'<h4 style="margin-top: 2rem; color: #1e293b;">{group_name}</h4>', unsafe_allow_html=True)
-        
-        for business_or_url, pages in businesses_or_urls.items():
-            if group_name.startswith("Search:"):
-                with st.expander(business_or_url):
-                     for page_url, analyses in pages.items():
-                          st.write(f"**Page:** {page_url}")
-                          for analysis_result in analyses:
-                               _display_analysis_result(analysis_result, hubspot_available)
+    # Filters (applied in SQL; only the current page is loaded)
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        group = st.selectbox(
+            "Group",
+            options=["All", "Direct URLs", *search_groups],
+            format_func=lambda g: g if g in ("All", "Direct URLs") else f"Search: {g}",
+            key="results_group"
+        )
+        email_only = st.checkbox("With email only", key="results_has_email")
+    with col2:
+        score_range = st.slider("SEO score", 0, 100, (0, 100), key="results_score")
+        date_range = st.date_input("Analysis date", value=(), key="results_dates")
+    with col3:
+        sort = st.selectbox("Sort by", options=list(ANALYSIS_SORTS), format_func=SORT_LABELS.get, key="results_sort")
+        page_size = st.selectbox("Results per page", options=RESULTS_PAGE_SIZES, index=1, key="results_page_size")
+
+    filters = _result_filters(group, score_range, date_range, email_only, sort)
+
+    # Back to the first page whenever the filters change
+    filter_signature = repr((filters, page_size))
+    if st.session_state.get('results_filter_signature') != filter_signature:
+        st.session_state['results_filter_signature'] = filter_signature
+        st.session_state['results_page'] = 1
+
+    results = load_data(filters, st.session_state.get('results_page', 1), page_size)
+    st.session_state['results_page'] = results['page']
+
+    if not results['rows']:
+        st.info("No analyses match these filters.")
+    else:
+        first = (results['page'] - 1) * page_size + 1
+        col1, col2 = st.columns([3, 1])
+        with col1:
+            st.caption(f"Showing {first}–{first + len(results['rows']) - 1} of {results['total']} analyses")
+        with col2:
+            st.number_input("Page", min_value=1, max_value=results['pages'], step=1, key="results_page")
+
+        # Detailed Results
+        for row in results['rows']:
+            if row['business_id']:
+                label = f"Business: {row['business_name']} ({row['website']}) · Search: {row['search_query']}"
             else:
-                url = business_or_url
-                analyses = pages
-                with st.expander(f"{url} ({len(analyses)} analyses)"):
-                    for idx, analysis_result in enumerate(analyses):
-                        st.markdown(f"**Analysis {idx + 1} (Date: {analysis_result.get('timestamp', 'N/A')})**")
-                        _display_analysis_result(analysis_result, hubspot_available)
-
-    # Download option
-    if organized_data:
-        csv_rows = []
-        for group_name, businesses_or_urls in organized_data.items():
-            for business_or_url, pages in businesses_or_urls.items():
-                if group_name.startswith("Search:"):
-                    for page_url, analyses in pages.items():
-                        for analysis_result in analyses:
-                            contact_info = analysis_result.get('contact_info', {})
-                            seo = analysis_result.get('seo_analysis', {})
-                            ai_analysis = analysis_result.get('ai_analysis', {})
-                            
-                            csv_rows.append({
-                                "Group": group_name,
-                                "Business": business_or_url,
-                                "URL": page_url,
-                                "SEO Score": seo.get("overall_score", "N/A"),
-                                "Critical Issues": ", ".join(seo.get("critical_issues", [])),
-                                "Emails": ", ".join(contact_info.get('emails', [])),
-                                "Phones": ", ".join(contact_info.get('phones', [])),
-                                "AI Analysis": ai_analysis.get('response', '') if isinstance(ai_analysis, dict) else '',
-                            })
-                else:
-                    url = business_or_url
-                    analyses = pages
-                    
-                    for analysis_result in analyses:
-                        contact_info = analysis_result.get('contact_info', {})
-                        seo = analysis_result.get('seo_analysis', {})
-                        ai_analysis = analysis_result.get('ai_analysis', {})
-                        
-                        csv_rows.append({
-                            "Group": group_name,
-                            "Business": "N/A",
-                            "URL": url,
-                            "SEO Score": seo.get("overall_score", "N/A"),
-                            "Critical Issues": ", ".join(seo.get("critical_issues", [])),
-                            "Emails": ", ".join(contact_info.get('emails', [])),
-                            "Phones": ", ".join(contact_info.get('phones', [])),
-                            "AI Analysis": ai_analysis.get('response', '') if isinstance(ai_analysis, dict) else '',
-                        })
-
-        if csv_rows:
-            df = pd.DataFrame(csv_rows)
+                label = row['url']
+            with st.expander(f"{label} · {row['overall_score']}/100"):
+                st.markdown(f"**Page:** {row['url']} (Date: {row['timestamp']})")
+                _display_analysis_result(row['payload'], hubspot_available)
+
+    # Export: streamed from SQL to a temporary file, only when requested
+    col1, col2 = st.columns([1, 2])
+    with col1:
+        export_format = st.selectbox("Export format", options=EXPORT_FORMATS, format_func=str.upper, key="export_format")
+    with col2:
+        if st.button("Prepare export", use_container_width=True, key="prepare_export_btn"):
+            st.session_state['export_file'] = prepare_export(export_format, filters)
+
+    export_file = st.session_state.get('export_file')
+    if export_file and os.path.exists(export_file['path']):
+        with open(export_file['path'], 'rb') as f:
             st.download_button(
-                label="🧾 Export Results (CSV)",
-                data=df.to_csv(index=False),
-                file_name="analysis_results.csv",
-                mime="text/csv",
+                label=f"🧾 Download {export_file['count']} rows ({export_file['format'].upper()})",
+                data=f,
+                file_name=f"analysis_results.{export_file['format']}",
+                mime=EXPORT_MIME_TYPES[export_file['format']],
                 use_container_width=True
             )
 
@@ -940,13 +808,8 @@ if st.session_state.get('business_search_triggered', False):
         st.session_state.get('business_search_industry', ''),
         st.session_state.get('business_search_batch_size', 5)
     )
-    st.session_state['business_search_complete'] = True
     st.session_state['last_search_city'] = st.session_state.get('business_search_city', '')
     st.session_state['last_search_industry'] = st.session_state.get('business_search_industry', '')
 
-if st.session_state.get('business_search_complete', False):
-    st.success("🎉 Business search and analysis complete! See results above.")
-    st.session_state['business_search_complete'] = False
-
 if st.session_state.get('last_search_city') and st.session_state.get('last_search_industry'):
     st.info(f"📊 Showing results for {st.session_state['last_search_industry']} in {st.session_state['last_search_city']}")
\ No newline at end of file
@@ -1,23 +1,27 @@
 import streamlit as st
 import json
-import pandas as pd
 from collections import defaultdict, Counter
 from urllib.parse import urlparse, urljoin
 import numpy as np
-import sqlite3
 import requests
 from bs4 import BeautifulSoup
-from ollama_client import OllamaClient
 from hubspot_client import HubSpotClient
+from localization import t
 import time
-from ai_client_acquisition.analysis.seo_analyzer import SEOAnalyzer
-from ai_client_acquisition.extraction.contact_extractor import ContactExtractor
-from ai_client_acquisition.discovery.google_places_client import GooglePlacesClient
+from ai_client_acquisition.database.analysis_store import (
+    ANALYSIS_SORTS, get_change_counter, get_summary_stats, list_search_queries, query_analyses
+)
+from ai_client_acquisition.database.connection import db_connection, init_db as migrate_db
+from ai_client_acquisition.jobs.store import (
+    ACTIVE_JOB_STATUSES, ANALYZE_URLS, BUSINESS_SEARCH, RESUMABLE_JOB_STATUSES,
+    active_runners, cancel_job, enqueue_job, list_jobs, resume_job
+)
+from ai_client_acquisition.database.export import EXPORT_FORMATS, EXPORT_MIME_TYPES, export_analyses
 from hubspot.crm.contacts import SimplePublicObjectInputForCreate as ContactCreate
 from typing import List, Dict, Optional
-from datetime import datetime
 import logging
 import os
+import tempfile
 
 def format_analysis_note(analysis_result):
     lines = []
@@ -67,19 +71,6 @@ def format_analysis_note(analysis_result):
 
 
 
-# --- Localization Setup ---
-def load_translations():
-    with open('translations.json', 'r', encoding='utf-8') as f:
-        return json.load(f)
-
-translations = load_translations()
-
-def t(key, lang="en", **kwargs):
-    text = translations.get(lang, {}).get(key, key)
-    if kwargs:
-        return text.format(**kwargs)
-    return text
-
 # Set default language before any Streamlit command
 if "lang" not in st.session_state:
     st.session_state["lang"] = "en"
@@ -400,34 +391,8 @@ def _extract_navigation_links(html: str, base_url: str) -> List[str]:
 def init_db():
     """Initialize the SQLite database and create the table if it doesn't exist."""
     try:
-        conn = sqlite3.connect('client_acquisition.db')
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS businesses (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                search_query TEXT,
-                place_id TEXT UNIQUE,
-                name TEXT,
-                address TEXT,
-                website TEXT
-            )
-        ''')
-        
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS analysis_results (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                business_id INTEGER,
-                url TEXT,
-                analysis_data TEXT,
-                synced_to_hubspot BOOLEAN DEFAULT FALSE,
-                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (business_id) REFERENCES businesses(id)
-            )
-        ''')
-        
-        conn.commit()
-        conn.close()
+        # Creates businesses/analysis_results and applies later schema changes
+        migrate_db()
     except Exception as e:
         st.error(f"Database initialization error: {e}")
 
@@ -449,12 +414,7 @@ st.markdown(
     unsafe_allow_html=True
 )
 
-# Initialize clients and analyzers
-ollama_client = OllamaClient()
-seo_analyzer = SEOAnalyzer()
-contact_extractor = ContactExtractor()
-google_places_client = GooglePlacesClient()
-
+# Initialize clients (analysis runs in the job runner, see scripts/job_runner.py)
 try:
     hubspot_client = HubSpotClient()
     hubspot_available = True
@@ -476,182 +436,18 @@ def get_seo_grade(score):
         return "D", "score-poor"
 
 def run_analysis_pipeline(urls: List[str], force_reanalysis: bool):
-    """Runs the full analysis pipeline for a list of URLs and stores results."""
+    """Queues an analysis job for the URLs; the job runner process does the work."""
+    urls = [url.strip() for url in urls if url.strip()]
     if not urls:
         st.warning(t("no_valid_urls_provided", lang))
         return
-        
-    # Create progress bar
-    progress_bar = st.progress(0)
-    status_text = st.empty()
-    
-    try:
-        conn = sqlite3.connect('client_acquisition.db')
-        cursor = conn.cursor()
-        
-        total_urls = len(urls)
-        analyzed_count = 0
-        
-        for i, url in enumerate(urls):
-            url = url.strip()
-            if not url:
-                continue
-                
-            # Check if URL already exists and force_reanalysis is False
-            if not force_reanalysis:
-                cursor.execute('SELECT id FROM analysis_results WHERE url = ? AND business_id IS NULL', (url,))
-                if cursor.fetchone():
-                    analyzed_count += 1
-                    progress_bar.progress(analyzed_count / total_urls)
-                    status_text.text(t("skipped_already_analyzed", lang, url=url))
-                    continue
-            
-            status_text.text(t("analyzing_url", lang, url=url))
-            
-            try:
-                # Run SEO analysis
-                seo_result = seo_analyzer.analyze_url(url)
-                
-                # Extract contact information
-                contact_result = contact_extractor.extract_from_url(url)
-                
-                # Run AI analysis
-                ai_result = ollama_client.generate_seo_analysis(url, seo_result)
-                
-                # Combine results
-                analysis_result = {
-                    'url': url,
-                    'seo_analysis': seo_result,
-                    'contact_info': contact_result,
-                    'ai_analysis': ai_result,
-                    'timestamp': datetime.now().isoformat()
-                }
-                
-                # Store in database
-                cursor.execute('''
-                    INSERT OR REPLACE INTO analysis_results (url, analysis_data, business_id)
-                    VALUES (?, ?, NULL)
-                ''', (url, json.dumps(analysis_result)))
-                
-                analyzed_count += 1
-                progress_bar.progress(analyzed_count / total_urls)
-                status_text.text(t("completed_analysis", lang, url=url))
-                
-            except Exception as e:
-                st.error(t("error_analyzing_url", lang, url=url, error=str(e)))
-                analyzed_count += 1
-                progress_bar.progress(analyzed_count / total_urls)
-                continue
-        
-        conn.commit()
-        conn.close()
-        
-        progress_bar.empty()
-        status_text.empty()
-        st.success(t("analysis_complete", lang, count=analyzed_count))
-        
-    except Exception as e:
-        st.error(t("error_during_analysis_pipeline", lang, error=str(e)))
-        conn.close()
+    with db_connection() as conn:
+        enqueue_job(conn, ANALYZE_URLS, {'force_reanalysis': force_reanalysis}, [(url, None) for url in urls])
 
 def run_business_search_analysis(city: str, industry: str, batch_size: int = 5, page: int = 1):
-    """Runs business search and analysis pipeline."""
-    try:
-        # 1. Search for businesses (Nearby Search)
-        businesses = google_places_client.search_places(industry, city, page=page)
-        if batch_size is not None:
-            businesses = businesses[:batch_size]
-
-        if not businesses:
-            st.warning(t("no_businesses_found", lang, city=city, industry=industry))
-            return
-
-        # 2. Set up Streamlit progress indicators
-        progress_bar = st.progress(0)
-        status_text  = st.empty()
-
-        # 3. Open DB connection
-        conn   = sqlite3.connect('client_acquisition.db')
-        cursor = conn.cursor()
-
-        # 3.1 Fetch all already-analyzed URLs
-        cursor.execute('SELECT url FROM analysis_results')
-        already_analyzed_urls = set(row[0] for row in cursor.fetchall())
-
-        total = len(businesses)
-        for i, biz in enumerate(businesses, start=1):
-            name     = biz.get('name', 'N/A')
-            place_id = biz.get('place_id')
-            status_text.text(t("processing_business", lang, name=name))
-
-            # 4. Fetch place-details (website, address, international_phone_number…)
-            details = google_places_client.get_place_details(place_id) or {}
-            website = details.get('website', '')
-            address = details.get('formatted_address', '')
-
-            # 5. Upsert into businesses table
-            cursor.execute('''
-                INSERT INTO businesses (search_query, place_id, name, address, website)
-                VALUES (?, ?, ?, ?, ?)
-                ON CONFLICT(place_id) DO UPDATE SET
-                  address = excluded.address,
-                  website = excluded.website
-            ''', (
-                f"{city} {industry}",
-                place_id,
-                name,
-                address,
-                website
-            ))
-            conn.commit()
-
-            # 6. Grab the newly-inserted business ID
-            cursor.execute('SELECT id FROM businesses WHERE place_id = ?', (place_id,))
-            business_id = cursor.fetchone()[0]
-
-            # 7. If we have a website, check if already analyzed
-            if website:
-                if website in already_analyzed_urls:
-                    status_text.text(t("skipped_already_analyzed", lang, url=website))
-                    progress_bar.progress(i / total)
-                    continue
-                try:
-                    seo_result     = seo_analyzer.analyze_url(website)
-                    contact_result = contact_extractor.extract_from_url(website)
-                    ai_result      = ollama_client.generate_seo_analysis(website, seo_result)
-
-                    analysis_payload = {
-                        'url':          website,
-                        'seo_analysis': seo_result,
-                        'contact_info': contact_result,
-                        'ai_analysis':  ai_result,
-                        'timestamp':    datetime.now().isoformat()
-                    }
-
-                    cursor.execute('''
-                        INSERT OR REPLACE INTO analysis_results
-                          (business_id, url, analysis_data)
-                        VALUES (?, ?, ?)
-                    ''', (
-                        business_id,
-                        website,
-                        json.dumps(analysis_payload, ensure_ascii=False)
-                    ))
-                    conn.commit()
-                    already_analyzed_urls.add(website)
-                except Exception as e:
-                    st.error(t("error_analyzing_website", lang, url=website, error=str(e)))
-
-            # 8. Update progress bar
-            progress_bar.progress(i / total)
-
-        # 9. Clean up UI and DB
-        progress_bar.empty()
-        status_text.empty()
-        conn.close()
-
-    except Exception as e:
-        st.error(t("error_during_business_search_analysis", lang, error=str(e)))
+    """Queues a business search job; the Places search and analyses run in the job runner."""
+    with db_connection() as conn:
+        enqueue_job(conn, BUSINESS_SEARCH, {'city': city, 'industry': industry, 'batch_size': batch_size, 'page': page})
 
 def _display_analysis_result(analysis_result: Dict, hubspot_available: bool, unique_id: str = ""):
     """Display a single analysis result with modern card design."""
@@ -886,82 +682,135 @@ with col2:
         else:
             st.error(t("error_enter_url", lang))
 
+# Background jobs
+JOBS_SHOWN = 5
+JOBS_REFRESH_SECONDS = 3
+
+def _job_label(job: Dict) -> str:
+    if job['kind'] == BUSINESS_SEARCH:
+        return t("job_business_search", lang, industry=job['params'].get('industry', ''), city=job['params'].get('city', ''))
+    return t("job_analyze_urls", lang, count=job['total_items'])
+
+def render_jobs():
+    """Progress of recent background jobs, with cancel and resume."""
+    with db_connection() as conn:
+        jobs = list_jobs(conn, limit=JOBS_SHOWN)
+        runners = active_runners(conn)
+    active_ids = {job['id'] for job in jobs if job['status'] in ACTIVE_JOB_STATUSES}
+
+    # A job just finished: rerun the whole page so the results include it
+    if st.session_state.get('active_job_ids', set()) - active_ids:
+        st.session_state['active_job_ids'] = active_ids
+        st.rerun()
+    st.session_state['active_job_ids'] = active_ids
+
+    if not jobs:
+        return
+    st.markdown(f'<h3><span class="material-icons">pending_actions</span> {t("background_jobs", lang)}</h3>', unsafe_allow_html=True)
+    if active_ids and not runners:
+        st.warning(t("no_job_runner", lang))
+
+    for job in jobs:
+        col1, col2 = st.columns([5, 1])
+        with col1:
+            st.markdown(f"**#{job['id']}** {_job_label(job)} · {t('job_status_' + job['status'], lang)}")
+            total = job['total_items']
+            st.progress(job['processed'] / total if total else 0.0)
+            st.caption(t(
+                "job_progress", lang,
+                processed=job['processed'],
+                total=total,
+                done=job['items'].get('done', 0),
+                skipped=job['items'].get('skipped', 0),
+                failed=job['items'].get('failed', 0)
+            ))
+            if job['error']:
+                st.error(job['error'])
+        with col2:
+            if job['status'] in ('queued', 'running'):
+                if st.button(t("cancel_job", lang), key=f"cancel_job_{job['id']}"):
+                    with db_connection() as conn:
+                        cancel_job(conn, job['id'])
+                    st.rerun()
+            elif job['status'] in RESUMABLE_JOB_STATUSES:
+                if st.button(t("resume_job", lang), key=f"resume_job_{job['id']}"):
+                    with db_connection() as conn:
+                        resume_job(conn, job['id'])
+                    st.rerun()
+
+# Poll progress without rerunning the rest of the page (Streamlit >= 1.37)
+if hasattr(st, "fragment"):
+    render_jobs = st.fragment(run_every=JOBS_REFRESH_SECONDS)(render_jobs)
+
+render_jobs()
+
 # Load and display results
-def load_data():
-    """Loads all analysis results, organized by business or direct URL."""
-    try:
-        conn = sqlite3.connect('client_acquisition.db')
-        cursor = conn.cursor()
-
-        # 1) Fetch all business‐linked analyses
-        cursor.execute('''
-            SELECT b.name, b.website, b.search_query, ar.url, ar.analysis_data
-            FROM businesses b
-            JOIN analysis_results ar ON b.id = ar.business_id
-            ORDER BY b.search_query, b.name, ar.url
-        ''')
-        business_rows = cursor.fetchall()
-
-        # 2) Fetch all direct‐URL analyses
-        cursor.execute('''
-            SELECT id, url, analysis_data, timestamp
-            FROM analysis_results ar
-            WHERE ar.business_id IS NULL
-            ORDER BY url, timestamp DESC
-        ''')
-        direct_rows = cursor.fetchall()
-
-        conn.close()
-
-        organized = {}
-
-        # 3) Build the "Search: ..." groups
-        for name, website, search_query, page_url, analysis_json in business_rows:
-            group_key     = f"Search: {search_query}"
-            business_key  = f"Business: {name} ({website})"
-            analysis_dict = json.loads(analysis_json)
-
-            # Ensure all three nesting levels exist
-            organized.setdefault(group_key, {})
-            organized[group_key].setdefault(business_key, {})
-            organized[group_key][business_key].setdefault(page_url, [])
-            organized[group_key][business_key][page_url].append(analysis_dict)
-
-        # 4) Build the "Direct URLs" group
-        direct_key = "Direct URLs"
-        organized[direct_key] = {}
-        for analysis_id, page_url, analysis_json, ts in direct_rows:
-            record = json.loads(analysis_json)
-            record['id']        = analysis_id
-            record['timestamp'] = ts
-            organized[direct_key].setdefault(page_url, []).append(record)
-
-        return organized
+RESULTS_PAGE_SIZES = [10, 20, 50, 100]
 
+def load_data(filters: Dict, page: int, page_size: int) -> Dict:
+    """Loads one page of analysis results matching the filters."""
+    try:
+        with db_connection() as conn:
+            return query_analyses(conn, page=page, page_size=page_size, **filters)
     except Exception as e:
         st.error(f"Error loading data: {e}")
-        return {}
+        return {'rows': [], 'total': 0, 'page': 1, 'pages': 1, 'page_size': page_size}
+
+def _result_filters(group: str, score_range, date_range, email_only: bool, sort: str) -> Dict:
+    """Maps the filter widgets onto query_analyses() arguments."""
+    filters = {'sort': sort, 'has_email': True if email_only else None}
+    if group == "Direct URLs":
+        filters['direct'] = True
+    elif group != "All":
+        filters['search_query'] = group
+    if tuple(score_range) != (0, 100):
+        filters['min_score'], filters['max_score'] = score_range
+    if date_range:
+        filters['since'] = date_range[0]
+        filters['until'] = date_range[-1]
+    return filters
+
+def _group_label(group: str) -> str:
+    if group == "All":
+        return t("all_results", lang)
+    if group == "Direct URLs":
+        return t("direct_urls", lang)
+    return t("search_group", lang, query=group)
+
+def prepare_export(fmt: str, filters: Dict) -> Dict:
+    """Streams the filtered analyses to a temporary file for download."""
+    previous = st.session_state.get('export_file')
+    if previous and os.path.exists(previous['path']):
+        os.remove(previous['path'])
+    fd, path = tempfile.mkstemp(prefix="analysis_results_", suffix=f".{fmt}")
+    os.close(fd)
+    export_filters = {key: value for key, value in filters.items() if key != 'sort'}
+    with db_connection() as conn:
+        count = export_analyses(conn, fmt, path, export_filters)
+    return {'path': path, 'format': fmt, 'count': count}
 
 # Display Results Section
 st.markdown(f'<h3><span class="material-icons">bar_chart</span> {t("analysis_results", lang)}</h3>', unsafe_allow_html=True)
 
-organized_data = load_data()
-
-if organized_data:
-    # Summary Statistics
-    total_analyzed_urls = 0
-    for group_name, businesses_or_urls in organized_data.items():
-        if group_name == "Direct URLs":
-            for analysis_list_for_url in businesses_or_urls.values():
-                total_analyzed_urls += len(analysis_list_for_url)
-        else:
-            for business_pages_dict in businesses_or_urls.values():
-                for analysis_list_for_page in business_pages_dict.values():
-                    total_analyzed_urls += len(analysis_list_for_page)
-
-    total_businesses = sum(len(businesses) for key, businesses in organized_data.items() if key.startswith("Search:"))
-    total_direct_urls = len(organized_data.get("Direct URLs", {}))
-    
+@st.cache_data(show_spinner=False)
+def load_summary_stats(change_counter: int) -> Dict:
+    """Header metrics; cached until the analysis tables change."""
+    with db_connection() as conn:
+        return get_summary_stats(conn)
+
+@st.cache_data(show_spinner=False)
+def load_search_groups(change_counter: int) -> List[str]:
+    """Search groups for the filter; cached like the summary."""
+    with db_connection() as conn:
+        return list_search_queries(conn)
+
+# One indexed lookup per rerun; the aggregates only run again after a write
+with db_connection() as conn:
+    change_counter = get_change_counter(conn)
+summary = load_summary_stats(change_counter)
+search_groups = load_search_groups(change_counter)
+
+if summary['analyses']:
     # Display metrics in cards
     col1, col2, col3, col4 = st.columns(4)
     
@@ -970,7 +819,7 @@ if organized_data:
             f"""
             <div class="metric-card">
                 <div style="text-align: center;">
-                    <div style="font-size: 2rem; font-weight: 700; color: #667eea;">{total_analyzed_urls}</div>
+                    <div style="font-size: 2rem; font-weight: 700; color: #667eea;">{summary['analyses']}</div>
                     <div style="color: #64748b; font-size: 0.875rem;">{t('total_urls_analyzed', lang)}</div>
                 </div>
             </div>
@@ -983,7 +832,7 @@ if organized_data:
             f"""
             <div class="metric-card">
                 <div style="text-align: center;">
-                    <div style="font-size: 2rem; font-weight: 700; color: #10b981;">{total_businesses}</div>
+                    <div style="font-size: 2rem; font-weight: 700; color: #10b981;">{summary['businesses']}</div>
                     <div style="color: #64748b; font-size: 0.875rem;">{t('businesses_found', lang)}</div>
                 </div>
             </div>
@@ -996,7 +845,7 @@ if organized_data:
             f"""
             <div class="metric-card">
                 <div style="text-align: center;">
-                    <div style="font-size: 2rem; font-weight: 700; color: #f59e0b;">{total_direct_urls}</div>
+                    <div style="font-size: 2rem; font-weight: 700; color: #f59e0b;">{summary['direct_urls']}</div>
                     <div style="color: #64748b; font-size: 0.875rem;">{t('direct_urls', lang)}</div>
                 </div>
             </div>
@@ -1005,28 +854,7 @@ if organized_data:
         )
     
     with col4:
-        # Calculate average score
-        total_score = 0
-        score_count = 0
-        for group_name, businesses_or_urls in organized_data.items():
-            for business_or_url, pages in businesses_or_urls.items():
-                if group_name.startswith("Search:"):
-                    for page_url, analyses in pages.items():
-                        for analysis_result in analyses:
-                            seo = analysis_result.get('seo_analysis', {})
-                            score = seo.get('overall_score', 0)
-                            if score > 0:
-                                total_score += score
-                                score_count += 1
-                else:
-                    for analysis_result in pages:
-                        seo = analysis_result.get('seo_analysis', {})
-                        score = seo.get('overall_score', 0)
-                        if score > 0:
-                            total_score += score
-                            score_count += 1
-        
-        avg_score = round(total_score / score_count, 1) if score_count > 0 else 0
+        avg_score = summary['avg_score']
         grade, _ = get_seo_grade(avg_score)
         
         st.markdown(
@@ -1041,94 +869,75 @@ if organized_data:
             unsafe_allow_html=True
         )
 
-    # Add a clear section header for Business Finder results
-    business_finder_groups = [g for g in organized_data if g.startswith("Search:")]
-    if business_finder_groups:
-        st.markdown(
-            f'<h3 style="margin-top: 3rem; color: #7c3aed;">{t("business_finder_results", lang)}</h3>'
-            f'<p style="color: #64748b; margin-bottom: 2rem;">{t("business_finder_results_desc", lang)}</p>',
-            unsafe_allow_html=True
+    # Filters (applied in SQL; only the current page is loaded)
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        group = st.selectbox(
+            t("filter_group", lang),
+            options=["All", "Direct URLs", *search_groups],
+            format_func=_group_label,
+            key="results_group"
         )
-    for group_name, businesses_or_urls in organized_data.items():
-        # Move the Direct URLs Results header and description here
-        if group_name == "Direct URLs":
-            st.markdown(
-                f'<h3 style="margin-top: 3rem; color: #2563eb;">{t("direct_urls_results", lang)}</h3>'
-                f'<p style="color: #64748b; margin-bottom: 2rem;">{t("direct_urls_results_desc", lang)}</p>',
-                unsafe_allow_html=True
-            )
-        else:
-            st.markdown(f'<h4 style="margin-top: 2rem; color: #27d1d8;">{group_name}</h4>', unsafe_allow_html=True)
-        
-        for business_or_url, pages in businesses_or_urls.items():
-            if group_name.startswith("Search:"):
-                # Business Finder section: show number of analyses per website
-                for page_url, analyses in pages.items():
-                    expander_label = f"{page_url} ({len(analyses)} {t('analyses', lang)})"
-                    with st.expander(expander_label):
-                        for idx, analysis_result in enumerate(analyses):
-                            timestamp = analysis_result.get('timestamp', 'N/A')
-                            st.markdown(f"**{t('analysis', lang)} {idx + 1} ({t('date', lang)}: {timestamp})**")
-                            unique_id = str(analysis_result.get('id', idx))
-                            _display_analysis_result(analysis_result, hubspot_available, unique_id=unique_id)
+        email_only = st.checkbox(t("filter_has_email", lang), key="results_has_email")
+    with col2:
+        score_range = st.slider(t("filter_score", lang), 0, 100, (0, 100), key="results_score")
+        date_range = st.date_input(t("filter_dates", lang), value=(), key="results_dates")
+    with col3:
+        sort = st.selectbox(
+            t("sort_by", lang),
+            options=list(ANALYSIS_SORTS),
+            format_func=lambda s: t(f"sort_{s}", lang),
+            key="results_sort"
+        )
+        page_size = st.selectbox(t("results_per_page", lang), options=RESULTS_PAGE_SIZES, index=1, key="results_page_size")
+
+    filters = _result_filters(group, score_range, date_range, email_only, sort)
+
+    # Back to the first page whenever the filters change
+    filter_signature = repr((filters, page_size))
+    if st.session_state.get('results_filter_signature') != filter_signature:
+        st.session_state['results_filter_signature'] = filter_signature
+        st.session_state['results_page'] = 1
+
+    results = load_data(filters, st.session_state.get('results_page', 1), page_size)
+    st.session_state['results_page'] = results['page']
+
+    if not results['rows']:
+        st.info(t("no_matching_results", lang))
+    else:
+        first = (results['page'] - 1) * page_size + 1
+        col1, col2 = st.columns([3, 1])
+        with col1:
+            st.caption(t("showing_results_range", lang, start=first, end=first + len(results['rows']) - 1, total=results['total']))
+        with col2:
+            st.number_input(t("page", lang), min_value=1, max_value=results['pages'], step=1, key="results_page")
+
+        for row in results['rows']:
+            analysis_result = row['payload']
+            if row['business_id']:
+                label = f"{row['url']} · {row['business_name']} ({t('search_group', lang, query=row['search_query'])})"
             else:
-                url = business_or_url
-                analyses = pages
-                with st.expander(f"{url} ({len(analyses)} {t('analyses', lang)})"):
-                    for idx, analysis_result in enumerate(analyses):
-                        st.markdown(f"**{t('analysis', lang)} {idx + 1} ({t('date', lang)}: {analysis_result.get('timestamp', 'N/A')})**")
-                        unique_id = str(analysis_result.get('id', idx))
-                        _display_analysis_result(analysis_result, hubspot_available, unique_id=unique_id)
-
-    # Download option
-    if organized_data:
-        csv_rows = []
-        for group_name, businesses_or_urls in organized_data.items():
-            for business_or_url, pages in businesses_or_urls.items():
-                if group_name.startswith("Search:"):
-                    for page_url, analyses in pages.items():
-                        for analysis_result in analyses:
-                            contact_info = analysis_result.get('contact_info', {})
-                            seo = analysis_result.get('seo_analysis', {})
-                            ai_analysis = analysis_result.get('ai_analysis', {})
-                            
-                            csv_rows.append({
-                                "Group": group_name,
-                                "Business": business_or_url,
-                                "URL": page_url,
-                                "SEO Score": seo.get("overall_score", "N/A"),
-                                "Critical Issues": ", ".join(seo.get("critical_issues", [])),
-                                "Emails": ", ".join(contact_info.get('emails', [])),
-                                "Phones": ", ".join(contact_info.get('phones', [])),
-                                "AI Analysis": ai_analysis.get('response', '') if isinstance(ai_analysis, dict) else '',
-                            })
-                else:
-                    url = business_or_url
-                    analyses = pages
-                    
-                    for analysis_result in analyses:
-                        contact_info = analysis_result.get('contact_info', {})
-                        seo = analysis_result.get('seo_analysis', {})
-                        ai_analysis = analysis_result.get('ai_analysis', {})
-                        
-                        csv_rows.append({
-                            "Group": group_name,
-                            "Business": "N/A",
-                            "URL": url,
-                            "SEO Score": seo.get("overall_score", "N/A"),
-                            "Critical Issues": ", ".join(seo.get("critical_issues", [])),
-                            "Emails": ", ".join(contact_info.get('emails', [])),
-                            "Phones": ", ".join(contact_info.get('phones', [])),
-                            "AI Analysis": ai_analysis.get('response', '') if isinstance(ai_analysis, dict) else '',
-                        })
-
-        if csv_rows:
-            df = pd.DataFrame(csv_rows)
+                label = row['url']
+            with st.expander(f"{label} · {row['overall_score']}/100"):
+                st.markdown(f"**{t('analysis', lang)} ({t('date', lang)}: {row['timestamp']})**")
+                _display_analysis_result(analysis_result, hubspot_available, unique_id=str(row['id']))
+
+    # Export: streamed from SQL to a temporary file, only when requested
+    col1, col2 = st.columns([1, 2])
+    with col1:
+        export_format = st.selectbox(t("export_format", lang), options=EXPORT_FORMATS, format_func=str.upper, key="export_format")
+    with col2:
+        if st.button(t("prepare_export", lang), use_container_width=True, key="prepare_export_btn"):
+            st.session_state['export_file'] = prepare_export(export_format, filters)
+
+    export_file = st.session_state.get('export_file')
+    if export_file and os.path.exists(export_file['path']):
+        with open(export_file['path'], 'rb') as f:
             st.download_button(
-                label=t("export_results_csv", lang),
-                data=df.to_csv(index=False),
-                file_name="analysis_results.csv",
-                mime="text/csv",
+                label=t("download_export", lang, count=export_file['count'], fmt=export_file['format'].upper()),
+                data=f,
+                file_name=f"analysis_results.{export_file['format']}",
+                mime=EXPORT_MIME_TYPES[export_file['format']],
                 use_container_width=True
             )
 
@@ -1198,14 +1007,14 @@ if st.session_state.get('business_search_triggered', False):
         st.session_state.get('business_search_batch_size', 5),
         st.session_state.get('business_search_page', 1)
     )
-    st.session_state['business_search_complete'] = True
+    st.session_state['business_search_queued'] = True
     st.session_state['last_search_city'] = st.session_state.get('business_search_city', '')
     st.session_state['last_search_industry'] = st.session_state.get('business_search_industry', '')
     st.session_state['last_search_page'] = st.session_state.get('business_search_page', 1)
     st.rerun()
 
-if st.session_state.get('business_search_complete', False):
-    st.success(t("business_search_complete", lang))
+if st.session_state.get('business_search_queued', False):
+    st.success(t("business_search_queued", lang))
 
 if st.session_state.get('last_search_city') and st.session_state.get('last_search_industry'):
     st.info(t("showing_results_for", lang, industry=st.session_state['last_search_industry'], city=st.session_state['last_search_city']))
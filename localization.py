@@ -0,0 +1,88 @@
+import json
+import logging
+import os
+import string
+from functools import lru_cache
+from typing import Dict, FrozenSet, Tuple
+
+logger = logging.getLogger(__name__)
+
+TRANSLATIONS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'translations.json')
+DEFAULT_LANG = "en"
+
+# A compiled entry is the raw template plus the placeholder names it expects.
+# Entries without placeholders are returned as-is, without calling str.format.
+CompiledTemplate = Tuple[str, FrozenSet[str]]
+
+
+class Translator:
+    def __init__(self, file_path: str = TRANSLATIONS_FILE, default_lang: str = DEFAULT_LANG):
+        self.default_lang = default_lang
+        with open(file_path, 'r', encoding='utf-8') as f:
+            raw = json.load(f)
+        self.tables = self._compile(raw)
+
+    def _compile(self, raw: Dict[str, Dict[str, str]]) -> Dict[str, Dict[str, CompiledTemplate]]:
+        """
+        Validate every language against the default one and build flat
+        per-language lookup tables (missing keys fall back to the default language).
+        """
+        if self.default_lang not in raw:
+            raise ValueError(f"Default language '{self.default_lang}' missing from translations")
+
+        formatter = string.Formatter()
+        compiled = {}
+        for lang, entries in raw.items():
+            table = {}
+            for key, text in entries.items():
+                try:
+                    fields = frozenset(name for _, name, _, _ in formatter.parse(text) if name)
+                except ValueError as e:
+                    raise ValueError(f"Invalid template for '{key}' ({lang}): {e}")
+                table[key] = (text, fields)
+            compiled[lang] = table
+
+        base = compiled[self.default_lang]
+        for lang, table in compiled.items():
+            if lang == self.default_lang:
+                continue
+            missing = base.keys() - table.keys()
+            extra = table.keys() - base.keys()
+            if missing:
+                logger.warning(f"Translations for '{lang}' missing keys: {sorted(missing)}")
+            if extra:
+                logger.warning(f"Translations for '{lang}' have unknown keys: {sorted(extra)}")
+            for key in base.keys() & table.keys():
+                if base[key][1] != table[key][1]:
+                    logger.warning(
+                        f"Placeholder mismatch for '{key}' ({lang}): "
+                        f"{sorted(table[key][1])} vs {sorted(base[key][1])}"
+                    )
+            compiled[lang] = {**base, **table}
+
+        return compiled
+
+    def t(self, key: str, lang: str = DEFAULT_LANG, **kwargs) -> str:
+        """
+        Look up a translated string and fill in its placeholders.
+        Unknown languages and keys fall back to the key itself.
+        """
+        entry = self.tables.get(lang, {}).get(key)
+        if entry is None:
+            return key
+        text, fields = entry
+        if kwargs and fields:
+            return text.format(**kwargs)
+        return text
+
+
+@lru_cache(maxsize=None)
+def get_translator(file_path: str = TRANSLATIONS_FILE) -> Translator:
+    """
+    Load and compile translations once per process.
+    """
+    return Translator(file_path)
+
+
+def t(key: str, lang: str = DEFAULT_LANG, **kwargs) -> str:
+    return get_translator().t(key, lang, **kwargs)
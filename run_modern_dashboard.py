@@ -17,14 +17,20 @@ def main():
         print("🔄 Press Ctrl+C to stop the server")
         print("-" * 60)
         
-        # Run the modern dashboard
-        subprocess.run([
-            sys.executable, "-m", "streamlit", "run", 
-            "dashboard_app_modern.py",
-            "--server.port", "8501",
-            "--server.address", "localhost",
-            "--browser.gatherUsageStats", "false"
-        ])
+        # Analyses run in the background job runner, next to the dashboard
+        job_runner = subprocess.Popen([sys.executable, os.path.join("scripts", "job_runner.py")])
+        try:
+            # Run the modern dashboard
+            subprocess.run([
+                sys.executable, "-m", "streamlit", "run", 
+                "dashboard_app_modern.py",
+                "--server.port", "8501",
+                "--server.address", "localhost",
+                "--browser.gatherUsageStats", "false"
+            ])
+        finally:
+            job_runner.terminate()
+            job_runner.wait()
         
     except ImportError:
         print("❌ Streamlit is not installed. Please install it first:")
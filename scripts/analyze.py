@@ -3,8 +3,9 @@ import os
 import argparse
 from pathlib import Path
 import logging
-from typing import List, Dict
-import json
+from typing import List, Dict, Optional, Set, Tuple
+import threading
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 from urllib.parse import urlparse, urljoin
 import requests
@@ -16,10 +17,26 @@ sys.path.append(project_root)
 
 from ai_client_acquisition.analysis.seo_analyzer import SEOAnalyzer
 from ai_client_acquisition.extraction.contact_extractor import ContactExtractor
+from ai_client_acquisition.discovery.canonical import unique_urls, url_key
+from ai_client_acquisition.discovery.scheduler import HOST_CONCURRENCY, REQUEST_DELAY, DomainScheduler, registered_domain
+from ai_client_acquisition.discovery.throttle import AIMDThrottle
+from ai_client_acquisition.jobs.checkpoint import ResumableOutput
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Analyzers are built once per process (the NLTK stopword set, compiled
+# patterns) and shared by its threads; they keep no per-URL state.
+_analyzers = None
+_analyzers_lock = threading.Lock()
+
+def get_analyzers():
+    global _analyzers
+    with _analyzers_lock:
+        if _analyzers is None:
+            _analyzers = (ContactExtractor(), SEOAnalyzer())
+        return _analyzers
+
 def get_navbar_links(main_url):
     try:
         response = requests.get(main_url, timeout=10)
@@ -46,7 +63,8 @@ def get_navbar_links(main_url):
                         full_url = urljoin(main_url, href)
                         links.add(full_url)
         links.add(main_url)
-        return list(links)
+        # Sorted, so reruns (and worker processes) see the same page order
+        return sorted(unique_urls(links))
     except Exception as e:
         logger.error(f"Error extracting navbar links from {main_url}: {e}")
         return [main_url]
@@ -83,17 +101,10 @@ def generate_recommendations(seo_analysis):
 
 def analyze_url(url):
     try:
-        contact_extractor = ContactExtractor()
-        seo_analyzer = SEOAnalyzer()
+        contact_extractor, seo_analyzer = get_analyzers()
         contact_info = contact_extractor.extract_from_url(url)
         seo_analysis = seo_analyzer.analyze_url(url)
-        platform_type = "unknown"
-        if seo_analysis.get('platform_indicators', {}).get('wordpress'):
-            platform_type = "wordpress"
-        elif seo_analysis.get('platform_indicators', {}).get('shopify'):
-            platform_type = "shopify"
-        elif seo_analysis.get('platform_indicators', {}).get('custom'):
-            platform_type = "custom"
+        platform_type = seo_analysis.get('platform', "unknown")
         recommendations = generate_recommendations(seo_analysis)
         return {
             "url": url,
@@ -112,38 +123,126 @@ def analyze_url(url):
 def load_seed_urls(file_path: str) -> List[str]:
     try:
         with open(file_path, 'r', encoding='utf-8') as f:
-            urls = [line.strip() for line in f if line.strip()]
+            # One canonical URL per site page, however the file spells it
+            urls = unique_urls(f)
             logger.info(f"Successfully loaded {len(urls)} URLs from {file_path}")
             return urls
     except Exception as e:
         logger.error(f"Error loading seed URLs from {file_path}: {str(e)}")
         return []
 
-def save_analysis_results(results: List[dict], output_file: str):
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(results, f, indent=2, ensure_ascii=False)
+def group_seed_urls(seed_urls: List[str], sites_per_batch: int) -> List[List[str]]:
+    """
+    Split the seeds into batches of whole sites: all seeds of a registered
+    domain land in the same batch, so no two processes hit one site.
+    """
+    sites: Dict[str, List[str]] = {}
+    for url in seed_urls:
+        sites.setdefault(registered_domain(url), []).append(url)
+    groups = list(sites.values())
+    return [
+        [url for group in groups[start:start + sites_per_batch] for url in group]
+        for start in range(0, len(groups), sites_per_batch)
+    ]
+
+def analyze_sites(seed_urls: List[str], concurrency: int, host_concurrency: int, delay: float,
+                  skip: Set[str] = frozenset(), target_latency: Optional[float] = None) -> Tuple[List[dict], List[str]]:
+    """
+    Analyze the seeds and their navbar pages, sites interleaved on threads.
+    Pages in `skip` (finished in an earlier run) are not analyzed again.
+    With `target_latency`, each site's concurrency and delay adapt to how
+    long its pages take (see throttle.py).
+    Returns the results in seed order, whatever order the sites finish in,
+    and the seeds whose pages were all analyzed successfully.
+    """
+    # One scheduler for both passes, so per-site spacing carries over
+    throttle = None
+    if target_latency:
+        throttle = AIMDThrottle(start_concurrency=host_concurrency, start_delay=delay, target_latency=target_latency)
+    scheduler = DomainScheduler(per_host_concurrency=host_concurrency, min_delay=delay, throttle=throttle)
+
+    for position, seed_url in enumerate(seed_urls):
+        scheduler.add(seed_url, position)
+    subpages_by_seed = {}
+    for seed_url, position, subpages, error in scheduler.run(lambda url, _: get_navbar_links(url), concurrency):
+        logger.info(f"Found {len(subpages)} navbar pages for {seed_url} (including main page)")
+        subpages_by_seed[position] = subpages
+
+    pages = []
+    seen_keys = {url_key(url) for url in skip}
+    for position in range(len(seed_urls)):
+        for url in subpages_by_seed.get(position, []):
+            if url_key(url) in seen_keys:
+                continue
+            seen_keys.add(url_key(url))
+            scheduler.add(url, len(pages))
+            pages.append(url)
+
+    results = [None] * len(pages)
+    for url, index, result, error in scheduler.run(lambda url, _: analyze_url(url), concurrency):
+        logger.info(f"    Analyzed: {url}")
+        results[index] = result
+
+    succeeded = {url_key(url) for url in skip} | {url_key(result['url']) for result in results if 'error' not in result}
+    finished_seeds = [
+        seed_url for position, seed_url in enumerate(seed_urls)
+        if all(url_key(url) in succeeded for url in subpages_by_seed.get(position, []))
+    ]
+    return results, finished_seeds
+
+def _analyze_batch(args) -> Tuple[List[dict], List[str]]:
+    # Module-level, so worker processes can unpickle it
+    return analyze_sites(*args)
 
 def main():
     parser = argparse.ArgumentParser(description='Analyze only the main page and navbar subpages for each seed URL')
     parser.add_argument('--seed-urls', required=True, help='Path to file containing seed URLs')
-    parser.add_argument('--output', default='analysis_results.json', help='Output file for results')
+    parser.add_argument('--output', default='analysis_results.jsonl', help='Output file for results (JSON Lines)')
+    parser.add_argument('--resume', action='store_true',
+                        help='Continue an interrupted run, skipping the pages and seeds in its checkpoint')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Processes analyzing batches of sites in parallel (parsing is CPU-bound)')
+    parser.add_argument('--concurrency', type=int, default=4, help='Pages fetched in parallel by each process, across sites')
+    parser.add_argument('--host-concurrency', type=int, default=HOST_CONCURRENCY,
+                        help='Pages of one site analyzed in parallel')
+    parser.add_argument('--delay', type=float, default=REQUEST_DELAY,
+                        help='Minimum seconds between requests to one site (a longer robots.txt Crawl-delay wins)')
+    parser.add_argument('--adaptive', action='store_true',
+                        help='Adapt each site\'s concurrency and delay to its response times, starting from the values above')
+    parser.add_argument('--target-latency', type=float, default=10.0,
+                        help='With --adaptive: seconds per page analysis (several requests) under which a site gets more load')
+    parser.add_argument('--sites-per-batch', type=int, default=25, help='Sites handed to a process at a time')
     args = parser.parse_args()
 
-    seed_urls = load_seed_urls(args.seed_urls)
-    all_results = []
-    seen_urls = set()
-    for seed_url in seed_urls:
-        logger.info(f"Extracting navbar links from {seed_url}")
-        subpages = get_navbar_links(seed_url)
-        logger.info(f"  Found {len(subpages)} navbar pages (including main page)")
-        for url in subpages:
-            if url in seen_urls:
-                continue
-            seen_urls.add(url)
-            logger.info(f"    Analyzing: {url}")
-            result = analyze_url(url)
-            all_results.append(result)
-            save_analysis_results(all_results, args.output)
+    with ResumableOutput(args.output, key_field='url', resume=args.resume) as output:
+        # Seeds are checkpointed as "seed:<url>" once all their pages are done
+        seed_urls = [url for url in load_seed_urls(args.seed_urls) if not output.is_done(f"seed:{url}")]
+        done_by_site: Dict[str, Set[str]] = {}
+        for key in output.done:
+            if not key.startswith('seed:'):
+                done_by_site.setdefault(registered_domain(key), set()).add(key)
+
+        batches = []
+        for batch in group_seed_urls(seed_urls, max(1, args.sites_per_batch)):
+            skip = set().union(*(done_by_site.get(site, set()) for site in {registered_domain(url) for url in batch}))
+            batches.append((batch, args.concurrency, args.host_concurrency, args.delay, skip,
+                            args.target_latency if args.adaptive else None))
+        logger.info(f"Analyzing {len(seed_urls)} seed URLs in {len(batches)} batches with {args.workers} workers")
+
+        def record(results: List[dict], finished_seeds: List[str]) -> None:
+            for result in results:
+                output.write(result, done='error' not in result)
+            for seed_url in finished_seeds:
+                output.mark(f"seed:{seed_url}")
+
+        # Batches come back in submission order, so the output is deterministic
+        if args.workers > 1:
+            with ProcessPoolExecutor(max_workers=args.workers) as executor:
+                for results, finished_seeds in executor.map(_analyze_batch, batches):
+                    record(results, finished_seeds)
+        else:
+            for batch in batches:
+                record(*_analyze_batch(batch))
     logger.info(f"Saved all results to {args.output}")
 
 if __name__ == "__main__":
@@ -0,0 +1,94 @@
+import sys
+import argparse
+import json
+import logging
+import random
+from pathlib import Path
+
+# Add the project root to the Python path
+project_root = str(Path(__file__).parent.parent)
+sys.path.append(project_root)
+
+from ai_client_acquisition.database.connection import get_raw_connection, init_db
+from ai_client_acquisition.database.payload_codec import (
+    decode_payload, encode_payload, resolve_codec, store_dictionary, train_dictionary
+)
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def payload_size(conn) -> int:
+    return conn.execute('SELECT IFNULL(SUM(LENGTH(CAST(analysis_data AS BLOB))), 0) FROM analysis_results').fetchone()[0]
+
+def train(conn, codec: str, sample_size: int, dictionary_size: int) -> int:
+    """
+    Train a dictionary on a random sample of stored payloads and store it.
+    """
+    ids = [row[0] for row in conn.execute('SELECT id FROM analysis_results WHERE analysis_data IS NOT NULL')]
+    ids = random.sample(ids, min(sample_size, len(ids)))
+    samples = []
+    for analysis_id in ids:
+        value = conn.execute('SELECT analysis_data FROM analysis_results WHERE id = ?', (analysis_id,)).fetchone()[0]
+        samples.append(json.dumps(decode_payload(conn, value), ensure_ascii=False).encode('utf-8'))
+    if len(samples) < 2:
+        logger.info("Not enough payloads to train a dictionary; compressing without one")
+        return 0
+
+    dictionary = train_dictionary(samples, codec, dictionary_size)
+    dictionary_id = store_dictionary(conn, codec, dictionary, len(samples))
+    conn.commit()
+    logger.info(f"Stored {codec} dictionary {dictionary_id} ({len(dictionary)} bytes, {len(samples)} samples)")
+    return dictionary_id
+
+def rewrite_payloads(conn, codec: str, batch_size: int) -> int:
+    """
+    Re-encode every stored payload with the codec, committing per batch.
+    """
+    ids = [row[0] for row in conn.execute('SELECT id FROM analysis_results WHERE analysis_data IS NOT NULL')]
+    for start in range(0, len(ids), batch_size):
+        for analysis_id in ids[start:start + batch_size]:
+            value = conn.execute('SELECT analysis_data FROM analysis_results WHERE id = ?', (analysis_id,)).fetchone()[0]
+            conn.execute(
+                'UPDATE analysis_results SET analysis_data = ? WHERE id = ?',
+                (encode_payload(conn, decode_payload(conn, value), codec), analysis_id)
+            )
+        conn.commit()
+        logger.info(f"Re-encoded {min(start + batch_size, len(ids))}/{len(ids)} payloads")
+    return len(ids)
+
+def main():
+    parser = argparse.ArgumentParser(description='Compress (or decompress) stored analysis payloads')
+    parser.add_argument('--codec', choices=['zlib', 'zstd', 'json'], default='zlib',
+                        help='Target format; json stores plain text again')
+    parser.add_argument('--no-train', action='store_true', help='Reuse the newest stored dictionary')
+    parser.add_argument('--sample-size', type=int, default=500, help='Payloads sampled for dictionary training')
+    parser.add_argument('--dictionary-size', type=int, help='Dictionary size in bytes')
+    parser.add_argument('--batch-size', type=int, default=200, help='Rows per transaction')
+    parser.add_argument('--vacuum', action='store_true', help='VACUUM afterwards to give the space back')
+
+    args = parser.parse_args()
+    codec = resolve_codec(args.codec)
+
+    init_db()
+    conn = get_raw_connection()
+    try:
+        before = payload_size(conn)
+        if codec != 'json' and not args.no_train:
+            train(conn, codec, args.sample_size, args.dictionary_size)
+        count = rewrite_payloads(conn, codec, args.batch_size)
+        after = payload_size(conn)
+        if args.vacuum:
+            conn.execute('VACUUM')
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+    print(f"Re-encoded {count} payloads as {codec}: {before / 1024:.1f} KB -> {after / 1024:.1f} KB")
+    if codec != 'json':
+        print(f"Set ANALYSIS_PAYLOAD_CODEC={codec} to store new analyses in the same format.")
+
+if __name__ == "__main__":
+    main()
@@ -13,7 +13,7 @@ from collections import Counter
 project_root = str(Path(__file__).parent.parent)
 sys.path.append(project_root)
 
-from ai_client_acquisition.database.connection import get_db
+from ai_client_acquisition.database.connection import get_db, init_db
 from ai_client_acquisition.database.models import Company, ContactInfo, SEOAnalysis, OutreachHistory, OutreachStatus, PlatformType
 
 # Configure logging
@@ -269,7 +269,8 @@ def main():
     args = parser.parse_args()
     
     try:
-        # Get database session
+        # Get database session (schema is shared with the dashboards)
+        init_db()
         db = next(get_db())
         
         # Get dashboard data
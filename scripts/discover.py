@@ -4,17 +4,22 @@ import argparse
 from pathlib import Path
 import logging
 from typing import List
-import json
+import shutil
 
 # Add the project root to the Python path
 project_root = str(Path(__file__).parent.parent)
 sys.path.append(project_root)
 
 from ai_client_acquisition.discovery.crawler import run_crawler
-from ai_client_acquisition.database.connection import get_db
-from ai_client_acquisition.database.models import Company, PlatformType
+from ai_client_acquisition.discovery.runner import CRAWL_WORKERS, run_crawlers
+from ai_client_acquisition.database.connection import db_connection, get_raw_connection, init_db
+from ai_client_acquisition.database.analysis_store import load_latest_analysis, save_analysis
+from ai_client_acquisition.database.models import PlatformType
 from ai_client_acquisition.extraction.contact_extractor import ContactExtractor
 from ai_client_acquisition.analysis.seo_analyzer import SEOAnalyzer
+from ai_client_acquisition.discovery.canonical import unique_urls, url_key
+from ai_client_acquisition.jobs.checkpoint import ResumableOutput
+from ai_client_acquisition.jobs.queue import ANALYZE_URL, enqueue_tasks
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -25,20 +30,25 @@ def load_seed_urls(file_path: str) -> List[str]:
     Load seed URLs from a file.
     """
     with open(file_path, 'r') as f:
-        return [line.strip() for line in f if line.strip()]
+        # One canonical URL per page, however the file spells it
+        return unique_urls(f)
 
-def save_discovery_results(results: List[dict], output_file: str):
-    """
-    Save discovery results to a JSON file.
-    """
-    with open(output_file, 'w') as f:
-        json.dump(results, f, indent=2)
-
-def process_discovered_website(url: str, db_session) -> dict:
+def process_discovered_website(url: str, conn) -> dict:
     """
     Process a discovered website: extract contacts and analyze SEO.
+    Sites already analyzed (here or from the dashboard) are not re-analyzed.
     """
     try:
+        existing = load_latest_analysis(conn, url)
+        if existing:
+            logger.info(f"Reusing stored analysis for {url}")
+            return {
+                'url': url,
+                'platform_type': existing.get('platform_type', PlatformType.UNKNOWN.value),
+                'contact_info': existing.get('contact_info', {}),
+                'seo_analysis': existing.get('seo_analysis', {})
+            }
+        
         # Initialize extractors
         contact_extractor = ContactExtractor()
         seo_analyzer = SEOAnalyzer()
@@ -49,31 +59,22 @@ def process_discovered_website(url: str, db_session) -> dict:
         # Analyze SEO
         seo_analysis = seo_analyzer.analyze_url(url)
         
-        # Determine platform type
-        platform_type = PlatformType.UNKNOWN
-        if seo_analysis.get('platform_indicators', {}).get('wordpress'):
-            platform_type = PlatformType.WORDPRESS
-        elif seo_analysis.get('platform_indicators', {}).get('shopify'):
-            platform_type = PlatformType.SHOPIFY
-        elif seo_analysis.get('platform_indicators', {}).get('custom'):
-            platform_type = PlatformType.CUSTOM
-        
-        # Create company record
-        company = Company(
-            website_url=url,
-            platform_type=platform_type
-        )
-        db_session.add(company)
-        db_session.commit()
-        
-        return {
+        result = {
             'url': url,
-            'platform_type': platform_type.value,
+            # Identified by SEOAnalyzer from the page's fingerprints
+            'platform_type': seo_analysis.get('platform', PlatformType.UNKNOWN.value),
             'contact_info': contact_info,
             'seo_analysis': seo_analysis
         }
         
+        # Store the analysis; this also creates/updates the company record
+        save_analysis(conn, url, result)
+        conn.commit()
+        
+        return result
+        
     except Exception as e:
+        conn.rollback()
         logger.error(f"Error processing website {url}: {str(e)}")
         return {
             'url': url,
@@ -86,8 +87,18 @@ def main():
     """
     parser = argparse.ArgumentParser(description='Discover and analyze websites')
     parser.add_argument('--seed-urls', required=True, help='Path to file containing seed URLs')
-    parser.add_argument('--output', default='discovery_results.json', help='Output file for results')
+    parser.add_argument('--output', default='discovery_results.jsonl', help='Output file for results (JSON Lines)')
+    parser.add_argument('--resume', action='store_true', help='Continue an interrupted run, skipping finished URLs')
     parser.add_argument('--allowed-domains', help='Comma-separated list of allowed domains')
+    parser.add_argument('--jobdir', help='Directory for the crawl state (default: <output>.crawl); kept for --resume')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Recrawl only the pages changed since the last crawl (sitemap lastmod, ETag, Last-Modified)')
+    parser.add_argument('--crawl-workers', type=int, default=CRAWL_WORKERS,
+                        help='Crawler processes, each crawling its share of the sites')
+    parser.add_argument('--seeds-only', action='store_true',
+                        help='Analyze only the seed URLs instead of crawling their sites')
+    parser.add_argument('--queue', action='store_true',
+                        help='Queue the URLs for the distributed workers (scripts/worker.py) instead of analyzing them here')
     args = parser.parse_args()
     
     try:
@@ -98,18 +109,41 @@ def main():
         # Parse allowed domains
         allowed_domains = args.allowed_domains.split(',') if args.allowed_domains else None
         
-        # Get database session
-        db = next(get_db())
-        
-        # Process each seed URL
-        results = []
-        for url in seed_urls:
-            logger.info(f"Processing {url}")
-            result = process_discovered_website(url, db)
-            results.append(result)
+        # Get database connection (shared schema with the dashboard)
+        init_db()
+        if args.queue:
+            with db_connection() as queue_conn:
+                added = enqueue_tasks(queue_conn, ANALYZE_URL, [{'url': url} for url in seed_urls],
+                                      dedupe_keys=[f"{ANALYZE_URL}:{url_key(url)}" for url in seed_urls])
+            logger.info(f"Queued {added} URLs for the workers ({len(seed_urls) - added} already queued)")
+            return
+        if not args.seeds_only:
+            # Crawl the sites; pages are analyzed from the crawled responses as they arrive
+            jobdir = args.jobdir or f"{args.output}.crawl"
+            # On --resume every seed is passed again: their domains bound the
+            # crawl, and the crawl state in the JOBDIR skips finished pages
+            if not args.resume and os.path.isdir(jobdir):
+                # Scrapy resumes from any existing JOBDIR; a new run starts clean
+                shutil.rmtree(jobdir)
+            if args.crawl_workers > 1:
+                run_crawlers(seed_urls, allowed_domains, output=args.output, resume=args.resume, jobdir=jobdir,
+                             incremental=args.incremental, workers=args.crawl_workers)
+            else:
+                run_crawler(seed_urls, allowed_domains, output=args.output, resume=args.resume, jobdir=jobdir,
+                            incremental=args.incremental)
+            logger.info(f"Results saved to {args.output}")
+            return
+        conn = get_raw_connection()
         
-        # Save results
-        save_discovery_results(results, args.output)
+        # Process each seed URL, appending results as they complete
+        with ResumableOutput(args.output, key_field='url', resume=args.resume) as output:
+            for url in seed_urls:
+                if output.is_done(url):
+                    continue
+                logger.info(f"Processing {url}")
+                result = process_discovered_website(url, conn)
+                output.write(result, done='error' not in result)
+        conn.close()
         logger.info(f"Results saved to {args.output}")
         
     except Exception as e:
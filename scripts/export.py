@@ -0,0 +1,59 @@
+import sys
+import argparse
+import logging
+from datetime import date
+from pathlib import Path
+
+# Add the project root to the Python path
+project_root = str(Path(__file__).parent.parent)
+sys.path.append(project_root)
+
+from ai_client_acquisition.database.connection import get_raw_connection, init_db
+from ai_client_acquisition.database.export import EXPORT_CHUNK_SIZE, EXPORT_FORMATS, export_analyses
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def main():
+    parser = argparse.ArgumentParser(description='Export stored analyses to CSV, JSONL or Parquet')
+    parser.add_argument('--output', required=True, help='Output file')
+    parser.add_argument('--format', choices=['csv', 'jsonl', 'parquet'],
+                        help='Output format (default: from the output file extension, else csv)')
+    parser.add_argument('--search-query', help='Only analyses from this business search')
+    parser.add_argument('--direct', action='store_true', help='Only direct-URL analyses')
+    parser.add_argument('--min-score', type=int, help='Minimum overall SEO score')
+    parser.add_argument('--max-score', type=int, help='Maximum overall SEO score')
+    parser.add_argument('--since', type=date.fromisoformat, help='Analyzed on or after (YYYY-MM-DD)')
+    parser.add_argument('--until', type=date.fromisoformat, help='Analyzed on or before (YYYY-MM-DD)')
+    parser.add_argument('--has-email', action='store_true', help='Only sites with an email address')
+    parser.add_argument('--chunk-size', type=int, default=EXPORT_CHUNK_SIZE, help='Rows read per query')
+
+    args = parser.parse_args()
+    fmt = args.format or Path(args.output).suffix.lstrip('.').lower()
+    if fmt not in ('csv', 'jsonl', 'parquet'):
+        fmt = 'csv'
+    if fmt not in EXPORT_FORMATS:
+        parser.error("Parquet export requires pyarrow (pip install pyarrow)")
+
+    filters = {
+        'search_query': args.search_query,
+        'direct': True if args.direct else None,
+        'min_score': args.min_score,
+        'max_score': args.max_score,
+        'since': args.since,
+        'until': args.until,
+        'has_email': True if args.has_email else None,
+    }
+
+    init_db()
+    conn = get_raw_connection()
+    try:
+        count = export_analyses(conn, fmt, args.output, filters, args.chunk_size)
+    finally:
+        conn.close()
+
+    print(f"Exported {count} analyses to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -7,27 +7,16 @@ project_root = str(Path(__file__).parent.parent)
 sys.path.append(project_root)
 
 from ai_client_acquisition.database.connection import init_db
-from ai_client_acquisition.database.models import Base
-from sqlalchemy import create_engine
-from dotenv import load_dotenv
 
 def main():
     """
-    Initialize the database by creating all tables.
+    Initialize the database by applying all schema migrations.
     """
-    # Load environment variables
-    load_dotenv()
-    
-    # Get database URL from environment
-    database_url = os.getenv("DATABASE_URL", "sqlite:///./client_acquisition.db")
-    
-    # Create engine
-    engine = create_engine(database_url)
-    
-    # Create all tables
-    Base.metadata.create_all(engine)
+    applied = init_db()
     
+    if applied:
+        print(f"Applied migrations: {', '.join(str(v) for v in applied)}")
     print("Database initialized successfully!")
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
@@ -0,0 +1,39 @@
+import sys
+import argparse
+import logging
+import signal
+from pathlib import Path
+
+# Add the project root to the Python path
+project_root = str(Path(__file__).parent.parent)
+sys.path.append(project_root)
+
+from ai_client_acquisition.database.connection import init_db
+from ai_client_acquisition.jobs.runner import JOB_POLL_INTERVAL, JOB_WORKERS, JobRunner
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def main():
+    parser = argparse.ArgumentParser(description='Run the analysis jobs queued from the dashboard')
+    parser.add_argument('--workers', type=int, default=JOB_WORKERS, help='Items analyzed in parallel')
+    parser.add_argument('--poll-interval', type=float, default=JOB_POLL_INTERVAL, help='Seconds between queue checks')
+    parser.add_argument('--once', action='store_true', help='Exit once the queue is empty')
+
+    args = parser.parse_args()
+
+    init_db()
+    runner = JobRunner(workers=args.workers, poll_interval=args.poll_interval)
+
+    # Finish the items in flight and hand the job back on Ctrl+C / SIGTERM
+    def shutdown(signum, frame):
+        logger.info("Stopping after the items in flight...")
+        runner.stop()
+    signal.signal(signal.SIGINT, shutdown)
+    signal.signal(signal.SIGTERM, shutdown)
+
+    runner.run(once=args.once)
+
+if __name__ == "__main__":
+    main()
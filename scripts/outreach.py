@@ -4,17 +4,17 @@ import argparse
 from pathlib import Path
 import logging
 from typing import List, Dict
-import json
 from datetime import datetime
 
 # Add the project root to the Python path
 project_root = str(Path(__file__).parent.parent)
 sys.path.append(project_root)
 
-from ai_client_acquisition.database.connection import get_db
+from ai_client_acquisition.database.connection import get_db, init_db
 from ai_client_acquisition.database.models import Company, ContactInfo, SEOAnalysis, OutreachHistory, OutreachStatus
 from ai_client_acquisition.personalization.email_generator import EmailGenerator
 from ai_client_acquisition.outreach.email_sender import EmailSender
+from ai_client_acquisition.jobs.checkpoint import ResumableOutput
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -30,15 +30,18 @@ def get_companies_to_contact(db_session, limit: int = 10) -> List[Company]:
         .limit(limit)\
         .all()
 
-def generate_and_send_emails(companies: List[Company], db_session) -> List[Dict]:
+def generate_and_send_emails(companies: List[Company], db_session, output: ResumableOutput) -> List[Dict]:
     """
-    Generate and send personalized emails to companies.
+    Generate and send personalized emails to companies. Each result is
+    appended to the output as soon as the company is done.
     """
     email_generator = EmailGenerator()
     email_sender = EmailSender()
     results = []
     
     for company in companies:
+        if output.is_done(company.id):
+            continue
         try:
             # Get company data
             contact_info = db_session.query(ContactInfo).filter_by(company_id=company.id).first()
@@ -80,6 +83,7 @@ def generate_and_send_emails(companies: List[Company], db_session) -> List[Dict]
                 'email': contact_info.email,
                 'send_result': send_result
             })
+            output.write(results[-1])
             
         except Exception as e:
             logger.error(f"Error processing company {company.id}: {str(e)}")
@@ -87,6 +91,7 @@ def generate_and_send_emails(companies: List[Company], db_session) -> List[Dict]
                 'company_id': company.id,
                 'error': str(e)
             })
+            output.write(results[-1], done=False)
     
     return results
 
@@ -96,11 +101,13 @@ def main():
     """
     parser = argparse.ArgumentParser(description='Run outreach campaign')
     parser.add_argument('--limit', type=int, default=10, help='Maximum number of companies to contact')
-    parser.add_argument('--output', default='outreach_results.json', help='Output file for results')
+    parser.add_argument('--output', default='outreach_results.jsonl', help='Output file for results (JSON Lines)')
+    parser.add_argument('--resume', action='store_true', help='Continue an interrupted run, skipping companies already handled')
     args = parser.parse_args()
     
     try:
-        # Get database session
+        # Get database session (schema is shared with the dashboards)
+        init_db()
         db = next(get_db())
         
         # Get companies to contact
@@ -108,11 +115,9 @@ def main():
         logger.info(f"Found {len(companies)} companies to contact")
         
         # Generate and send emails
-        results = generate_and_send_emails(companies, db)
-        
-        # Save results
-        with open(args.output, 'w') as f:
-            json.dump(results, f, indent=2)
+        # Sync after every email: a lost record would mean pitching a company twice
+        with ResumableOutput(args.output, key_field='company_id', resume=args.resume, fsync_every=1) as output:
+            results = generate_and_send_emails(companies, db, output)
         logger.info(f"Results saved to {args.output}")
         
         # Print summary
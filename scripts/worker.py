@@ -0,0 +1,99 @@
+import sys
+import argparse
+import logging
+import signal
+from pathlib import Path
+
+# Add the project root to the Python path
+project_root = str(Path(__file__).parent.parent)
+sys.path.append(project_root)
+
+from ai_client_acquisition.database.connection import db_connection, init_db
+from ai_client_acquisition.discovery.canonical import unique_urls, url_key
+from ai_client_acquisition.jobs.queue import (
+    ANALYZE_URL, TASK_LEASE_SECONDS, TASK_POLL_INTERVAL, TASK_WORKER_CONCURRENCY, enqueue_tasks, queue_stats,
+    requeue_dead_tasks
+)
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def load_urls(file_path: str):
+    with open(file_path, 'r', encoding='utf-8') as f:
+        return unique_urls(f)
+
+def run(args):
+    # Imported here so enqueue/stats work without the analyzers installed
+    from ai_client_acquisition.jobs.worker import TaskWorker
+
+    worker = TaskWorker(concurrency=args.concurrency, lease_seconds=args.lease, poll_interval=args.poll_interval,
+                        worker_id=args.worker_id)
+
+    # Finish the tasks in flight on Ctrl+C / SIGTERM; the rest stay queued
+    def shutdown(signum, frame):
+        logger.info("Stopping after the tasks in flight...")
+        worker.stop()
+    signal.signal(signal.SIGINT, shutdown)
+    signal.signal(signal.SIGTERM, shutdown)
+
+    worker.run(once=args.once)
+
+def enqueue(args):
+    urls = load_urls(args.urls)
+    with db_connection() as conn:
+        added = enqueue_tasks(
+            conn, ANALYZE_URL, [{'url': url, 'force': args.force} for url in urls],
+            dedupe_keys=[f"{ANALYZE_URL}:{url_key(url)}" for url in urls], priority=args.priority
+        )
+    print(f"Queued {added} of {len(urls)} URLs ({len(urls) - added} already queued)")
+
+def stats(args):
+    with db_connection() as conn:
+        counts = queue_stats(conn)
+    print(", ".join(f"{name}: {count}" for name, count in counts.items()))
+
+def requeue_dead(args):
+    with db_connection() as conn:
+        requeued = requeue_dead_tasks(conn, args.ids)
+    print(f"Requeued {requeued} dead tasks")
+
+def main():
+    parser = argparse.ArgumentParser(description='Distributed analysis workers sharing the task queue in the database')
+    subparsers = parser.add_subparsers(dest='command')
+
+    run_parser = subparsers.add_parser('run', help='Run a worker (default)')
+    run_parser.add_argument('--concurrency', type=int, default=TASK_WORKER_CONCURRENCY,
+                            help='Tasks run in parallel by this worker')
+    run_parser.add_argument('--lease', type=float, default=TASK_LEASE_SECONDS,
+                            help='Seconds a claimed task stays reserved without a heartbeat')
+    run_parser.add_argument('--poll-interval', type=float, default=TASK_POLL_INTERVAL,
+                            help='Seconds between queue checks when idle')
+    run_parser.add_argument('--worker-id', help='Name of this worker (default: host:pid:random)')
+    run_parser.add_argument('--once', action='store_true', help='Exit once no task is ready')
+    run_parser.set_defaults(func=run)
+
+    enqueue_parser = subparsers.add_parser('enqueue', help='Queue analysis tasks for the URLs in a file')
+    enqueue_parser.add_argument('urls', help='File with one URL per line')
+    enqueue_parser.add_argument('--force', action='store_true', help='Re-analyze URLs that were already analyzed')
+    enqueue_parser.add_argument('--priority', type=int, default=0, help='Higher runs first')
+    enqueue_parser.set_defaults(func=enqueue)
+
+    stats_parser = subparsers.add_parser('stats', help='Show queue counts')
+    stats_parser.set_defaults(func=stats)
+
+    dead_parser = subparsers.add_parser('requeue-dead', help='Retry dead-lettered tasks')
+    dead_parser.add_argument('ids', nargs='*', type=int, help='Task ids (default: all)')
+    dead_parser.set_defaults(func=requeue_dead)
+
+    # Run is the default: `worker.py --once` means `worker.py run --once`
+    argv = sys.argv[1:]
+    if not argv or (argv[0] not in subparsers.choices and argv[0] not in ('-h', '--help')):
+        argv = ['run'] + argv
+    args = parser.parse_args(argv)
+
+    init_db()
+    args.func(args)
+
+if __name__ == "__main__":
+    main()